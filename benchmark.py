@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark für TKH mit synthetischen Geräten.
+
+Erzeugt Konfigurationen mit 10 bis 5000 Kanälen gemischter Typen (thermocouple, pressure,
+mfc, valve, easy_PI, direct_Heat, ExtInput, FlowMeter) und misst im Headless-Modus:
+  - Konstruktion von TKH
+  - Kosten eines Ticks (control_step + display_step + update_logging)
+  - Durchsatz von save_values
+  - Kosten von set_data
+  - Kosten eines Ticks im Excel-Modus
+
+Das Ergebnis wird als JSON ausgegeben, damit Messungen verschiedener Versionen verglichen
+werden können:
+
+    python benchmark.py --sizes 10 100 1000 --output bench_new.json --compare bench_old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import tkinter_lib
+from tkinter_lib import TKH, Recipe
+
+# Reihenfolge der Gerätetypen beim Erzeugen der Konfiguration
+CHANNEL_TYPES = ("thermocouple", "pressure", "mfc", "valve", "easy_PI", "direct_Heat", "ExtInput", "FlowMeter")
+CHANNELS_PER_BRICKLET = 4
+
+
+# --- Synthetische Geräte ---
+class SyntheticInput:
+    """Eingangsgerät mit einer Liste von Kanalwerten (wie tfh_obj.inputs[uid])."""
+    def __init__(self, channels=CHANNELS_PER_BRICKLET, rng=None):
+        rng = rng or random.Random(0)
+        self.values = [rng.uniform(4e6, 20e6) for _ in range(channels)]
+
+    def jitter(self, rng):
+        for channel in range(len(self.values)):
+            self.values[channel] += rng.uniform(-1e3, 1e3)
+
+
+class SyntheticOutput:
+    """Ausgangsgerät mit einer Liste von Kanalwerten (wie tfh_obj.outputs[uid])."""
+    def __init__(self, channels=CHANNELS_PER_BRICKLET):
+        self.values = [0] * channels
+
+
+class SyntheticModbusDevice:
+    """Modbus-Gerät mit Durchfluss und Sollwert (wie modbus_obj.devices[name])."""
+    def __init__(self, flow=0.0):
+        self.flow = flow
+        self.setpoint = 0.0
+
+    def set(self, value):
+        self.setpoint = value
+
+
+class SyntheticTFH:
+    """Ersatz für tfh_obj mit config, inputs, outputs und operation_mode."""
+    def __init__(self, config, operation_mode=0, seed=0):
+        self.config = config
+        self.operation_mode = operation_mode
+        self.rng = random.Random(seed)
+        self.inputs = {}
+        self.outputs = {}
+        for control_rule in config.values():
+            input_device = control_rule.get("input_device")
+            if input_device and input_device not in config and "extern" not in input_device.lower():
+                self.inputs.setdefault(input_device, SyntheticInput(rng=self.rng))
+            output_device = control_rule.get("output_device")
+            if output_device:
+                self.outputs.setdefault(output_device, SyntheticOutput())
+
+    def step(self):
+        """Verändert alle Eingangswerte leicht, damit sich die Anzeige ändert."""
+        for device in self.inputs.values():
+            device.jitter(self.rng)
+
+
+class SyntheticModbus:
+    """Ersatz für modbus_obj mit config, devices und operation_mode."""
+    def __init__(self, config, operation_mode=0):
+        self.config = config
+        self.operation_mode = operation_mode
+        self.devices = {name: SyntheticModbusDevice(flow=10.0) for name in config}
+
+
+def make_configs(channels, modbus_mfc=0):
+    """
+    Erzeugt tfh- und Modbus-Konfigurationen mit insgesamt etwa channels Kanälen.
+
+    Die Gerätetypen werden reihum aus CHANNEL_TYPES gewählt, je CHANNELS_PER_BRICKLET Kanäle
+    teilen sich ein Eingangs- bzw. Ausgangsgerät. Jeder easy_PI regelt auf das zuletzt
+    erzeugte Thermoelement.
+    """
+    tfh_config = {}
+    last_thermocouple = None
+    for i in range(channels):
+        device_type = CHANNEL_TYPES[i % len(CHANNEL_TYPES)]
+        name = f"{device_type}_{i}"
+        rule = {
+            "type": device_type,
+            "x": (i * 37) % 1200,
+            "y": (i * 53) % 700,
+            "DeviceInfo": {"unit": "u", "gradient": 1.5, "y-axis": 4e6},
+        }
+        uid = f"in_{i // CHANNELS_PER_BRICKLET}"
+        channel = i % CHANNELS_PER_BRICKLET
+        out_uid = f"out_{i // CHANNELS_PER_BRICKLET}"
+
+        if device_type in ("thermocouple", "pressure", "ExtInput", "FlowMeter"):
+            rule.update(input_device=uid, input_channel=channel)
+            if device_type == "ExtInput":
+                rule["DeviceInfo"]["Power"] = 1000
+        elif device_type == "mfc":
+            rule.update(input_device=uid, input_channel=channel, output_device=out_uid, output_channel=channel)
+        elif device_type == "valve":
+            rule.update(output_device=out_uid, output_channel=channel)
+        elif device_type == "easy_PI":
+            rule.update(input_device=last_thermocouple or "extern", output_device=out_uid,
+                        output_channel=channel, output_type="analog_mA")
+            rule["DeviceInfo"].update(P_Value=0.1, I_Value=0.01, Power=500)
+        elif device_type == "direct_Heat":
+            rule.update(output_device=out_uid, output_channel=channel)
+            rule["DeviceInfo"]["Power"] = 300
+
+        tfh_config[name] = rule
+        if device_type == "thermocouple":
+            last_thermocouple = name
+
+    modbus_config = {
+        f"modbus_mfc_{i}": {"type": "mfc", "Box": 1, "x": 0, "y": 0, "DeviceInfo": {"unit": "ml/min"}}
+        for i in range(modbus_mfc)
+    }
+    return tfh_config, modbus_config
+
+
+def make_tkinter_config(threaded_acquisition=False):
+    return {
+        "TKINTER": {
+            "Name": "Benchmark",
+            "headless": True,
+            "fullscreen": False,
+            "has_save_function": True,
+            "has_excel_function": True,
+            "threaded_acquisition": threaded_acquisition,
+            "control_thread": False,  # control_step misst die Regelung im Tick
+        },
+        "Frames": {
+            "control": {"enabled": True},
+            "mfc": {"enabled": True},
+        },
+    }
+
+
+def make_recipe(tfh_config, modbus_config, segments=50):
+    """Erzeugt einen Ablauf mit Rampen für alle Controller, mfc und Ventile."""
+    columns = [name for name, rule in list(modbus_config.items()) + list(tfh_config.items())
+               if rule["type"] in ("mfc", "easy_PI", "direct_Heat", "valve")]
+    rows = [("Laufzeit", 600), ("Zeit",) + tuple(columns), ()]
+    for segment in range(segments):
+        cells = []
+        for name in columns:
+            if tfh_config.get(name, {}).get("type") == "valve":
+                cells.append(segment % 2)
+            else:
+                cells.append(f"{segment}-{segment + 1}")
+        rows.append((10,) + tuple(cells))
+    return Recipe.from_rows(rows)
+
+
+# --- Messungen ---
+def _timings(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        "mean_us": sum(samples) / n * 1e6,
+        "p50_us": samples[n // 2] * 1e6,
+        "p95_us": samples[int(0.95 * (n - 1))] * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def _tick(tkh):
+    tkh.control_step()
+    tkh.display_step()
+    tkh.update_logging()
+
+
+def bench_size(channels, ticks, workdir, modbus_mfc=0, threaded_acquisition=False):
+    """Führt alle Messungen für eine Konfigurationsgröße aus und gibt ein Dictionary zurück."""
+    tfh_config, modbus_config = make_configs(channels, modbus_mfc)
+    tfh_obj = SyntheticTFH(tfh_config)
+    modbus_obj = SyntheticModbus(modbus_config)
+    with open(os.path.join(workdir, "json_files", "benchmark.json"), "w") as f:
+        json.dump(make_tkinter_config(threaded_acquisition), f)
+
+    result = {"channels": channels, "modbus_mfc": modbus_mfc}
+
+    start = time.perf_counter()
+    tkh = TKH(tfh_obj, modbus_obj, "benchmark", headless=True)
+    result["construction_ms"] = (time.perf_counter() - start) * 1000
+    tkh.entries['SaveFile'] = os.path.join(workdir, f"bench_{channels}.dat")
+
+    try:
+        # Setpoints in alle Eingabefelder schreiben
+        for entry in tkh.entries['mfc'].values():
+            entry.insert(0, "1.5")
+        for ctrl_type in ("easy_PI", "direct_Heat"):
+            for ctrl in tkh.controller[ctrl_type].values():
+                ctrl.entry.insert(0, "10")
+
+        samples = []
+        for _ in range(ticks):
+            tfh_obj.step()
+            start = time.perf_counter()
+            _tick(tkh)
+            samples.append(time.perf_counter() - start)
+        result["tick"] = _timings(samples)
+
+        samples = []
+        for _ in range(max(ticks // 4, 1)):
+            start = time.perf_counter()
+            tkh.set_data()
+            samples.append(time.perf_counter() - start)
+        result["set_data"] = _timings(samples)
+
+        rows = ticks
+        tkh.open_log()
+        start = time.perf_counter()
+        for _ in range(rows):
+            tkh.save_values()
+        queued = time.perf_counter() - start
+        tkh.close_log()
+        written = time.perf_counter() - start
+        result["save_values"] = {
+            "rows": rows,
+            "rows_per_s": rows / queued,
+            "rows_per_s_incl_flush": rows / written,
+            "bytes": os.path.getsize(tkh.entries['SaveFile']),
+        }
+
+        # Excel-Modus loggt in eine neue Datei (wie nach get_file)
+        tkh.entries['SaveFile'] = os.path.join(workdir, f"bench_{channels}_excel.dat")
+        tkh.write_header = True
+        tkh.run_recipe(make_recipe(tfh_config, modbus_config))
+        samples = []
+        for _ in range(ticks):
+            start = time.perf_counter()
+            _tick(tkh)
+            samples.append(time.perf_counter() - start)
+        tkh.stop_excel()
+        result["excel_tick"] = _timings(samples)
+    finally:
+        tkh.close()
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(tkinter_lib.__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Gibt die Verhältnisse neu/alt der wichtigsten Kennzahlen je Größe aus (< 1 = schneller)."""
+    old_by_size = {entry["channels"]: entry for entry in previous["results"]}
+    lines = [f"{'Kanäle':>8}{'Konstr.':>10}{'Tick':>10}{'Excel':>10}{'set_data':>10}{'save':>10}"]
+    for entry in current["results"]:
+        old = old_by_size.get(entry["channels"])
+        if old is None:
+            continue
+        ratios = [
+            entry["construction_ms"] / old["construction_ms"],
+            entry["tick"]["mean_us"] / old["tick"]["mean_us"],
+            entry["excel_tick"]["mean_us"] / old["excel_tick"]["mean_us"],
+            entry["set_data"]["mean_us"] / old["set_data"]["mean_us"],
+            old["save_values"]["rows_per_s"] / entry["save_values"]["rows_per_s"],
+        ]
+        lines.append(f"{entry['channels']:>8}" + "".join(f"{ratio:>10.2f}" for ratio in ratios))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark für TKH mit synthetischen Geräten")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000, 5000],
+                        help="Anzahl der Kanäle je Messung")
+    parser.add_argument("--ticks", type=int, default=200, help="Anzahl gemessener Ticks je Größe")
+    parser.add_argument("--modbus-mfc", type=int, default=4, help="Anzahl zusätzlicher Modbus-mfc")
+    parser.add_argument("--threaded", action="store_true", help="Erfassung im Hintergrund-Thread messen")
+    parser.add_argument("--output", help="JSON-Ergebnis in diese Datei schreiben (sonst stdout)")
+    parser.add_argument("--compare", help="Vorheriges JSON-Ergebnis zum Vergleich")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="tkh_benchmark_")
+    os.makedirs(os.path.join(workdir, "json_files"))
+    cwd = os.getcwd()
+    os.chdir(workdir)  # get_config liest ./json_files/<name>.json
+    try:
+        results = []
+        for channels in args.sizes:
+            results.append(bench_size(channels, args.ticks, workdir, args.modbus_mfc, args.threaded))
+            print(f"{channels:>6} Kanäle: Tick {results[-1]['tick']['mean_us']:.0f} µs, "
+                  f"Excel-Tick {results[-1]['excel_tick']['mean_us']:.0f} µs", file=sys.stderr)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "threaded_acquisition": args.threaded,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+
+def run_briefly(thread):
+    thread.start()
+    deadline = time.monotonic() + 2.0
+    while thread.samples < 3 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    thread.stop()
+
+
+def test_sources_are_timed_only_with_source_keys():
+    profiler = tkinter_lib.LoopProfiler()
+    thread = tkinter_lib.AcquisitionThread([lambda: 1.0, lambda: 2.0], rate=200, profiler=profiler)
+    run_briefly(thread)
+    assert thread.latest()[1] == (1.0, 2.0)
+    assert not any(key.startswith(('source.', 'acquisition.')) for key in profiler.stats())
+
+
+def test_profiled_sources_use_precomputed_names():
+    profiler = tkinter_lib.LoopProfiler()
+    keys = [('tfh', 'ai1', 0), ('modbus', 'MFC_A')]
+    thread = tkinter_lib.AcquisitionThread([lambda: 1.0, lambda: 2.0], rate=200, profiler=profiler,
+                                           source_keys=keys)
+    run_briefly(thread)
+    stats = profiler.stats()
+    assert {'source.ai1:0', 'source.MFC_A', 'acquisition.tfh', 'acquisition.modbus'} <= set(stats)
+
+
+def test_set_sources_replaces_profile_names():
+    profiler = tkinter_lib.LoopProfiler()
+    thread = tkinter_lib.AcquisitionThread([lambda: 1.0], rate=200, profiler=profiler,
+                                           source_keys=[('tfh', 'ai1', 0)])
+    thread.set_sources([lambda: 3.0, lambda: 4.0], [('tfh', 'ai2', 1), ('tfh', 'ai2', 2)])
+    run_briefly(thread)
+    assert thread.latest()[1] == (3.0, 4.0)
+    assert 'source.ai2:2' in profiler.stats()
+    assert 'source.ai1:0' not in profiler.stats()
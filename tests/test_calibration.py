@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+
+def test_convert_matches_per_channel_formula():
+    calibration = tkinter_lib.SensorCalibration()
+    params = [
+        ("T1", 0, dict()),
+        ("P1", 1, dict(gradient=2.0, offset=0.5)),
+        ("F1", 2, dict(gradient=3.0, offset=1.0, scale=1000.0, lower=0.0)),
+        ("P1_again", 1, dict(gradient=-1.0)),
+    ]
+    for expected_index, (name, slot, options) in enumerate(params):
+        assert calibration.add(name, slot, **options) == expected_index
+    assert len(calibration) == 4
+
+    snapshot = [21.5, 4.0, 500.0]
+    expected = [21.5, (4.0 - 0.5) * 2.0, 0.0, -4.0]
+    assert calibration.convert(snapshot) == pytest.approx(expected)
+    assert calibration.convert([21.5, 4.0, 5000.0])[2] == pytest.approx(12.0)
+
+
+def test_missing_values_and_parameters_give_nan():
+    calibration = tkinter_lib.SensorCalibration()
+    calibration.add("A", 0)
+    calibration.add("B", 1, gradient=None)
+    values = calibration.convert([None, 3.0])
+    assert math.isnan(values[0]) and math.isnan(values[1])
+    assert tkinter_lib.SensorCalibration().convert([1.0]) == []
+
+
+def test_convert_array_matches_convert():
+    calibration = tkinter_lib.SensorCalibration()
+    calibration.add("P1", 0, gradient=2.0, offset=0.5)
+    calibration.add("A", 1)
+    values = calibration.convert_array([4.0, None])
+    assert isinstance(values, np.ndarray)
+    assert values[0] == 7.0 and math.isnan(values[1])
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+ChannelHistory = tkinter_lib.ChannelHistory
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.items = {}
+
+    def create_line(self, *coords, **options):
+        self.items[len(self.items)] = list(coords)
+        return len(self.items) - 1
+
+    def create_text(self, *coords, **options):
+        return self.create_line(*coords)
+
+    def coords(self, item, *coords):
+        self.items[item] = list(coords)
+
+    def itemconfigure(self, item, **options):
+        pass
+
+
+def test_time_running_backwards_starts_a_new_history():
+    history = ChannelHistory(["T1", "P1"], capacity=5)
+    for t in range(8):
+        history.append(100.0 + t, [t, -t])
+    assert history.generation == 0
+
+    history.append(102.5, [50.0, -50.0])
+    assert history.generation == 1
+    assert len(history) == 1
+    times, values = history.since(0)
+    assert times.tolist() == [102.5]
+    assert values.tolist() == [[50.0, -50.0]]
+
+    # Gleiche Zeitstempel sind erlaubt und beginnen keinen neuen Verlauf
+    history.append(102.5, [51.0, -51.0])
+    assert history.generation == 1 and len(history) == 2
+
+
+def test_trend_is_cleared_when_history_restarts():
+    history = ChannelHistory(["T1"], capacity=100)
+    plot = tkinter_lib.TrendPlot(FakeCanvas(), ["T1"], window=10, width=10)
+    for t in range(20):
+        history.append(1000.0 + t, [100.0])
+    assert plot.update(history)
+    assert np.nanmax(plot._max) == 100.0
+
+    history.append(1005.0, [1.0])
+    assert plot.update(history)
+    assert plot.last_time == 1005.0
+    assert np.nanmax(plot._max) == 1.0
+
+
+def filled_history(rows=25, capacity=10):
+    history = ChannelHistory(["T1", "P1", "F1"], capacity=capacity)
+    for t in range(rows):
+        history.append(float(t), [t, 10.0 * t, np.nan if t % 2 else 1.0])
+    return history
+
+
+def test_queries_after_the_ring_wrapped():
+    history = filled_history()
+    assert len(history) == 10 and history.last_timestamp == 24.0
+    assert history.nbytes == ChannelHistory.size_for(3, 10)
+
+    times, values = history.since(20.0, ["P1", "T1"])
+    assert times.tolist() == [21.0, 22.0, 23.0, 24.0]
+    assert values.tolist() == [[210.0, 21.0], [220.0, 22.0], [230.0, 23.0], [240.0, 24.0]]
+    # Ältere Zeilen sind überschrieben: since() liefert nur, was noch im Ring liegt
+    assert history.since(0.0)[0].tolist() == [float(t) for t in range(15, 25)]
+    assert history.last(2.5, ["T1"])[0].tolist() == [22.0, 23.0, 24.0]
+    assert history.latest(["T1", "P1"]) == {"T1": 24.0, "P1": 240.0}
+
+
+def test_aggregate_per_bucket_ignores_nan():
+    history = filled_history(rows=20, capacity=100)
+    stats = history.aggregate(100, bucket=10)
+    assert stats.times.tolist() == [0.0, 10.0]
+    assert stats.count[:, 0].tolist() == [10, 10]
+    assert stats.count[:, 2].tolist() == [5, 5]
+    assert stats.min[:, 0].tolist() == [0.0, 10.0]
+    assert stats.max[:, 1].tolist() == [90.0, 190.0]
+    assert stats.mean[:, 0].tolist() == [4.5, 14.5]
+    assert stats.std[:, 0] == pytest.approx([np.std(np.arange(10))] * 2)
+    assert stats.mean[:, 2].tolist() == [1.0, 1.0]
+
+    total = history.aggregate(5.5, names=["T1"])
+    assert total.count.tolist() == [[6]] and total.mean.tolist() == [[16.5]]
+    empty = ChannelHistory(["T1"], 4).aggregate(10)
+    assert empty.count.shape == (0, 1)
+
+
+def test_trend_keeps_min_and_max_per_pixel_column():
+    history = ChannelHistory(["T1"], capacity=1000)
+    canvas = FakeCanvas()
+    plot = tkinter_lib.TrendPlot(canvas, ["T1"], window=10, width=5, height=100, y_range=(0, 100))
+    # 2 s je Spalte, 4 Zeilen je Spalte mit wechselnden Werten
+    for i in range(40):
+        history.append(i * 0.5, [float(i % 4) * 10 + i])
+    assert plot.update(history)
+    assert not plot.update(history)
+    slots = np.arange(5, 10) % 5
+    assert plot._columns[slots].tolist() == [5, 6, 7, 8, 9]
+    for column, slot in zip(range(5, 10), slots):
+        block = [float(i % 4) * 10 + i for i in range(column * 4, column * 4 + 4)]
+        assert plot._min[slot, 0] == min(block) and plot._max[slot, 0] == max(block)
+
+    plot.draw()
+    points = canvas.items[plot.lines[0]]
+    # Je Spalte zwei Punkte (Minimum und Maximum)
+    assert len(points) == 2 * 2 * 5
+
+    # Nur neue Zeilen werden eingerechnet, die älteste Spalte fällt heraus
+    history.append(20.0, [500.0])
+    assert plot.update(history)
+    assert plot._columns[10 % 5] == 10 and plot._max[10 % 5, 0] == 500.0
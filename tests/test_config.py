@@ -0,0 +1,46 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+TFH = SimpleNamespace(config={}, inputs={}, outputs={})
+MODBUS = SimpleNamespace(config={}, devices={})
+FRAMES = {'control': {'enabled': True, 'x': 0, 'y': 0}}
+
+
+def test_flags_accept_int_and_compile_to_bool():
+    config = {'TKINTER': {'fullscreen': 0, 'has_save_function': 1, 'has_close_button': 0}, 'Frames': FRAMES}
+    assert tkinter_lib.validate_config(config, TFH, MODBUS) == []
+    tk_config = tkinter_lib.compile_config(config, TFH, MODBUS)['TKINTER']
+    assert tk_config['fullscreen'] is False
+    assert tk_config['has_save_function'] is True
+    assert tk_config['has_excel_function'] is False
+    assert tk_config['has_close_button'] is False
+
+
+def test_flags_reject_other_types():
+    errors = tkinter_lib.validate_config({'TKINTER': {'fullscreen': "ja"}}, TFH, MODBUS)
+    assert errors and errors[0].startswith("TKINTER.fullscreen")
+
+
+def test_compiled_config_is_cached_as_json_in_configured_dir(tmp_path):
+    cache_dir = str(tmp_path / "eigener_cache")
+    source = str(tmp_path / "test.json")
+    with open(source, 'w') as f:
+        json.dump({'TKINTER': {'cache_dir': cache_dir, 'has_save_function': 1}, 'Frames': FRAMES}, f)
+
+    assert tkinter_lib._configured_cache_dir(source) == cache_dir
+    compiled = tkinter_lib.load_config(source, TFH, MODBUS, tkinter_lib._configured_cache_dir(source))
+    cached_files = os.listdir(cache_dir)
+    assert len(cached_files) == 1 and cached_files[0].endswith(".config.json")
+    with open(os.path.join(cache_dir, cached_files[0])) as f:
+        assert json.load(f) == compiled
+    assert tkinter_lib.load_config(source, TFH, MODBUS, cache_dir) == compiled
+
+
+def test_cache_dir_defaults_when_missing_or_unreadable(tmp_path):
+    assert tkinter_lib._configured_cache_dir({'TKINTER': {}}) is None
+    assert tkinter_lib._configured_cache_dir(str(tmp_path / "fehlt.json")) is None
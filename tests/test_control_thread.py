@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+ControlThread = tkinter_lib.ControlThread
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_watchdog_keeps_safe_state_after_stalled_step():
+    outputs = {'heater': 0.0}
+    stall = threading.Event()
+
+    def step():
+        if stall.is_set():
+            stall.clear()
+            time.sleep(0.3)
+        # Schreibt nach dem Hängen noch einmal, wie ein verspäteter Controller
+        outputs['heater'] = 1.0
+
+    def safe_state():
+        outputs['heater'] = 0.0
+
+    thread = ControlThread(step, rate=100, safe_state=safe_state, watchdog_timeout=0.05)
+    thread.start()
+    try:
+        assert wait_for(lambda: outputs['heater'] == 1.0)
+        stall.set()
+        assert wait_for(lambda: thread.faulted)
+        time.sleep(0.4)
+        # Der hängende Durchlauf ist zurückgekehrt, der sichere Zustand bleibt bestehen
+        assert thread.faulted
+        assert outputs['heater'] == 0.0
+        assert thread.faults == 1
+
+        thread.reset()
+        assert wait_for(lambda: outputs['heater'] == 1.0)
+        assert not thread.faulted
+    finally:
+        thread.stop()
+
+
+def test_commands_run_while_faulted():
+    received = []
+    thread = ControlThread(lambda: None, rate=100, safe_state=lambda: None, watchdog_timeout=1.0)
+    thread.faulted = True
+    thread.start()
+    try:
+        thread.submit(received.append, 5)
+        assert wait_for(lambda: received == [5])
+    finally:
+        thread.stop()
@@ -0,0 +1,113 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+ControllerBank = tkinter_lib.ControllerBank
+
+
+class FakePI:
+    """Steht für easy_PI: regeln() setzt out (Anteil 0..1) und zählt die Aufrufe."""
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.out = 0.0
+        self.label = object()
+        self.calls = 0
+
+    def regeln(self):
+        self.calls += 1
+        self.out = self.rng.uniform(0.0, 1.0)
+
+
+class FakeHeat:
+    """Steht für DirectHeatController: out ist die Vorgabe in Prozent."""
+    def __init__(self):
+        self.out = 0.0
+        self.label = object()
+
+
+def output_device(channels=4):
+    return SimpleNamespace(values=[0.0] * channels)
+
+
+def build(seed):
+    rng = random.Random(seed)
+    heat = FakeHeat()
+    loops = [(heat, output_device(), 1, dict(power=300, unit='W'))]
+    for i in range(6):
+        loops.append((FakePI(rng.random()), output_device(), i % 4,
+                      dict(power=rng.choice([False, 500]), analog_mA=i % 2 == 0, unit='W')))
+    return heat, loops
+
+
+def test_bank_matches_per_controller_handlers():
+    shown_bank, shown_single = {}, {}
+    heat, loops = build(1)
+    bank = ControllerBank(lambda label, text: shown_bank.__setitem__(label, text), gate=heat)
+    for controller, device, channel, options in loops:
+        if isinstance(controller, FakeHeat):
+            bank.add(controller, device, channel, regulate=False, divisor=100, **options)
+        else:
+            bank.add(controller, device, channel, regulate=True, **options)
+
+    heat_single, loops_single = build(1)
+    tkh = SimpleNamespace(renderer=SimpleNamespace(set=lambda label, text: shown_single.__setitem__(label, text)))
+    steps = []
+    for controller, device, channel, options in loops_single:
+        if isinstance(controller, FakeHeat):
+            steps.append(tkinter_lib.TKH._plan_direct_heat(tkh, controller, device, channel,
+                                                            options['power'], options['unit']))
+        else:
+            steps.append(tkinter_lib.TKH._plan_easy_pi(tkh, controller, heat_single, device, channel,
+                                                        options['power'], options['analog_mA'], options['unit']))
+
+    labels = {id(a[0].label): b[0].label for a, b in zip(loops, loops_single)}
+    rng = random.Random(2)
+    for tick in range(50):
+        heat.out = heat_single.out = rng.choice([0.0, 0.0, 40.0])
+        bank.step()
+        for step in steps:
+            step()
+        for (controller, device, channel, _), (single, single_device, _, _) in zip(loops, loops_single):
+            assert controller.out == single.out
+            assert device.values[channel] == pytest.approx(single_device.values[channel], abs=1e-9)
+        assert {labels[id(label)]: text for label, text in shown_bank.items()} == shown_single
+
+
+def test_regeln_runs_once_per_step_unless_direct_heat_is_active():
+    heat = FakeHeat()
+    controller = FakePI(0)
+    bank = ControllerBank(None, gate=heat)
+    bank.add(heat, output_device(), 0, regulate=False, divisor=100)
+    bank.add(controller, output_device(), 0, regulate=True)
+    bank.step()
+    bank.step()
+    assert controller.calls == 2
+    heat.out = 10.0
+    bank.step()
+    assert controller.calls == 2
+
+
+def test_render_labels_and_safe_state():
+    shown = {}
+    controller = FakePI(0)
+    heat = FakeHeat()
+    pi_out, heat_out = output_device(), output_device()
+    bank = ControllerBank(None)
+    bank.add(controller, pi_out, 2, regulate=True, power=500, analog_mA=True, unit='W')
+    bank.add(heat, heat_out, 1, regulate=False, divisor=100, power=300, unit='W')
+    bank.render_labels(lambda label, text: shown.__setitem__(label, text))
+    assert shown == {}
+
+    heat.out = 40.0
+    bank.step()
+    assert heat_out.values[1] == pytest.approx(0.4)
+    assert pi_out.values[2] == pytest.approx((4 + 16 * controller.out) * 1000)
+    bank.render_labels(lambda label, text: shown.__setitem__(label, text))
+    assert shown[heat.label] == "120.00 W"
+    assert shown[controller.label] == f"{controller.out * 500:.2f} W"
+
+    bank.safe_state()
+    assert heat_out.values[1] == 0.0
+    assert pi_out.values[2] == 4000.0
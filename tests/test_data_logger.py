@@ -0,0 +1,115 @@
+import gzip
+import math
+import os
+
+import numpy as np
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+COLUMNS = ["Zeitpunkt", "T1", "P1", "F1"]
+T0 = 1_700_000_000.0
+
+
+def test_binary_log_round_trip(tmp_path):
+    path = str(tmp_path / "test.bin")
+    log = tkinter_lib.BinaryLog(path, COLUMNS, metadata={'Versuch': 7})
+    log.append(T0, [1.5, "Error", None])
+    log.append(T0 + 1, [2.5, 3.0])
+    # Bestehende Datei mit gleichen Spalten wird weitergeführt
+    tkinter_lib.BinaryLog(path, COLUMNS).append(T0 + 2, [3.5, 4.0, 5.0, 99.0])
+
+    header, data = tkinter_lib.read_binary_log(path)
+    assert header['columns'] == COLUMNS and header['metadata'] == {'Versuch': 7}
+    assert data.shape == (3, 4)
+    assert data[:, 0].tolist() == [T0, T0 + 1, T0 + 2]
+    assert data[0, 1] == 1.5 and math.isnan(data[0, 2]) and math.isnan(data[0, 3])
+    assert math.isnan(data[1, 3])
+    assert data[2, 1:].tolist() == [3.5, 4.0, 5.0]
+
+    with pytest.raises(ValueError, match="Spalten"):
+        tkinter_lib.BinaryLog(path, COLUMNS[:2])
+
+
+def test_rate_gating_per_target(tmp_path):
+    path = str(tmp_path / "test.bin")
+    logger = tkinter_lib.DataLogger(path, COLUMNS, rate=1.0, binary=True,
+                                    groups={'fast': {'rate': 5.0, 'channels': ["P1"]}})
+    built = []
+
+    def row():
+        built.append(1)
+        return [1.0, 2.0, 3.0]
+
+    # 10 Hz über 3 s, danach eine Pause von 10 s
+    for i in range(30):
+        logger.sample(T0 + i * 0.1, row)
+    logger.sample(T0 + 13.05, row)
+    logger.close()
+
+    _, main = tkinter_lib.read_binary_log(path)
+    header, fast = tkinter_lib.read_binary_log(str(tmp_path / "test_fast.bin"))
+    assert header['columns'] == ["Zeitpunkt", "P1"]
+    assert main[:, 0] - T0 == pytest.approx([0.0, 1.0, 2.0, 13.05])
+    assert len(fast) == 16 and fast[1, 0] - T0 == pytest.approx(0.2)
+    assert fast[:, 1].tolist() == [2.0] * 16
+    # Die Zeile wird nur gebaut, wenn mindestens eine Datei fällig ist
+    assert len(built) == len(set(main[:, 0]) | set(fast[:, 0])) < 31
+
+
+def write_dat(path, sections):
+    with open(path, 'w') as f:
+        f.write("### Device Informations\nirgendwas\n### Device Names\n")
+        for columns, rows in sections:
+            f.write("\t".join(["Zeitpunkt"] + columns) + "\n")
+            for timestamp, values in rows:
+                stamp = tkinter_lib.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')
+                f.write("\t".join([stamp] + [str(value) for value in values]) + "\n")
+
+
+def test_read_dat_log_merges_header_sections(tmp_path):
+    path = str(tmp_path / "test.dat")
+    write_dat(path, [
+        (["T1", "P1"], [(T0, [1.0, "None"]), (T0 + 1, [2.0, 3.0])]),
+        (["P1", "F1"], [(T0 + 2, [4.0, "Error"]), (T0 + 0.5, [5.0, 6.0])]),
+    ])
+    columns, times, values = tkinter_lib.read_dat_log(path)
+    assert columns == ["T1", "P1", "F1"]
+    assert times - T0 == pytest.approx([0.0, 0.5, 1.0, 2.0])
+    expected = [[1.0, np.nan, np.nan], [np.nan, 5.0, 6.0], [2.0, 3.0, np.nan], [np.nan, 4.0, np.nan]]
+    np.testing.assert_array_equal(values, np.array(expected))
+
+
+def rotated_log(tmp_path):
+    path = str(tmp_path / "test.dat")
+    logger = tkinter_lib.DataLogger(path, COLUMNS, rate=10.0, preamble="### Device Informations\n",
+                                    writer_options={'rotate_bytes': 400, 'flush_rows': 1, 'flush_interval': 0.01},
+                                    compress='gzip')
+    for i in range(60):
+        logger.write(T0 + i * 0.1, [i, 2 * i, "None"])
+        logger.targets[0].writer.flush()
+    logger.close()
+    logger.compressor.join(5)
+    return path
+
+
+def test_rotated_segments_are_compressed(tmp_path):
+    path = rotated_log(tmp_path)
+    segments = [segment for _, segment in tkinter_lib.log_segments(path)]
+    assert len(segments) > 2
+    assert all(segment.endswith(".dat.gz") for segment in segments)
+    assert not os.path.exists(path)
+    with gzip.open(segments[1], 'rt') as f:
+        first_lines = [f.readline() for _ in range(3)]
+    assert first_lines[:2] == ["### Device Informations\n", "### Device Names\n"]
+    assert first_lines[2].startswith("Zeitpunkt\tT1")
+    assert tkinter_lib.next_segment_index(path) == len(segments) + 1
+
+
+def test_read_dat_log_reads_rotated_segments(tmp_path):
+    path = rotated_log(tmp_path)
+    columns, times, values = tkinter_lib.read_dat_log(path)
+    assert columns == COLUMNS[1:]
+    assert len(times) == 60
+    assert values[:, 0].tolist() == list(map(float, range(60)))
+    assert np.isnan(values[:, 2]).all()
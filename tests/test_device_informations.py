@@ -0,0 +1,29 @@
+import sys
+import threading
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+
+def test_header_text_does_not_touch_save_file(monkeypatch):
+    tkh = SimpleNamespace(entries={'SaveFile': '/daten/test.dat'}, tfh_obj=SimpleNamespace(config={'T1': {}}))
+    seen = []
+
+    def write_device_informations(view, tfh_obj):
+        # Während des Schreibens sieht ein anderer Thread weiterhin den echten Pfad
+        reader = threading.Thread(target=lambda: seen.append(tkh.entries['SaveFile']))
+        reader.start()
+        reader.join()
+        with open(view.entries['SaveFile'], 'a') as f:
+            f.write(f"### Device Informations\n{sorted(view.tfh_obj.config)}\n")
+
+    module = ModuleType('utilities.data_functions')
+    module.write_device_informations = write_device_informations
+    monkeypatch.setitem(sys.modules, 'utilities.data_functions', module)
+
+    text = tkinter_lib.TKH._device_informations_text(tkh)
+    assert text == "### Device Informations\n['T1']\n"
+    assert seen == ['/daten/test.dat']
+    assert tkh.entries == {'SaveFile': '/daten/test.dat'}
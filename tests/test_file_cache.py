@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def write_workbook(path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Ablauf"
+    sheet.append(["Laufzeit", 5])
+    sheet.append(["Zeit", "MFC_A", "Heater_1", "Ventil"])
+    sheet.append([None])
+    sheet.append([60, "0-10", 20, "auf"])
+    sheet.append([120, 10, "20-80", "zu"])
+    workbook.save(path)
+
+
+def test_recipe_from_cache_matches_loaded_recipe(tmp_path):
+    source = str(tmp_path / "ablauf.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    write_workbook(source)
+    loaded = tkinter_lib.load_recipe(source, cache_dir)
+    cached_files = os.listdir(cache_dir)
+    assert len(cached_files) == 1 and cached_files[0].endswith(".recipe.json")
+
+    cached = tkinter_lib.load_recipe(source, cache_dir)
+    assert cached.keys == loaded.keys and cached.run_time == 5
+    for elapsed in (0, 30, 59.9, 60, 150, 500):
+        expected, segment, remaining = loaded.evaluate(elapsed)
+        output, cached_segment, cached_remaining = cached.evaluate(elapsed)
+        assert (cached_segment, cached_remaining) == (segment, remaining)
+        assert output['Ventil'] == expected['Ventil']
+        assert output['MFC_A'] == pytest.approx(expected['MFC_A'])
+        assert output['Heater_1'] == pytest.approx(expected['Heater_1'])
+
+
+def test_unusable_cache_file_is_replaced(tmp_path, capsys):
+    cache = tkinter_lib.FileCache(str(tmp_path), "Test", ".json")
+    cache_file = cache.path(1, "key")
+    with open(cache_file, 'wb') as f:
+        f.write(b"\x80\x04not json")
+    assert cache.load_json(cache_file) is None
+    assert "unbrauchbar" in capsys.readouterr().out
+
+    cache.store_json(cache_file, {'a': [1, 2.5, None]})
+    assert cache.load_json(cache_file) == {'a': [1, 2.5, None]}
+    assert os.listdir(str(tmp_path)) == [os.path.basename(cache_file)]
+
+
+def test_unserializable_entry_is_not_cached(tmp_path):
+    cache = tkinter_lib.FileCache(str(tmp_path), "Test", ".json")
+    cache_file = cache.path("key")
+    cache.store_json(cache_file, {'value': object()})
+    assert os.listdir(str(tmp_path)) == []
+    assert tkinter_lib.FileCache(None, "Test", ".json").path("key") is None
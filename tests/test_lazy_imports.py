@@ -0,0 +1,20 @@
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+
+def test_unknown_names_raise_attribute_error():
+    assert not hasattr(tkinter_lib, 'nonexistent')
+    assert getattr(tkinter_lib, 'write_values', None) is None
+
+
+def test_listed_names_are_imported_on_first_use():
+    openpyxl = pytest.importorskip('openpyxl')
+    assert tkinter_lib.openpyxl is openpyxl
+
+
+def test_missing_module_gives_attribute_error(monkeypatch):
+    monkeypatch.setitem(tkinter_lib.LAZY_ATTRIBUTES, 'missing', ('kein_solches_modul', 'f'))
+    assert not hasattr(tkinter_lib, 'missing')
+    with pytest.raises(AttributeError, match="missing"):
+        tkinter_lib.missing
@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+
+def test_open_error_is_recorded_and_reported(tmp_path):
+    path = str(tmp_path / "missing" / "test.dat")
+    logger = tkinter_lib.DataLogger(path, ["Zeitpunkt", "T1"])
+    writer = logger.targets[0].writer
+    writer.join(5)
+    assert isinstance(writer.error, OSError)
+    logger.write(time.time(), [1.0])
+    writer.flush()  # darf nach dem Ende des Threads nicht hängen bleiben
+
+    problems = logger.poll_errors()
+    assert problems[0][1] is True
+    assert "test.dat" in problems[0][0]
+    assert writer.dropped >= 1
+    assert logger.poll_errors() == []
+    logger.close()
+
+
+def test_write_does_not_block_on_full_queue(tmp_path):
+    writer = tkinter_lib.LogWriter(str(tmp_path / "test.dat"), queue_size=2)
+    start = time.perf_counter()
+    for _ in range(5):
+        writer.write("x\n")
+    assert time.perf_counter() - start < 0.05
+    assert writer.dropped == 3
+
+    logger = tkinter_lib.DataLogger.__new__(tkinter_lib.DataLogger)
+    logger.targets = [tkinter_lib._LogTarget(writer.path, [], 1.0, None, None, writer)]
+    assert logger.poll_errors() == [(f"Logdatei '{writer.path}': Zeilen werden verworfen", False)]
+    writer.write("x\n")
+    assert logger.poll_errors() == []
+
+
+def test_segment_size_counts_encoded_bytes(tmp_path):
+    writer = tkinter_lib.LogWriter(str(tmp_path / "test.dat"), rotate_bytes=10**6, header="Zeitpunkt\tT_ü\n")
+    writer.encoding = 'utf-8'
+    writer.start()
+    for _ in range(3):
+        writer.write("2026-01-01 00:00:00\t1,5 °C\n")
+    writer.flush()
+    assert writer.rows == 3
+    assert writer._size == os.path.getsize(writer.segment_path)
+    writer.close()
+
+
+def test_failed_write_is_not_counted(tmp_path):
+    writer = tkinter_lib.LogWriter(str(tmp_path / "test.dat"))
+    writer.encoding = 'ascii'
+    writer.start()
+    writer.write("ä\n")
+    writer.flush()
+    writer.write("a\n")
+    writer.close()
+    assert isinstance(writer.error, UnicodeEncodeError)
+    assert writer.rows == 1 and writer.dropped == 1
+    with open(writer.path) as f:
+        assert f.read() == "a\n"
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def ablauf_sheet():
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Ablauf"
+    sheet.append(["Laufzeit", 5])
+    sheet.append(["Zeit", "MFC_A", "Heater_1", "Ventil"])
+    sheet.append([None])
+    sheet.append([60, "0-10", 20, "auf"])
+    sheet.append([120, "10", "20-80", "zu"])
+    return sheet
+
+
+def test_excel_timing_is_deprecated_and_matches_recipe():
+    sheet = ablauf_sheet()
+    recipe = tkinter_lib.Recipe.from_sheet(sheet)
+    t0 = time.time() - 30
+    with pytest.warns(DeprecationWarning, match="Recipe.evaluate"):
+        output, section, _, _ = tkinter_lib.Excel_timing(sheet, 4, t0)
+    expected, segment, _ = recipe.evaluate(time.time() - t0)
+    assert section == 4 and segment == 0
+    assert output['Ventil'] == expected['Ventil'] == "auf"
+    assert output['Heater_1'] == expected['Heater_1'] == 20.0
+    assert output['MFC_A'] == pytest.approx(expected['MFC_A'], abs=0.01)
+
+
+def test_evaluate_interpolates_within_segment_and_holds_after_end():
+    recipe = tkinter_lib.Recipe.from_rows([
+        ("Laufzeit", 3),
+        ("Zeit", "Heater_1", "MFC_A", "Modus"),
+        (None,),
+        (60, "100-200", "1,5", "auto"),
+        (120, 300, "0-10"),
+        (None,),
+    ])
+    assert len(recipe) == 2 and recipe.total == 180.0
+    assert recipe.keys == ["Heater_1", "MFC_A", "Modus"]
+
+    output, segment, remaining = recipe.evaluate(15)
+    assert segment == 0 and remaining == 45
+    assert output == {"Heater_1": 125.0, "MFC_A": 1.5, "Modus": "auto"}
+
+    output, segment, remaining = recipe.evaluate(60)
+    assert segment == 1 and remaining == 120
+    assert output["Heater_1"] == 300.0 and output["MFC_A"] == 0.0
+    # Fehlende Zellen werden wie leere Zellen als None übernommen
+    assert output["Modus"] is None
+
+    output, segment, remaining = recipe.evaluate(1000)
+    assert segment == 1 and remaining < 0
+    assert output["MFC_A"] == 10.0
+
+
+def test_evaluate_rejects_invalid_duration():
+    with pytest.raises(ValueError, match="Zeile 4"):
+        tkinter_lib.Recipe.from_rows([("Laufzeit", 1), ("Zeit", "A"), (None,), ("abc", 1)])
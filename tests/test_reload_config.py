@@ -0,0 +1,189 @@
+import copy
+import json
+import sys
+from types import ModuleType
+
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+
+
+class EasyPI:
+    """Ersatz für utilities.regler.easy_PI mit derselben Schnittstelle."""
+    def __init__(self, out_device, out_channel, inp, soll, I, P):
+        self.inp = inp
+        self.soll = soll
+        self.out = 0.0
+        self.running = False
+
+    def start(self, value):
+        self.soll = value
+        self.running = True
+
+    def set_soll(self, value):
+        self.soll = value
+
+    def regeln(self):
+        if self.running:
+            self.out = min(max(0.01 * (self.soll - self.inp.values[0]), 0.0), 1.0)
+
+
+class DirectHeatController:
+    def __init__(self, name):
+        self.out = 0.0
+        self.running = False
+
+    def start(self, value):
+        self.out = value
+        self.running = True
+
+    def set_soll(self, value):
+        self.out = value
+
+
+class Values:
+    def __init__(self, channels=4):
+        self.values = [float(i + 1) for i in range(channels)]
+
+
+class ModbusDevice:
+    def __init__(self):
+        self.flow = 12.3
+        self.setpoint = 0
+
+    def set(self, value):
+        self.setpoint = value
+
+
+class TFH:
+    operation_mode = 0
+
+    def __init__(self, config):
+        self.config = config
+        self.inputs = {}
+        self.outputs = {}
+        for rule in config.values():
+            if rule.get('input_device') and rule['input_device'] not in config:
+                self.inputs.setdefault(rule['input_device'], Values())
+            if rule.get('output_device'):
+                self.outputs.setdefault(rule['output_device'], Values())
+
+
+class Modbus:
+    operation_mode = 0
+
+    def __init__(self, config):
+        self.config = config
+        self.devices = {name: ModbusDevice() for name in config}
+
+
+def info(**fields):
+    return dict({'unit': 'u', 'gradient': 2.0, 'y-axis': 0.5}, **fields)
+
+
+TFH_CONFIG = {
+    'T1': {'type': 'thermocouple', 'input_device': 'tc1', 'input_channel': 0, 'x': 1, 'y': 1, 'DeviceInfo': info(unit='°C')},
+    'P1': {'type': 'pressure', 'input_device': 'ai1', 'input_channel': 1, 'x': 1, 'y': 1, 'DeviceInfo': info(unit='bar')},
+    'A1': {'type': 'analytic', 'input_device': 'ai1', 'input_channel': 2, 'x': 1, 'y': 1, 'DeviceInfo': info()},
+    'F1': {'type': 'FlowMeter', 'input_device': 'ai1', 'input_channel': 3, 'x': 1, 'y': 1, 'DeviceInfo': info(unit='kg/h')},
+    'M1': {'type': 'mfc', 'input_device': 'ai2', 'input_channel': 0, 'output_device': 'ao1', 'output_channel': 0,
+           'x': 1, 'y': 1, 'DeviceInfo': info()},
+    'V1': {'type': 'valve', 'output_device': 'do1', 'output_channel': 0, 'x': 1, 'y': 1, 'DeviceInfo': info()},
+    'Heater_1': {'type': 'easy_PI', 'input_device': 'T1', 'output_device': 'ao2', 'output_channel': 0,
+                 'output_type': 'analog_mA', 'x': 1, 'y': 1,
+                 'DeviceInfo': info(P_Value=0.1, I_Value=0.01, Power=500, unit='W')},
+    'Vo1': {'type': 'Vorgabe', 'x': 1, 'y': 1, 'DeviceInfo': info()},
+}
+MODBUS_CONFIG = {
+    'MFC_A': {'type': 'mfc', 'Box': 1, 'x': 1, 'y': 1, 'DeviceInfo': info(unit='ml/min')},
+    'Out_A': {'type': 'ExtOutput', 'Box': 1, 'x': 1, 'y': 1, 'DeviceInfo': info()},
+}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    regler = ModuleType('utilities.regler')
+    regler.easy_PI = EasyPI
+    regler.DirectHeatController = DirectHeatController
+    monkeypatch.setitem(sys.modules, 'utilities', ModuleType('utilities'))
+    monkeypatch.setitem(sys.modules, 'utilities.regler', regler)
+    (tmp_path / "json_files").mkdir()
+    with open(tmp_path / "json_files" / "test.json", "w") as f:
+        json.dump({'TKINTER': {'Name': 'Test', 'has_save_function': 1, 'fullscreen': 0},
+                   'Frames': {'control': {'enabled': True}, 'mfc': {'enabled': True}}}, f)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def build(tfh_config, modbus_config):
+    tfh_obj = TFH(copy.deepcopy(tfh_config))
+    modbus_obj = Modbus(copy.deepcopy(modbus_config))
+    return tkinter_lib.TKH(tfh_obj, modbus_obj, 'test', headless=True)
+
+
+def layout(tkh):
+    """Geräteindex und Widgetzahl je Art, wie sie ein neu gebautes Fenster hätte."""
+    return (
+        {name: (entry.kind, entry.index) for name, entry in tkh.registry.items()},
+        {kind: sorted(widgets) for kind, widgets in tkh.labels.items() if isinstance(widgets, dict)},
+        {kind: sorted(widgets) for kind, widgets in tkh.entries.items() if isinstance(widgets, dict)},
+        {kind: sorted(controllers) for kind, controllers in tkh.controller.items()},
+        tkh.log_columns(),
+    )
+
+
+def reload_and_compare(tkh, tfh_config, modbus_config):
+    report = tkh.reload_config(tfh_config=copy.deepcopy(tfh_config), modbus_config=copy.deepcopy(modbus_config))
+    fresh = build(tfh_config, modbus_config)
+    try:
+        assert layout(tkh) == layout(fresh)
+    finally:
+        fresh.close()
+    return report
+
+
+def test_reload_adds_device_with_same_indices_as_a_new_window(workdir):
+    tkh = build(TFH_CONFIG, MODBUS_CONFIG)
+    try:
+        tfh_config = copy.deepcopy(TFH_CONFIG)
+        tfh_config['T2'] = {'type': 'thermocouple', 'input_device': 'tc1', 'input_channel': 0, 'x': 5, 'y': 5,
+                            'DeviceInfo': info(unit='°C')}
+        modbus_config = dict(MODBUS_CONFIG, MFC_B={'type': 'mfc', 'Box': 1, 'x': 1, 'y': 1, 'DeviceInfo': info()})
+        tkh.modbus_obj.devices['MFC_B'] = ModbusDevice()
+        report = reload_and_compare(tkh, tfh_config, modbus_config)
+        assert sorted(report['added']) == ['MFC_B', 'T2']
+        assert len(tkh.labels['Tc']) == 2 and 'MFC_B' in tkh.registry
+    finally:
+        tkh.close()
+
+
+def test_reload_removes_device_and_releases_its_output(workdir):
+    tkh = build(TFH_CONFIG, MODBUS_CONFIG)
+    try:
+        tkh.buttons['V1'].select()
+        tkh.set_data()
+        assert tkh.tfh_obj.outputs['do1'].values[0]
+        tfh_config = {name: rule for name, rule in TFH_CONFIG.items() if name not in ('A1', 'V1')}
+        report = reload_and_compare(tkh, tfh_config, MODBUS_CONFIG)
+        assert sorted(report['removed']) == ['A1', 'V1']
+        assert 'V1' not in tkh.buttons and not tkh.valves
+        assert not tkh.tfh_obj.outputs['do1'].values[0]
+    finally:
+        tkh.close()
+
+
+def test_reload_moves_device_and_keeps_input_and_controller(workdir):
+    tkh = build(TFH_CONFIG, MODBUS_CONFIG)
+    try:
+        controller = tkh.controller['easy_PI'][0]
+        controller.entry.insert(0, '55')
+        tfh_config = copy.deepcopy(TFH_CONFIG)
+        tfh_config['T1']['x'] = 200
+        tfh_config['Heater_1']['y'] = 300
+        report = reload_and_compare(tkh, tfh_config, MODBUS_CONFIG)
+        assert sorted(report['rebuilt']) == ['Heater_1', 'T1']
+        assert not report['added'] and not report['removed']
+        assert tkh.controller['easy_PI'][0] is controller
+        assert controller.entry.get() == '55'
+    finally:
+        tkh.close()
@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+import pytest
+
+tkinter_lib = pytest.importorskip('tkinter_lib')
+LogReplay = tkinter_lib.LogReplay
+
+T0 = 1_700_000_000.0
+
+
+def make_replay(rows=100, speed=1.0):
+    times = T0 + np.arange(rows, dtype=float)
+    values = np.column_stack([np.arange(rows, dtype=float), -np.arange(rows, dtype=float)])
+    return LogReplay(["T1", "P1"], times, values, speed=speed)
+
+
+def test_replay_input_rebuilds_values_only_for_a_new_row():
+    replay = make_replay()
+    device = tkinter_lib.ReplayInput(replay, ["P1", None, "T1"])
+    first = device.values
+    assert first[0] == 0.0 and np.isnan(first[1]) and first[2] == 0.0
+    assert device.values is first
+
+    replay.seek(T0 + 41.5)
+    assert device.values == [-41.0, pytest.approx(np.nan, nan_ok=True), 41.0]
+    replay.seek(T0 + 42.0)
+    assert replay.row_index() == 42
+    replay.seek(T0 + 3)
+    assert device.values[2] == 3.0
+
+
+def test_scheduler_waits_are_scaled_and_restart_after_seek():
+    replay = make_replay(rows=10_000)
+    waits = []
+    scheduler = tkinter_lib.DeadlineScheduler(lambda ms, callback: waits.append(ms), clock=replay.clock,
+                                              time_scale=replay.time_scale)
+    runs = []
+    scheduler.add('control', 1.0, lambda: runs.append(replay.clock()))
+    replay.set_speed(100)
+    replay.start()
+    scheduler.start()
+    assert len(runs) == 1
+    assert waits[-1] <= 11  # 1 s virtuell bei speed 100 statt 1000 ms
+
+    replay.pause()
+    replay.seek(T0)
+    scheduler.run_due()
+    assert len(runs) == 2 and runs[-1] == T0
+
+
+def test_control_thread_runs_on_virtual_time():
+    replay = make_replay(rows=10_000, speed=100)
+    runs = []
+    thread = tkinter_lib.ControlThread(lambda: runs.append(1), rate=2.0, watchdog_timeout=5.0,
+                                       clock=replay.clock, time_scale=replay.time_scale)
+    replay.start()
+    thread.start()
+    time.sleep(0.3)
+    thread.stop()
+    # 0,3 s Wanduhr sind 30 s virtuell, also etwa 60 Durchläufe statt 1
+    assert len(runs) > 20
+    assert not thread.faulted
@@ -1,97 +1,3146 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
+# Importzeit des Moduls für TKH.startup_report()
+_IMPORT_START = time.perf_counter()
+
 import tkinter as tk
 import customtkinter as ctk
-from PIL import Image, ImageTk
-from tkinter.filedialog import asksaveasfilename, askopenfilename
-from tkinter import messagebox
 from datetime import datetime, timedelta
-from utilities.regler import *
-from utilities.data_functions import *
+import sys
+import importlib
+import json
+import os
+import locale
+import math
+import heapq
+import threading
+import queue
+import re
+import shutil
+import hashlib
+import struct
+import warnings
+from collections import namedtuple, deque
+from types import SimpleNamespace
+import numpy as np
+
+# Schwere bzw. nur für einzelne Funktionen benötigte Module werden erst bei Bedarf geladen
+# (lazy_import). Name im Modul -> (Modul, Attribut oder None für das Modul selbst)
+LAZY_ATTRIBUTES = {
+    'openpyxl': ('openpyxl', None),
+    'Image': ('PIL.Image', None),
+    'ImageTk': ('PIL.ImageTk', None),
+    'messagebox': ('tkinter.messagebox', None),
+    'asksaveasfilename': ('tkinter.filedialog', 'asksaveasfilename'),
+    'askopenfilename': ('tkinter.filedialog', 'askopenfilename'),
+    'easy_PI': ('utilities.regler', 'easy_PI'),
+    'DirectHeatController': ('utilities.regler', 'DirectHeatController'),
+    'write_device_informations': ('utilities.data_functions', 'write_device_informations'),
+}
+
+# Dauer der bisher über lazy_import geladenen Module in Sekunden
+lazy_import_times = {}
+
+
+def lazy_import(module_name):
+    """
+    Importiert module_name beim ersten Aufruf und merkt sich die Dauer in lazy_import_times.
+
+    Weitere Aufrufe liefern das bereits geladene Modul aus sys.modules.
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        lazy_import_times[module_name] = time.perf_counter() - start
+    return module
+
+
+def preload_modules(module_names):
+    """Lädt module_names in einem Hintergrund-Thread vor, damit die erste Verwendung nicht wartet."""
+    def run():
+        for module_name in module_names:
+            try:
+                lazy_import(module_name)
+            except ImportError as e:
+                print(f"Modul {module_name} konnte nicht vorgeladen werden: {e}")
+    thread = threading.Thread(target=run, name='preload_modules', daemon=True)
+    thread.start()
+    return thread
+
+
+def __getattr__(name):
+    """
+    Stellt die früher direkt importierten Namen aus LAZY_ATTRIBUTES (z. B. tkinter_lib.openpyxl)
+    weiterhin bereit. Fehlt das Modul dazu, gibt es wie bei jedem unbekannten Namen einen
+    AttributeError, sodass hasattr() und getattr() mit Standardwert funktionieren.
+    """
+    if name not in LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = LAZY_ATTRIBUTES[name]
+    try:
+        module = lazy_import(module_name)
+    except ImportError as e:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r} ({e})") from e
+    return module if attribute is None else getattr(module, attribute)
+
+# Eintrag im Geräteregister von TKH: Art, Index im jeweiligen Dictionary, Widget und ggf. Controller
+DeviceEntry = namedtuple('DeviceEntry', ['kind', 'index', 'widget', 'controller'])
+
+# Kennwerte aus ChannelHistory.aggregate(): Beginn der Abschnitte und je Abschnitt/Kanal Anzahl, Min, Max, Mittel, Std
+HistoryStats = namedtuple('HistoryStats', ['times', 'count', 'min', 'max', 'mean', 'std'])
+
+# Herkunft einer Logspalte in TKH.log_layout: Slot im Erfassungs-Snapshot, Index in log_state, fester Wert
+# bzw. Kanal der umgerechneten Werte (SensorCalibration)
+LOG_SLOT, LOG_STATE, LOG_CONST, LOG_CHANNEL = 0, 1, 2, 3
+
+# Globaler Timer für Excel-Logging
+save_timer = time.time()
+write_header = 1
+
+def Excel_timing(sheet, section, t0):
+    """
+    Veraltet: TKH verwendet Excel_timing nicht mehr. Stattdessen den Ablauf einmal mit
+    load_recipe() bzw. Recipe.from_sheet() kompilieren und Recipe.evaluate() mit der Zeit
+    seit Ablaufbeginn aufrufen. Bleibt nur für bestehende Skripte erhalten.
+
+    Liest aus der gegebenen Zeile (section) des Excel-Sheets:
+      - Die erste Zelle enthält die Zeitdauer (in Sekunden) des Abschnitts.
+      - Die restlichen Zellen enthalten entweder einen direkten Sollwert (z.B. 200) oder
+        einen Bereich im Format "Start-End" (z.B. "100-200"), für den ein interpolierter Sollwert ermittelt wird.
+    
+    Parameter:
+      sheet   : Das geöffnete Excel-Arbeitsblatt (openpyxl Worksheet)
+      section : Die Zeilennummer, die aktuell abgearbeitet wird
+      t0      : Der Zeitpunkt, an dem der aktuelle Abschnitt begonnen hat (time.time())
+    
+    Rückgabe:
+      output    : Dictionary, z. B. { 'Heater_1': <aktueller Sollwert>, ... }
+      section   : ggf. aktualisierte Zeilennummer (nächster Abschnitt, falls abgelaufen)
+      t_section : Verbleibende Zeit des aktuellen Abschnitts (Sekunden)
+      t0        : ggf. aktualisierter Startzeitpunkt für den neuen Abschnitt
+    """
+    warnings.warn("Excel_timing ist veraltet, stattdessen Recipe.evaluate() verwenden (siehe load_recipe)",
+                  DeprecationWarning, stacklevel=2)
+
+    # Lese alle Zellen der aktuellen Zeile (ohne Filter, damit die Spaltenreihenfolge erhalten bleibt)
+    row = sheet[section]
+    values = [cell.value for cell in row]
+
+    # Die erste Zelle enthält die Zeitdauer des Abschnitts
+    try:
+        section_time = float(str(values[0]).replace(',', '.'))
+    except (ValueError, TypeError):
+        raise ValueError(f"Ungültiger Zeitwert in Zeile {section}: {values[0]}")
+    
+    # Berechne die verstrichene Zeit seit Beginn des Abschnitts und die verbleibende Zeit
+    elapsed = time.time() - t0
+    t_section = section_time - elapsed
+
+    # Hole die Header aus Zeile 1 (angenommen, hier stehen die Spaltenüberschriften)
+    header = [cell.value for cell in sheet[2]]
+
+    output = {}
+    # Gehe alle Zellen ab der 2. Spalte durch, da die 1. Spalte die Zeitdauer ist.
+    for i, val in enumerate(values[1:], start=1):
+        # Hole den entsprechenden Spaltennamen, falls vorhanden
+        key = header[i] if i < len(header) else f"Column_{i}"
+        
+        # Falls der Zellinhalt ein String mit '-' ist, wird ein Bereich erwartet
+        if isinstance(val, str) and '-' in val:
+            parts = val.split('-')
+            try:
+                lower = float(parts[0].replace(',', '.').strip())
+                upper = float(parts[1].replace(',', '.').strip())
+                #print(f"Interpolating {lower} to {upper} at {elapsed} / {section_time}")
+            except ValueError:
+                # Bei einem Umrechnungsproblem wird der Originalinhalt übernommen
+                output[key] = val
+                continue
+            # Berechne den Fortschritt im aktuellen Abschnitt, abgeklammert zwischen 0 und 1
+            progress = min(max(elapsed / section_time, 0), 1)
+            interp_val = lower + (upper - lower) * progress
+            output[key] = interp_val
+            #print(f"Interpolated value: {interp_val}")
+            #print(key, lower, upper, progress)
+        else:
+            # Falls es sich um eine einzelne Zahl handelt, versuche sie in float zu konvertieren
+            try:
+                output[key] = float(str(val).replace(',', '.'))
+            except (ValueError, TypeError):
+                output[key] = val
+
+    # Wenn die Zeit des aktuellen Abschnitts abgelaufen ist, gehe zum nächsten Abschnitt und setze t0 zurück.
+    if t_section < 0:
+        section += 1
+        t0 = time.time()
+
+    return output, section, t_section, t0
+
+
+def _parse_recipe_cell(val):
+    """
+    Wandelt eine Zelle des Ablauf-Sheets in (Startwert, Endwert) um.
+
+    Bereiche im Format "Start-End" liefern beide Grenzen, einzelne Zahlen denselben Wert
+    für Start und Ende. Nicht umwandelbare Inhalte ergeben None und werden unverändert übernommen.
+    """
+    if isinstance(val, str) and '-' in val:
+        parts = val.split('-')
+        try:
+            return float(parts[0].replace(',', '.').strip()), float(parts[1].replace(',', '.').strip())
+        except ValueError:
+            return None
+    try:
+        number = float(str(val).replace(',', '.'))
+    except (ValueError, TypeError):
+        return None
+    return number, number
+
+
+class Recipe:
+    """
+    Vorkompilierter Ablauf aus dem Excel-Sheet "Ablauf".
+
+    Das Sheet wird einmalig in eine Segmenttabelle übersetzt:
+      - durations : Dauer jedes Abschnitts (Sekunden)
+      - starts    : kumulierte Startzeit jedes Abschnitts seit Ablaufbeginn
+      - start/end : Start- und Endwerte je Abschnitt und Spalte (Segmente x Spalten)
+
+    Die Sollwerte zu einer verstrichenen Zeit werden per Binärsuche auf starts und einer
+    vektorisierten Interpolation über alle Spalten bestimmt. Da die Zeit immer relativ zum
+    Ablaufbeginn gerechnet wird, entsteht an den Abschnittsgrenzen keine Drift.
+
+    Aufbau des Sheets (wie bei Excel_timing):
+      Zeile 1 : Laufzeit in Minuten in der zweiten Zelle
+      Zeile 2 : Spaltenüberschriften
+      ab Zeile 4 (first_row) : Dauer in der ersten Zelle, danach Sollwerte oder Bereiche "Start-End"
+    """
+    def __init__(self, keys, durations, start, end, raw, run_time=None, first_row=4):
+        self.keys = keys
+        self.durations = np.asarray(durations, dtype=float)
+        self.starts = np.concatenate(([0.0], np.cumsum(self.durations)[:-1]))
+        self.total = float(self.durations.sum())
+        self.start = np.asarray(start, dtype=float).reshape(len(self.durations), len(keys))
+        self.delta = np.asarray(end, dtype=float).reshape(self.start.shape) - self.start
+        # Nicht-numerische Zellen je Abschnitt: {Spaltenindex: Originalinhalt}
+        self.raw = raw
+        self.run_time = run_time
+        self.first_row = first_row
+
+    @classmethod
+    def from_sheet(cls, sheet, first_row=4, progress=None):
+        """Kompiliert ein openpyxl-Worksheet (auch im read_only-Modus)."""
+        return cls.from_rows(sheet.iter_rows(values_only=True), first_row, progress)
+
+    @classmethod
+    def from_rows(cls, rows, first_row=4, progress=None):
+        """
+        Kompiliert den Ablauf aus einer Folge von Zeilen (Tupel der Zellwerte, beginnend bei Zeile 1).
+
+        Die Abschnitte enden mit der ersten Zeile ohne Zeitdauer.
+        progress wird, falls angegeben, regelmäßig mit der aktuellen Zeilennummer aufgerufen.
+        """
+        run_time = None
+        header = []
+        durations, start, end, raw = [], [], [], []
+        width = 0
+        for row_number, values in enumerate(rows, start=1):
+            if progress is not None and row_number % 100 == 0:
+                progress(row_number)
+            if row_number == 1:
+                run_time = values[1] if len(values) > 1 else None
+                continue
+            if row_number == 2:
+                header = list(values)
+                continue
+            if row_number < first_row:
+                continue
+            if not values or values[0] is None:
+                break
+            try:
+                durations.append(float(str(values[0]).replace(',', '.')))
+            except (ValueError, TypeError):
+                raise ValueError(f"Ungültiger Zeitwert in Zeile {row_number}: {values[0]}")
+            width = max(width, len(values) - 1)
+            start.append([])
+            end.append([])
+            raw.append({})
+            for i, val in enumerate(values[1:], start=1):
+                bounds = _parse_recipe_cell(val)
+                if bounds is None:
+                    raw[-1][i - 1] = val
+                    bounds = (np.nan, np.nan)
+                start[-1].append(bounds[0])
+                end[-1].append(bounds[1])
+
+        # Zeilen auf gleiche Breite bringen (fehlende Zellen entsprechen None)
+        for segment in range(len(durations)):
+            missing = width - len(start[segment])
+            for i in range(len(start[segment]), width):
+                raw[segment][i] = None
+            start[segment].extend([np.nan] * missing)
+            end[segment].extend([np.nan] * missing)
+
+        keys = [header[i] if i < len(header) else f"Column_{i}" for i in range(1, width + 1)]
+        return cls(keys, durations, start, end, raw, run_time, first_row)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def segment_at(self, elapsed):
+        """Index des Abschnitts, der zur verstrichenen Zeit aktiv ist (Binärsuche)."""
+        index = int(np.searchsorted(self.starts, elapsed, side='right')) - 1
+        return min(max(index, 0), len(self.durations) - 1)
+
+    def evaluate(self, elapsed):
+        """
+        Bestimmt die Sollwerte aller Spalten zur verstrichenen Zeit seit Ablaufbeginn.
+
+        Nach dem letzten Abschnitt werden dessen Endwerte gehalten.
+
+        :return: (output, segment, t_section) mit output als Dictionary Spaltenname -> Sollwert,
+                 dem Index des aktiven Abschnitts und der verbleibenden Zeit dieses Abschnitts.
+        """
+        segment = self.segment_at(elapsed)
+        duration = self.durations[segment]
+        t_in = elapsed - self.starts[segment]
+        progress = min(max(t_in / duration, 0.0), 1.0) if duration > 0 else 1.0
+        values = self.start[segment] + self.delta[segment] * progress
+
+        output = dict(zip(self.keys, values.tolist()))
+        for i, val in self.raw[segment].items():
+            output[self.keys[i]] = val
+        return output, segment, duration - t_in
+
+    def to_dict(self):
+        """Segmenttabelle als JSON-taugliches Dictionary (für den Cache von load_recipe)."""
+        return {
+            'keys': self.keys,
+            'durations': self.durations.tolist(),
+            'start': self.start.tolist(),
+            'end': (self.start + self.delta).tolist(),
+            'raw': [sorted(cells.items()) for cells in self.raw],
+            'run_time': self.run_time,
+            'first_row': self.first_row,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        raw = [{int(i): val for i, val in cells} for cells in data['raw']]
+        return cls(data['keys'], data['durations'], data['start'], data['end'], raw,
+                   data['run_time'], data['first_row'])
+
+
+class FileCache:
+    """
+    Ablage abgeleiteter Daten (Recipe, skalierte Bilder, kompilierte Konfiguration) in cache_dir.
+
+    Der Dateiname ist der SHA-1 der Schlüsselteile, z. B. Version, Pfad, Änderungszeit und
+    Größe der Quelle. Geschrieben wird in eine temporäre Datei, die mit os.replace an ihren
+    Platz kommt, damit parallel startende Instanzen nie eine halbe Datei lesen. Abgelegt werden
+    nur JSON bzw. Bytes (PNG), kein pickle: cache_dir kann ein geteiltes Verzeichnis sein.
+    Unbrauchbare Dateien werden gemeldet und wie ein fehlender Eintrag behandelt. Ohne cache_dir
+    ('cache_dir' im TKINTER-Block, standardmäßig nicht gesetzt) wird nichts abgelegt.
+    """
+    def __init__(self, cache_dir, name, extension):
+        self.cache_dir = cache_dir
+        self.name = name
+        self.extension = extension
+
+    def path(self, *parts):
+        """Pfad des Eintrags zu den Schlüsselteilen (None ohne cache_dir)."""
+        if not self.cache_dir:
+            return None
+        key = "|".join(map(str, parts))
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + self.extension)
+
+    @staticmethod
+    def source_key(path):
+        """Schlüsselteile einer Quelldatei: absoluter Pfad, Änderungszeit und Größe."""
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def load(self, cache_file, reader):
+        """Liest einen Eintrag mit reader(binäre Datei); None, wenn er fehlt oder unbrauchbar ist."""
+        if cache_file is None or not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, 'rb') as f:
+                return reader(f)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"{self.name}-Cache '{cache_file}' unbrauchbar, lade neu: {e}")
+            return None
+
+    def store(self, cache_file, writer):
+        """Schreibt einen Eintrag mit writer(binäre Datei); Fehler werden nur gemeldet."""
+        if cache_file is None:
+            return
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_file, 'wb') as f:
+                writer(f)
+            os.replace(tmp_file, cache_file)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"{self.name}-Cache konnte nicht geschrieben werden: {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+    def load_json(self, cache_file):
+        return self.load(cache_file, lambda f: json.loads(f.read().decode('utf-8')))
+
+    def store_json(self, cache_file, data):
+        self.store(cache_file, lambda f: f.write(json.dumps(data).encode('utf-8')))
+
+
+RECIPE_CACHE_VERSION = 2
+
+
+def load_recipe(path, cache_dir=None, progress=None):
+    """
+    Lädt den Ablauf aus einer Excel-Datei als kompiliertes Recipe.
+
+    Die Datei wird im read_only-Modus gestreamt, gelesen wird nur das Sheet "Ablauf".
+    Ist cache_dir gesetzt, wird das Ergebnis dort abgelegt und beim nächsten Laden derselben,
+    unveränderten Datei (gleicher Pfad, gleiche Änderungszeit und Größe) direkt verwendet.
+
+    :param progress: Optional, wird mit einem Fortschritt zwischen 0 und 1 aufgerufen.
+    """
+    cache = FileCache(cache_dir, "Recipe", ".recipe.json")
+    cache_file = cache.path(RECIPE_CACHE_VERSION, *FileCache.source_key(path)) if cache_dir else None
+    data = cache.load_json(cache_file)
+    if data is not None:
+        try:
+            return Recipe.from_dict(data)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Recipe-Cache '{cache_file}' unbrauchbar, lade neu: {e}")
+
+    workbook = lazy_import('openpyxl').load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook["Ablauf"]
+        row_count = sheet.max_row or 0
+        report = None
+        if progress is not None and row_count:
+            report = lambda row: progress(min(row / row_count, 1.0))
+        recipe = Recipe.from_sheet(sheet, progress=report)
+    finally:
+        workbook.close()
+
+    cache.store_json(cache_file, recipe.to_dict())
+    if progress is not None:
+        progress(1.0)
+    return recipe
+
+
+class RecipeLoader(threading.Thread):
+    """
+    Lädt einen Ablauf mit load_recipe() im Hintergrund, damit die GUI nicht einfriert.
+
+    Der Fortschritt steht in progress (0..1), das Ergebnis nach Ende des Threads in recipe
+    bzw. ein aufgetretener Fehler in error.
+    """
+    def __init__(self, path, cache_dir=None):
+        super().__init__(name="TKH-RecipeLoader", daemon=True)
+        self.path = path
+        self.cache_dir = cache_dir
+        self.progress = 0.0
+        self.recipe = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.recipe = load_recipe(self.path, self.cache_dir, self._set_progress)
+        except Exception as e:
+            self.error = e
+
+    def _set_progress(self, value):
+        self.progress = value
+
+
+class ImageCache:
+    """
+    Cache für skalierte Bilder (Hintergrundbilder, Close-Button).
+
+    Schlüssel sind Pfad, Änderungszeit und Größe der Datei sowie Zielgröße und Skalierung.
+    Im Speicher werden die dekodierten und skalierten PIL-Bilder zwischen gleichen Bildern geteilt,
+    mit cache_dir zusätzlich als vorskalierte PNG-Dateien abgelegt und beim nächsten Start
+    direkt geladen, ohne das Originalbild erneut zu dekodieren und umzurechnen.
+    """
+    VERSION = 1
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.files = FileCache(cache_dir, "Bild", ".png")
+        self._images = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, path, size, scaling):
+        return (self.VERSION, *FileCache.source_key(path), f"{size[0]}x{size[1]}", scaling)
+
+    def get(self, path, size, scaling=1.0):
+        """
+        Liefert das Bild path in der Pixelgröße size * scaling als PIL-Bild.
+
+        Ist eine Seite von size 0, wird das Bild in Originalgröße zurückgegeben.
+        FileNotFoundError wird wie bei Image.open weitergereicht.
+        """
+        key = self._key(path, size, scaling)
+        image = self._images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        Image = lazy_import('PIL.Image')
+        cache_file = self.files.path(*key)
+        image = self.files.load(cache_file, self._read_png)
+        if image is not None:
+            self.disk_hits += 1
+
+        if image is None:
+            self.misses += 1
+            with Image.open(path) as original:
+                original.load()
+                pixels = (round(size[0] * scaling), round(size[1] * scaling))
+                if pixels[0] > 0 and pixels[1] > 0 and original.size != pixels:
+                    image = original.resize(pixels, Image.LANCZOS)
+                else:
+                    image = original.copy()
+            self.files.store(cache_file, lambda f: image.save(f, format='PNG'))
+
+        self._images[key] = image
+        return image
+
+    @staticmethod
+    def _read_png(f):
+        with lazy_import('PIL.Image').open(f) as cached:
+            cached.load()
+            return cached.copy()
+
+    def clear(self):
+        """Leert den Cache im Speicher (die Dateien in cache_dir bleiben erhalten)."""
+        self._images.clear()
+
+
+def _to_float(value):
+    """Wandelt einen Logwert in float um; nicht numerische Werte werden zu NaN."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class BinaryLog:
+    """
+    Binäres, spaltenorientiertes Logformat als Alternative zur .dat-Textdatei.
+
+    Aufbau der Datei:
+      - MAGIC (8 Bytes) und Länge des JSON-Headers (uint64, little endian)
+      - JSON-Header mit Spaltennamen, Datentyp und Metadaten, mit Leerzeichen auf ein
+        Vielfaches von 8 Bytes aufgefüllt
+      - Datensätze fester Breite aus float64-Werten (little endian); die erste Spalte
+        ist der Zeitstempel in Sekunden seit Epoch
+
+    Die Datensätze lassen sich mit read_binary_log() ohne Kopie per numpy.memmap laden.
+    """
+    MAGIC = b"TKHBIN1\n"
+    EXTENSION = ".bin"
+
+    def __init__(self, path, columns, metadata=None, create=True):
+        self.path = path
+        self.columns = list(columns)
+        self.width = len(self.columns)
+        self._record = struct.Struct(f"<{self.width}d")
+
+        if not create:
+            # Header schreibt ein anderer (LogWriter mit Rotation: am Anfang jedes Segments)
+            return
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # Bestehende Datei weiterführen, sofern die Spalten übereinstimmen
+            header, _ = self.read_header(path)
+            if header['columns'] != self.columns:
+                raise ValueError(f"Spalten in '{path}' passen nicht zur aktuellen Konfiguration")
+        else:
+            with open(path, 'wb') as f:
+                f.write(self.build_header(self.columns, metadata))
+
+    @classmethod
+    def build_header(cls, columns, metadata=None):
+        """Erzeugt den selbstbeschreibenden Header für die angegebenen Spalten."""
+        header = {
+            'version': 1,
+            'dtype': '<f8',
+            'columns': list(columns),
+            'created': time.time(),
+            'metadata': metadata or {},
+        }
+        payload = json.dumps(header, default=str).encode('utf-8')
+        payload += b" " * (-(len(cls.MAGIC) + 8 + len(payload)) % 8)
+        return cls.MAGIC + struct.pack("<Q", len(payload)) + payload
+
+    @classmethod
+    def read_header(cls, path):
+        """
+        Liest den Header einer binären Logdatei.
+
+        :return: (Header-Dictionary, Offset der Datensätze in Bytes)
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"'{path}' ist keine binäre TKH-Logdatei")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length).decode('utf-8'))
+        return header, len(cls.MAGIC) + 8 + length
+
+    def pack(self, timestamp, values):
+        """
+        Packt eine Zeile in einen Datensatz. Nicht numerische Werte werden zu NaN,
+        fehlende Spalten mit NaN aufgefüllt.
+        """
+        record = [timestamp]
+        record.extend(_to_float(value) for value in values[:self.width - 1])
+        record.extend([float('nan')] * (self.width - len(record)))
+        return self._record.pack(*record)
+
+    def append(self, timestamp, values):
+        """Hängt eine Zeile (Zeitstempel, Werte ohne Zeitstempel) an die Datei an."""
+        with open(self.path, 'ab') as f:
+            f.write(self.pack(timestamp, values))
+
+
+def read_binary_log(path):
+    """
+    Öffnet eine mit BinaryLog geschriebene Datei zur Auswertung.
+
+    :return: (Header-Dictionary, numpy.memmap der Form (Zeilen, Spalten)); die Spaltennamen
+             stehen in header['columns'], Spalte 0 ist der Zeitstempel.
+    """
+    header, offset = BinaryLog.read_header(path)
+    width = len(header['columns'])
+    rows = (os.path.getsize(path) - offset) // (8 * width)
+    if rows == 0:
+        return header, np.empty((0, width), dtype=header['dtype'])
+    data = np.memmap(path, dtype=header['dtype'], mode='r', offset=offset, shape=(rows, width))
+    return header, data
+
+
+class LogWriter(threading.Thread):
+    """
+    Schreib-Thread für Logdateien mit dauerhaft geöffneter Datei.
+
+    save_values() übergibt fertig formatierte Zeilen (str bzw. bytes im Binärmodus) nur noch
+    an eine begrenzte Warteschlange. Der Thread schreibt sie gesammelt und leert den Puffer
+    nach flush_rows Zeilen bzw. spätestens nach flush_interval Sekunden (optional mit fsync).
+    So bleiben Öffnen, Schließen und langsame Netzlaufwerke aus dem GUI-Thread heraus.
+
+    Mit rotate_bytes und/oder rotate_interval wird in Segmente <Name>_0001<Endung>,
+    <Name>_0002<Endung>, ... geschrieben. Ein neues Segment beginnt, sobald das aktuelle
+    rotate_bytes Bytes erreicht oder ein Vielfaches von rotate_interval Sekunden auf der
+    Wanduhr überschritten ist (3600 = zur vollen Stunde). Jedes Segment beginnt mit header;
+    abgeschlossene Segmente werden an compressor (LogCompressor) übergeben. Die Nummerierung
+    setzt nach vorhandenen Segmenten fort.
+
+    Textzeilen werden vor dem Schreiben selbst kodiert (Zeilenende os.linesep, Kodierung wie bei
+    open() im Textmodus), damit die Größe des Segments den tatsächlich geschriebenen Bytes entspricht.
+
+    Der erste Fehler beim Öffnen oder Schreiben steht in error; kann die Datei nicht geöffnet
+    werden, beendet sich der Thread. rows zählt nur erfolgreich geschriebene Zeilen, verworfene
+    Zeilen (auch nach einem Schreibfehler) zählt dropped. DataLogger.poll_errors() sammelt beides,
+    damit die GUI es anzeigen kann.
+    """
+    _STOP = object()
+
+    def __init__(self, path, binary=False, flush_rows=50, flush_interval=1.0, fsync=False, queue_size=10000,
+                 rotate_bytes=None, rotate_interval=None, header=None, compressor=None):
+        super().__init__(name="TKH-LogWriter", daemon=True)
+        self.path = path
+        self.binary = binary
+        self.encoding = None if binary else locale.getpreferredencoding(False)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self.rotating = bool(rotate_bytes or rotate_interval)
+        self.header = header
+        self.compressor = compressor
+        self.rows = 0
+        self.dropped = 0
+        self.errors = 0
+        self.error = None
+        self.segment = next_segment_index(path) - 1 if self.rotating else None
+        self.segment_path = path
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def write(self, data):
+        """
+        Reiht eine Zeile zum Schreiben ein, ohne zu blockieren. Ist die Warteschlange voll oder
+        der Thread nach einem Fehler beendet, wird die Zeile verworfen und in dropped gezählt.
+        """
+        if self.error is not None and not self.is_alive():
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1:
+                print(f"Log-Warteschlange für '{self.path}' voll, Zeilen werden verworfen")
+
+    def flush(self, timeout=5.0):
+        """Wartet, bis alle bisher eingereihten Zeilen geschrieben und auf die Platte gebracht sind."""
+        if not self.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Schreibt alle ausstehenden Zeilen, schließt die Datei und beendet den Thread."""
+        if self.is_alive():
+            self._queue.put(self._STOP)
+            self.join(timeout)
+
+    def _open(self):
+        """Öffnet die Logdatei bzw. das nächste Segment und schreibt dessen Header."""
+        if self.rotating:
+            self.segment += 1
+            self.segment_path = segment_path(self.path, self.segment)
+            self._segment_slot = int(time.time() // self.rotate_interval) if self.rotate_interval else None
+        f = open(self.segment_path, 'ab')
+        self._size = os.path.getsize(self.segment_path)
+        if self.rotating and self.header and self._size == 0:
+            header = self._encode(self.header)
+            f.write(header)
+            self._size += len(header)
+        return f
+
+    def _encode(self, data):
+        if self.binary:
+            return data
+        return data.replace("\n", os.linesep).encode(self.encoding)
+
+    def _record_error(self, e):
+        self.errors += 1
+        if self.error is None:
+            self.error = e
+        print(f"Fehler beim Schreiben von '{self.segment_path}': {e}")
+
+    def _rotate_due(self):
+        if self.rotate_bytes and self._size >= self.rotate_bytes:
+            return True
+        return bool(self.rotate_interval) and int(time.time() // self.rotate_interval) != self._segment_slot
+
+    def _close_segment(self, f):
+        f.close()
+        if self.rotating and self.compressor is not None:
+            self.compressor.submit(self.segment_path)
+
+    def run(self):
+        try:
+            f = self._open()
+        except OSError as e:
+            self._record_error(e)
+            self._release_waiting()
+            return
+        try:
+            unflushed = 0
+            last_flush = time.monotonic()
+            running = True
+            while running:
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    batch = []
+                # Alles sammeln, was bereits wartet, und in einem Aufruf schreiben
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                data = []
+                waiting = []
+                for item in batch:
+                    if item is self._STOP:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        waiting.append(item)
+                    else:
+                        data.append(item)
+                if data:
+                    try:
+                        chunk = self._encode((b"" if self.binary else "").join(data))
+                        f.write(chunk)
+                    except (OSError, UnicodeEncodeError) as e:
+                        self._record_error(e)
+                        self.dropped += len(data)
+                    else:
+                        self._size += len(chunk)
+                        self.rows += len(data)
+                        unflushed += len(data)
+
+                now = time.monotonic()
+                if unflushed and (waiting or not running or unflushed >= self.flush_rows
+                                  or now - last_flush >= self.flush_interval):
+                    self._flush_file(f)
+                    unflushed = 0
+                    last_flush = now
+                for event in waiting:
+                    event.set()
+
+                if running and self.rotating and self._rotate_due():
+                    self._flush_file(f)
+                    self._close_segment(f)
+                    f = None
+                    try:
+                        f = self._open()
+                    except OSError as e:
+                        self._record_error(e)
+                        self._release_waiting()
+                        return
+        finally:
+            if f is not None:
+                self._close_segment(f)
+
+    def _release_waiting(self):
+        """Gibt nach dem Ende des Threads alle flush()-Aufrufe frei, die noch warten."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not self._STOP:
+                self.dropped += 1
+
+    def _flush_file(self, f):
+        try:
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        except OSError as e:
+            self._record_error(e)
+
+
+# Endungen komprimierter Segmente je Verfahren ('log_compress')
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'lzma': '.xz'}
+
+
+def segment_path(path, index):
+    """Pfad des Segments index einer rotierten Logdatei: test.dat -> test_0003.dat."""
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_{index:04d}{extension}"
+
+
+def _segment_pattern(path):
+    stem, extension = os.path.splitext(os.path.basename(path))
+    suffixes = "|".join(re.escape(suffix) for suffix in COMPRESSION_EXTENSIONS.values())
+    return re.compile(rf"^{re.escape(stem)}_(\d{{4,}}){re.escape(extension)}({suffixes})?$")
+
+
+def log_segments(path):
+    """Vorhandene Segmente einer rotierten Logdatei als sortierte Liste (Nummer, Pfad), auch komprimierte."""
+    directory = os.path.dirname(path) or '.'
+    pattern = _segment_pattern(path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    segments = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            segments.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def next_segment_index(path):
+    return max((index for index, _ in log_segments(path)), default=0) + 1
+
+
+class LogCompressor(threading.Thread):
+    """
+    Komprimiert abgeschlossene Logsegmente im Hintergrund (gzip oder lzma, blockweise gestreamt).
+
+    Geschrieben wird zunächst in <Segment>.gz.part, erst nach vollständigem Schreiben wird
+    umbenannt und das Original gelöscht. Ein Abbruch (z. B. Programmende) verliert dadurch
+    keine Daten; beim nächsten Öffnen übernimmt recover() liegengebliebene Segmente.
+    Ein Segment wird über alle Instanzen hinweg nur einmal eingereiht.
+    """
+    _STOP = object()
+    CHUNK_SIZE = 1 << 20
+    _pending = set()
+    _pending_lock = threading.Lock()
+
+    def __init__(self, method='gzip', level=None):
+        super().__init__(name="TKH-LogCompressor", daemon=True)
+        self.method = method
+        self.level = level
+        self.extension = COMPRESSION_EXTENSIONS[method]
+        self.compressed = 0
+        self.errors = 0
+        self._queue = queue.SimpleQueue()
+
+    def submit(self, path):
+        """Reiht ein abgeschlossenes Segment zur Komprimierung ein."""
+        with self._pending_lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+        self._queue.put(path)
+
+    def recover(self, path):
+        """Reiht unkomprimierte Segmente von path ein (vor dem Öffnen eines neuen Segments aufrufen)."""
+        for _, segment in log_segments(path):
+            if not segment.endswith(tuple(COMPRESSION_EXTENSIONS.values())):
+                self.submit(segment)
+
+    def close(self, timeout=None):
+        """Beendet den Thread nach den eingereihten Segmenten; wartet höchstens timeout Sekunden."""
+        self._queue.put(self._STOP)
+        if timeout is None or timeout > 0:
+            self.join(timeout)
+
+    def run(self):
+        while True:
+            path = self._queue.get()
+            if path is self._STOP:
+                break
+            try:
+                self.compress(path)
+                self.compressed += 1
+            except OSError as e:
+                self.errors += 1
+                print(f"Fehler beim Komprimieren von '{path}': {e}")
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(path)
+
+    def _open(self, path):
+        if self.method == 'lzma':
+            return lazy_import('lzma').open(path, 'wb', preset=self.level)
+        return lazy_import('gzip').open(path, 'wb', compresslevel=6 if self.level is None else self.level)
+
+    def compress(self, path):
+        target = path + self.extension
+        part = target + ".part"
+        with open(path, 'rb') as source, self._open(part) as destination:
+            shutil.copyfileobj(source, destination, self.CHUNK_SIZE)
+        os.replace(part, target)
+        os.remove(path)
+
+
+def _column_in_group(column, channels):
+    """Prüft, ob eine Logspalte zu einem der Gerätenamen einer Kanalgruppe gehört."""
+    for name in channels:
+        if column == name or column in (f"{name}_Soll", f"{name}_Ist", f"{name}_Output"):
+            return True
+    return False
+
+
+class _LogTarget:
+    """Eine Logdatei von DataLogger mit eigener Rate und Spaltenauswahl."""
+    def __init__(self, path, columns, rate, indices, binary_log, writer):
+        self.path = path
+        self.columns = columns
+        self.period = 1.0 / rate
+        self.indices = indices  # None = alle Spalten
+        self.binary_log = binary_log
+        self.writer = writer
+        self.next_due = 0.0
+        self.error_reported = False
+        self.dropped_reported = 0
+
+    def write(self, timestamp, row):
+        if self.indices is not None:
+            row = [row[i] for i in self.indices]
+        if self.binary_log is not None:
+            self.writer.write(self.binary_log.pack(timestamp, row))
+        else:
+            timestamp_text = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')
+            self.writer.write(timestamp_text + "\t" + "\t".join(map(str, row)) + "\n")
+
+
+class DataLogger:
+    """
+    Schreibt Messzeilen mit fester, konfigurierbarer Rate in Logdateien.
+
+    Die Hauptdatei erhält alle Spalten mit rate Zeilen pro Sekunde. Über groups können
+    zusätzlich Kanalgruppen mit eigener Rate in eigene Dateien (<Name>_<Gruppe>.<Endung>)
+    geschrieben werden, z. B. {"fast": {"rate": 50, "channels": ["P1", "F1"]}}.
+
+    sample() wird mit dem Zeitstempel der Erfassung aufgerufen; eine Zeile wird nur erzeugt,
+    wenn mindestens eine Datei fällig ist. Die Rate hängt damit nur vom Zeitstempel der
+    Messwerte ab, nicht vom Takt der GUI.
+
+    Mit 'rotate_bytes'/'rotate_interval' in writer_options wird jede Datei in Segmente geteilt
+    (siehe LogWriter); jedes Segment beginnt mit preamble (Geräteinformationen) und dem
+    Spaltenkopf. Mit compress ('gzip' oder 'lzma') werden abgeschlossene Segmente im
+    Hintergrund komprimiert.
+    """
+    def __init__(self, path, columns, rate=1.0, groups=None, binary=False, metadata=None, writer_options=None,
+                 preamble='', compress=None):
+        self.columns = list(columns)
+        self.rate = rate
+        self.targets = []
+        writer_options = writer_options or {}
+        self.rotating = bool(writer_options.get('rotate_bytes') or writer_options.get('rotate_interval'))
+        self.preamble = preamble
+        self.compressor = None
+        if self.rotating and compress in COMPRESSION_EXTENSIONS:
+            self.compressor = LogCompressor(compress)
+            self.compressor.start()
+
+        self._add_target(path, self.columns, rate, None, binary, metadata, writer_options)
+        stem, extension = os.path.splitext(path)
+        for group_name, group in (groups or {}).items():
+            indices = [i for i, column in enumerate(self.columns[1:]) if _column_in_group(column, group.get('channels', []))]
+            group_columns = [self.columns[0]] + [self.columns[i + 1] for i in indices]
+            self._add_target(f"{stem}_{group_name}{extension}", group_columns, group.get('rate', rate),
+                             indices, binary, metadata, writer_options)
+
+    def _add_target(self, path, columns, rate, indices, binary, metadata, writer_options):
+        binary_log = None
+        header = None
+        if binary:
+            binary_log = BinaryLog(path, columns, metadata, create=not self.rotating)
+            if self.rotating:
+                header = BinaryLog.build_header(columns, metadata)
+        elif self.rotating:
+            header = self.preamble + "### Device Names\n" + "\t".join(columns) + "\n"
+        writer = LogWriter(path, binary=binary, header=header, compressor=self.compressor, **writer_options)
+        if self.compressor is not None:
+            # Segmente einer früheren Sitzung, die nicht mehr komprimiert wurden
+            self.compressor.recover(path)
+        writer.start()
+        if not binary and not self.rotating:
+            writer.write("### Device Names\n" + "\t".join(columns) + "\n")
+        self.targets.append(_LogTarget(path, columns, rate, indices, binary_log, writer))
+
+    @property
+    def max_rate(self):
+        return max(1.0 / target.period for target in self.targets)
+
+    def sample(self, timestamp, row_factory):
+        """
+        Schreibt eine Zeile in alle Dateien, deren nächster Zeitpunkt erreicht ist.
+
+        :param row_factory: Funktion ohne Argumente, die die Zeile (ohne Zeitstempel) liefert;
+                            wird nur aufgerufen, wenn tatsächlich geschrieben wird.
+        """
+        row = None
+        for target in self.targets:
+            if timestamp < target.next_due:
+                continue
+            if row is None:
+                row = row_factory()
+            target.write(timestamp, row)
+            target.next_due += target.period
+            if target.next_due <= timestamp:
+                # Nach einer Pause neu aufsetzen, statt verpasste Zeilen nachzuholen
+                target.next_due = timestamp + target.period
+
+    def write(self, timestamp, row):
+        """Schreibt eine Zeile sofort in die Hauptdatei, unabhängig von der Rate."""
+        self.targets[0].write(timestamp, row)
+
+    def poll_errors(self):
+        """
+        Liefert die seit dem letzten Aufruf neuen Probleme der Schreib-Threads als
+        (Meldung, beendet); beendet ist True, wenn eine Datei gar nicht mehr geschrieben wird.
+        """
+        problems = []
+        for target in self.targets:
+            writer = target.writer
+            if writer.error is not None and not target.error_reported:
+                target.error_reported = True
+                stopped = not writer.is_alive()
+                problems.append((f"Logdatei '{writer.segment_path}': {writer.error}", stopped))
+            if writer.dropped > target.dropped_reported:
+                if target.dropped_reported == 0:
+                    problems.append((f"Logdatei '{writer.path}': Zeilen werden verworfen", False))
+                target.dropped_reported = writer.dropped
+        return problems
+
+    def close(self):
+        """
+        Schreibt alle ausstehenden Zeilen und schließt alle Dateien. Die Komprimierung der
+        letzten Segmente läuft im Hintergrund weiter.
+        """
+        for target in self.targets:
+            target.writer.close()
+        if self.compressor is not None:
+            self.compressor.close(timeout=0)
+
+
+def _open_text_log(path):
+    """Öffnet eine .dat-Datei zum Lesen; komprimierte Segmente (.gz, .xz) werden beim Lesen entpackt."""
+    if path.endswith(COMPRESSION_EXTENSIONS['gzip']):
+        return lazy_import('gzip').open(path, 'rt')
+    if path.endswith(COMPRESSION_EXTENSIONS['lzma']):
+        return lazy_import('lzma').open(path, 'rt')
+    return open(path, 'r')
+
+
+def read_dat_log(path):
+    """
+    Liest eine mit save_values geschriebene .dat-Datei zur Auswertung oder Wiedergabe (LogReplay).
+
+    Die Geräteinformationen am Anfang werden übersprungen, jede Zeile mit 'Zeitpunkt' in der ersten
+    Spalte ist ein Spaltenkopf. Hat reload_config weitere Spaltenköpfe angehängt, enthält das
+    Ergebnis alle Spalten in der Reihenfolge ihres ersten Auftretens; Spalten, die ein Abschnitt
+    nicht hat, sowie nicht numerische Werte ('None', 'Error') sind NaN.
+    Gibt es path nicht, werden die Segmente der rotierten Datei (log_segments) der Reihe nach gelesen.
+
+    :return: (Spaltennamen ohne 'Zeitpunkt', Zeitstempel in Sekunden seit Epoch, Werte der Form (Zeilen, Spalten))
+    """
+    if os.path.exists(path):
+        paths = [path]
+    else:
+        paths = [segment for _, segment in log_segments(path)]
+        if not paths:
+            raise FileNotFoundError(f"Logdatei '{path}' nicht gefunden")
+
+    columns = {}
+    sections = []  # (Spaltenindizes, Zeitstempel, Zeilen) je Spaltenkopf
+    for part in paths:
+        section = None
+        with _open_text_log(part) as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if fields[0] == 'Zeitpunkt':
+                    indices = [columns.setdefault(name, len(columns)) for name in fields[1:]]
+                    section = (indices, [], [])
+                    sections.append(section)
+                    continue
+                if section is None or len(fields) < 2:
+                    continue
+                try:
+                    timestamp = datetime.fromisoformat(fields[0]).timestamp()
+                except ValueError:
+                    continue
+                width = len(section[0])
+                row = [_to_float(value) for value in fields[1:width + 1]]
+                row.extend([float('nan')] * (width - len(row)))
+                section[1].append(timestamp)
+                section[2].append(row)
+
+    times = np.array([t for _, section_times, _ in sections for t in section_times], dtype=float)
+    values = np.full((len(times), len(columns)), np.nan)
+    start = 0
+    for indices, section_times, rows in sections:
+        if rows:
+            values[start:start + len(rows), indices] = rows
+            start += len(rows)
+    if len(times) > 1 and np.any(np.diff(times) < 0):
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+    return list(columns), times, values
+
+
+class LogReplay:
+    """
+    Wiedergabe einer aufgezeichneten Logdatei auf einer virtuellen Uhr.
+
+    Die virtuelle Zeit beginnt beim ersten Zeitstempel der Aufzeichnung und läuft nach start()
+    mit dem speed-fachen der Wanduhr (1 = Echtzeit, 10 bis 1000 zum schnellen Durchlaufen langer
+    Versuche); am Ende der Aufzeichnung bleibt sie stehen (finished). row() und value() liefern
+    wie bei der echten Erfassung den zuletzt aufgezeichneten Wert, es wird nicht interpoliert.
+
+    devices() erzeugt daraus Ersatzobjekte für tfh_obj und modbus_obj, die TKH wie echte Geräte
+    liest. Mit der Wiedergabe als Uhr von TKH bekommen Erfassung, Logging und Verlauf die
+    virtuellen Zeitstempel; Excel-Ablauf sowie die Takte von DeadlineScheduler und ControlThread
+    laufen ebenfalls in virtueller Zeit, ihre Wartezeiten werden mit time_scale() auf die Wanduhr
+    umgerechnet:
+
+        replay = LogReplay.open('versuch.dat', speed=100)
+        tfh_obj, modbus_obj = replay.devices(tfh_config, modbus_config)
+        tkh = TKH(tfh_obj, modbus_obj, 'config.json', clock=replay.clock)
+        replay.start()
+        tkh.start_loop()
+
+    Messwerte werden so wiedergegeben, wie sie in der Datei stehen; die Aufzeichnung muss daher
+    mit Rohwerten ('log_units': 'raw', Standard) geloggt sein. Die Erfassung tastet weiter mit
+    'acquisition_rate' auf der Wanduhr ab, bei hohem speed also weniger Zeilen je virtueller
+    Sekunde. Die easy_PI aus utilities.regler rechnen mit ihrer eigenen Uhr.
+    """
+    def __init__(self, columns, times, values, speed=1.0):
+        if len(times) == 0:
+            raise ValueError("Die Aufzeichnung enthält keine Messwerte")
+        if speed <= 0:
+            raise ValueError("speed muss größer als 0 sein")
+        self.columns = list(columns)
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self.times = np.asarray(times, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.start_time = float(self.times[0])
+        self.end_time = float(self.times[-1])
+        self._speed = speed
+        self._position = self.start_time
+        # (Wanduhr, virtuelle Zeit, Faktor) ab dem letzten start()/seek()/set_speed(), None wenn angehalten
+        self._reference = None
+        self._lock = threading.Lock()
+        # Zuletzt bestimmte Zeile; row_index() prüft zuerst, ob sie noch gilt
+        self._row = 0
+
+    @classmethod
+    def open(cls, path, speed=1.0):
+        """Lädt eine .dat-Datei (auch rotiert/komprimiert, siehe read_dat_log) oder ein BinaryLog (.bin)."""
+        if os.path.splitext(path)[1] == BinaryLog.EXTENSION:
+            header, data = read_binary_log(path)
+            return cls(header['columns'][1:], data[:, 0], data[:, 1:], speed)
+        return cls(*read_dat_log(path), speed=speed)
+
+    def clock(self):
+        """Virtuelle Zeit in Sekunden seit Epoch (threadsicher, als clock für TKH)."""
+        reference = self._reference
+        if reference is None:
+            return self._position
+        wall, virtual, speed = reference
+        return min(virtual + (time.monotonic() - wall) * speed, self.end_time)
+
+    @property
+    def speed(self):
+        return self._speed
+
+    @property
+    def running(self):
+        return self._reference is not None
+
+    def time_scale(self):
+        """Virtuelle Sekunden je Sekunde Wanduhr für Wartezeiten: speed während der Wiedergabe, sonst 1."""
+        reference = self._reference
+        return 1.0 if reference is None else reference[2]
+
+    @property
+    def finished(self):
+        return self.clock() >= self.end_time
+
+    def start(self):
+        """Startet bzw. setzt die Wiedergabe an der aktuellen Position fort."""
+        with self._lock:
+            if self._reference is None:
+                self._reference = (time.monotonic(), self._position, self._speed)
+
+    def pause(self):
+        """Hält die virtuelle Uhr an der aktuellen Position an."""
+        with self._lock:
+            self._position = self.clock()
+            self._reference = None
+
+    def set_speed(self, speed):
+        """Ändert den Zeitraffer während der Wiedergabe, ohne dass die virtuelle Zeit springt."""
+        if speed <= 0:
+            raise ValueError("speed muss größer als 0 sein")
+        with self._lock:
+            self._position = self.clock()
+            self._speed = speed
+            if self._reference is not None:
+                self._reference = (time.monotonic(), self._position, speed)
+
+    def seek(self, timestamp):
+        """Springt zur virtuellen Zeit timestamp (auf die Aufzeichnung begrenzt)."""
+        with self._lock:
+            self._position = min(max(timestamp, self.start_time), self.end_time)
+            if self._reference is not None:
+                self._reference = (time.monotonic(), self._position, self._speed)
+
+    def row_index(self):
+        """Index der zur aktuellen virtuellen Zeit gültigen Zeile."""
+        now = self.clock()
+        index = self._row
+        times = self.times
+        # Meist gilt noch dieselbe oder die nächste Zeile; sonst Binärsuche
+        if times[index] <= now and (index + 1 == len(times) or now < times[index + 1]):
+            return index
+        if index + 1 < len(times) and times[index + 1] <= now and (index + 2 == len(times) or now < times[index + 2]):
+            index += 1
+        else:
+            index = max(int(np.searchsorted(times, now, side='right')) - 1, 0)
+        self._row = index
+        return index
+
+    def row(self):
+        """Werte aller Spalten zur aktuellen virtuellen Zeit."""
+        return self.values[self.row_index()]
+
+    def value(self, column):
+        """Wert der Spalte column zur aktuellen virtuellen Zeit, NaN wenn sie nicht aufgezeichnet wurde."""
+        index = self.column_index.get(column)
+        return float('nan') if index is None else float(self.row()[index])
+
+    def devices(self, tfh_config, modbus_config, operation_mode=0):
+        """Erzeugt (ReplayTFH, ReplayModbus) für die Gerätekonfigurationen, mit denen aufgezeichnet wurde."""
+        return ReplayTFH(tfh_config, self, operation_mode), ReplayModbus(modbus_config, self, operation_mode)
+
+
+# Gerätetypen, deren Messwert in der Logspalte des Gerätenamens bzw. bei mfc in '<Name>_Ist' steht
+REPLAY_INPUT_TYPES = ('thermocouple', 'pressure', 'FlowMeter', 'ExtInput', 'analytic', 'mfc')
+
+
+class ReplayInput:
+    """
+    Eingangsgerät der Wiedergabe: values liefert je Kanal den Wert der zugeordneten Logspalte.
+
+    Die Liste wird nur neu aufgebaut, wenn die Wiedergabe eine neue Zeile erreicht; das Lesen
+    einzelner Kanäle (values[i]) kostet damit nicht je Kanal eine ganze Zeile.
+    """
+    def __init__(self, replay, columns):
+        self.replay = replay
+        self._indices = [replay.column_index.get(column) if column else None for column in columns]
+        self._row = None
+        self._values = None
+
+    @property
+    def values(self):
+        row = self.replay.row_index()
+        if row != self._row:
+            data = self.replay.values[row]
+            self._values = [float('nan') if index is None else float(data[index]) for index in self._indices]
+            self._row = row
+        return self._values
+
+
+class ReplayOutput:
+    """Ausgangsgerät der Wiedergabe: nimmt die geschriebenen Werte auf, ohne etwas anzusteuern."""
+    def __init__(self, channels):
+        self.values = [0] * channels
+
+
+class ReplayModbusDevice:
+    """Modbus-Gerät der Wiedergabe: flow aus der Logspalte '<Name>_Ist', set() merkt sich den Sollwert."""
+    def __init__(self, replay, column):
+        self.replay = replay
+        self.column = column
+        self.setpoint = None
+
+    @property
+    def flow(self):
+        return self.replay.value(self.column)
+
+    def set(self, value):
+        self.setpoint = value
+
+
+class ReplayTFH:
+    """Ersatz für tfh_obj mit config, inputs, outputs und operation_mode, gespeist aus einem LogReplay."""
+    def __init__(self, config, replay, operation_mode=0):
+        self.config = config
+        self.replay = replay
+        self.operation_mode = operation_mode
+        channels = {}
+        outputs = {}
+        for control_name, control_rule in config.items():
+            device_type = control_rule.get("type")
+            input_device = control_rule.get("input_device")
+            if device_type in REPLAY_INPUT_TYPES and input_device and "modbus" not in input_device.lower():
+                column = f"{control_name}_Ist" if device_type == "mfc" else control_name
+                input_channel = control_rule.get("input_channel")
+                device_channels = channels.setdefault(input_device, {})
+                if input_channel is not None:
+                    device_channels[input_channel] = column
+                if device_type == "thermocouple":
+                    # Die Anzeige liest Thermoelemente immer aus Kanal 0 (siehe compile_plan)
+                    device_channels.setdefault(0, column)
+            output_device = control_rule.get("output_device")
+            if output_device:
+                output_channel = control_rule.get("output_channel") or 0
+                outputs[output_device] = max(outputs.get(output_device, 1), output_channel + 1)
+        self.inputs = {
+            uid: ReplayInput(replay, [device_channels.get(i) for i in range(max(device_channels, default=0) + 1)])
+            for uid, device_channels in channels.items()
+        }
+        self.outputs = {uid: ReplayOutput(count) for uid, count in outputs.items()}
+
+
+class ReplayModbus:
+    """Ersatz für modbus_obj mit config, devices und operation_mode, gespeist aus einem LogReplay."""
+    def __init__(self, config, replay, operation_mode=0):
+        self.config = config
+        self.replay = replay
+        self.operation_mode = operation_mode
+        self.devices = {name: ReplayModbusDevice(replay, f"{name}_Ist") for name in config}
+
+
+class SensorCalibration:
+    """
+    Umrechnung der Rohwerte aller Eingangskanäle in physikalische Einheiten in einem Schritt.
+
+    Jeder Kanal liest einen Slot des Erfassungs-Snapshots und rechnet
+
+        wert = max((roh / scale - offset) * gradient, lower)
+
+    Die Parameter aller Kanäle werden einmalig mit add() gesammelt und in NumPy-Arrays
+    übernommen, convert() rechnet dann alle Kanäle eines Snapshots auf einmal um.
+    Fehlende Rohwerte (None) ergeben NaN.
+    """
+    def __init__(self):
+        self.names = []
+        self._params = []
+        self._arrays = None
+
+    def add(self, name, slot, gradient=1.0, offset=0.0, scale=1.0, lower=None):
+        """Fügt einen Kanal hinzu und gibt seinen Index in den umgerechneten Werten zurück."""
+        self.names.append(name)
+        self._params.append((
+            slot,
+            np.nan if gradient is None else gradient,
+            np.nan if offset is None else offset,
+            scale,
+            -np.inf if lower is None else lower,
+        ))
+        self._arrays = None
+        return len(self.names) - 1
+
+    def __len__(self):
+        return len(self.names)
+
+    def _compile(self):
+        slots, gradient, offset, scale, lower = zip(*self._params)
+        self._arrays = (
+            np.array(slots, dtype=np.intp),
+            np.array(gradient, dtype=float),
+            np.array(offset, dtype=float),
+            np.array(scale, dtype=float),
+            np.array(lower, dtype=float),
+        )
+
+    def convert(self, values):
+        """Rechnet die Snapshot-Werte values in eine Liste mit einem Wert je Kanal um."""
+        if not self._params:
+            return []
+        return self.convert_array(values).tolist()
+
+    def convert_array(self, values):
+        """Wie convert(), gibt aber ein NumPy-Array zurück."""
+        if not self._params:
+            return np.empty(0)
+        if self._arrays is None:
+            self._compile()
+        slots, gradient, offset, scale, lower = self._arrays
+        raw = np.asarray(values, dtype=float)[slots]
+        converted = (raw / scale - offset) * gradient
+        np.maximum(converted, lower, out=converted)
+        return converted
+
+
+class ChannelHistory:
+    """
+    Verlauf umgerechneter Messwerte im Speicher als Ringpuffer fester Größe.
+
+    Zeitstempel (float64) und Werte (float32, eine Spalte je Kanal in names) liegen in vorab
+    angelegten NumPy-Arrays für capacity Zeilen; neue Zeilen überschreiben die ältesten. Der
+    Speicherbedarf (nbytes, size_for) steht damit beim Anlegen fest und wächst nicht.
+    append() wird im Erfassungs-Thread aufgerufen. Abfragen liefern Kopien:
+      - since(t) / last(seconds): Zeilen ab einem Zeitpunkt bzw. der letzten seconds Sekunden
+      - latest(): jüngste Werte je Kanal
+      - aggregate(seconds, bucket=...): Min, Max, Mittelwert und Standardabweichung je Kanal,
+        gesamt oder je Zeitabschnitt, vektorisiert mit NumPy
+    Trends, Alarme oder abgeleitete Kanäle lesen so aus dem Speicher statt aus der Logdatei.
+
+    Die Abfragen setzen aufsteigende Zeitstempel voraus. Läuft die Zeit zurück (z. B. nach
+    LogReplay.seek), verwirft append() den bisherigen Verlauf und erhöht generation, damit
+    Leser wie TrendPlot ihren Stand ebenfalls verwerfen.
+    """
+    VALUE_DTYPE = np.float32
+
+    def __init__(self, names, capacity):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.capacity = max(int(capacity), 1)
+        self.times = np.full(self.capacity, np.nan)
+        self.values = np.full((self.capacity, len(self.names)), np.nan, dtype=self.VALUE_DTYPE)
+        self.count = 0
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def size_for(cls, channels, capacity):
+        """Speicherbedarf in Bytes für channels Kanäle und capacity Zeilen (ohne Objekt-Overhead)."""
+        return int(capacity) * (8 + int(channels) * np.dtype(cls.VALUE_DTYPE).itemsize)
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def __len__(self):
+        """Anzahl der gespeicherten Zeilen (höchstens capacity)."""
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, values):
+        """
+        Hängt eine Zeile (ein Wert je Kanal in der Reihenfolge von names) an. Ist timestamp älter
+        als die jüngste Zeile, beginnt der Verlauf neu (siehe clear()).
+        """
+        with self._lock:
+            if self.count and timestamp < self.times[(self.count - 1) % self.capacity]:
+                self._clear()
+            row = self.count % self.capacity
+            self.times[row] = timestamp
+            self.values[row] = values
+            self.count += 1
+
+    def clear(self):
+        """Verwirft alle Zeilen und erhöht generation."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.times[:] = np.nan
+        self.values[:] = np.nan
+        self.count = 0
+        self.generation += 1
+
+    @property
+    def last_timestamp(self):
+        """Zeitstempel der jüngsten Zeile (None, solange der Verlauf leer ist)."""
+        if not self.count:
+            return None
+        return float(self.times[(self.count - 1) % self.capacity])
+
+    def since(self, timestamp, names=None):
+        """
+        Alle Zeilen mit einem Zeitstempel nach timestamp in zeitlicher Reihenfolge.
+
+        :param names: Auswahl der Kanäle (Standard: alle)
+        :return: (Zeitstempel, Werte der Form (Zeilen, Kanäle)) als Kopien
+        """
+        columns = slice(None) if names is None else [self.index[name] for name in names]
+        with self._lock:
+            end = self.count % self.capacity
+            # Der Ring besteht aus höchstens zwei aufsteigend sortierten Abschnitten
+            segments = [(0, self.count)] if self.count <= self.capacity else [(end, self.capacity), (0, end)]
+            times, values = [], []
+            for start, stop in segments:
+                first = start + int(np.searchsorted(self.times[start:stop], timestamp, side='right'))
+                times.append(self.times[first:stop])
+                values.append(self.values[first:stop][:, columns])
+            return np.concatenate(times), np.concatenate(values)
+
+    def last(self, seconds, names=None):
+        """Zeilen der letzten seconds Sekunden vor der jüngsten Zeile, wie since()."""
+        newest = self.last_timestamp
+        if newest is None:
+            return np.empty(0), np.empty((0, len(self.names) if names is None else len(names)), dtype=self.VALUE_DTYPE)
+        return self.since(newest - seconds, names)
+
+    def latest(self, names=None):
+        """Jüngste Werte je Kanal als Dictionary (leer, solange der Verlauf leer ist)."""
+        names = self.names if names is None else names
+        with self._lock:
+            if not self.count:
+                return {}
+            row = self.values[(self.count - 1) % self.capacity]
+            return {name: float(row[self.index[name]]) for name in names}
+
+    def aggregate(self, seconds, names=None, bucket=None):
+        """
+        Kennwerte der letzten seconds Sekunden je Kanal; NaN-Werte werden nicht mitgezählt.
+
+        :param bucket: Länge der Zeitabschnitte in Sekunden (an Vielfachen von bucket ausgerichtet);
+                       ohne Angabe ein Abschnitt über den ganzen Zeitraum
+        :return: HistoryStats; times enthält den Beginn jedes Abschnitts, count/min/max/mean/std
+                 sind Arrays der Form (Abschnitte, Kanäle)
+        """
+        times, values = self.last(seconds, names)
+        values = values.astype(float)
+        if not len(times):
+            empty = np.empty((0, values.shape[1]))
+            return HistoryStats(np.empty(0), empty, empty, empty, empty, empty)
+        if bucket is None:
+            starts = np.zeros(1, dtype=np.intp)
+            begins = times[:1]
+        else:
+            buckets = np.floor(times / bucket).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            begins = buckets[starts] * float(bucket)
+        lengths = np.diff(np.r_[starts, len(times)])
+
+        valid = ~np.isnan(values)
+        count = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0) / count
+            # Zweiter Durchlauf über die Abweichungen vom Mittelwert (numerisch stabiler als Summe der Quadrate)
+            deviation = np.where(valid, values - np.repeat(mean, lengths, axis=0), 0.0)
+            std = np.sqrt(np.add.reduceat(deviation * deviation, starts, axis=0) / count)
+            minimum = np.fmin.reduceat(values, starts, axis=0)
+            maximum = np.fmax.reduceat(values, starts, axis=0)
+        return HistoryStats(begins, count, minimum, maximum, mean, std)
+
+
+class ControllerBank:
+    """
+    Führt alle easy_PI- und direct_Heat-Controller gemeinsam in einem Schritt aus.
+
+    Die Regelung selbst (regeln()) steckt in den Controller-Objekten aus utilities.regler und
+    wird weiterhin je Objekt aufgerufen. Alles danach geschieht gesammelt mit NumPy:
+    Ausgangswerte einsammeln, auf Anteil 0..1 bringen (direct_Heat gibt Prozent vor),
+    Leistung für die Anzeige ('Power') und 4-20 mA ('analog_mA') umrechnen und an die
+    Ausgänge schreiben. Das Ergebnis entspricht den einzelnen Handlern _plan_easy_pi und
+    _plan_direct_heat.
+
+    Ist render None (Regelung im ControlThread), schreibt step() keine Labels; die GUI zeigt
+    die zuletzt berechnete Leistung dann selbst mit render_labels() an.
+    """
+    def __init__(self, render, gate=None):
+        self.render = render
+        # easy_PI regeln nur, solange der erste direct_Heat-Controller nichts vorgibt
+        self.gate = gate
+        self.controllers = []
+        self.regulated = []
+        self._params = []
+        self._arrays = None
+        self.shown = []
+
+    def add(self, controller, output_device, channel, regulate, divisor=1.0, power=False, analog_mA=False, unit=None):
+        """
+        Fügt einen Controller hinzu.
+
+        :param regulate: True für easy_PI (regeln() in jedem Schritt), False für direct_Heat
+        :param divisor : Umrechnung von controller.out auf den Anteil 0..1 (100 bei direct_Heat)
+        """
+        self.controllers.append(controller)
+        if regulate:
+            self.regulated.append(controller.regeln)
+        self._params.append((output_device, channel, divisor, power or 0.0, bool(power), analog_mA, unit))
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.controllers)
+
+    def _compile(self):
+        output_device, channel, divisor, power, show_power, analog_mA, unit = zip(*self._params)
+        self._targets = list(zip(output_device, channel))
+        self._labels = [
+            (i, controller.label, unit[i]) for i, controller in enumerate(self.controllers) if show_power[i]
+        ]
+        self._arrays = (
+            np.array(divisor, dtype=float),
+            np.array(power, dtype=float),
+            np.array(analog_mA, dtype=bool),
+        )
+
+    def step(self):
+        if not self.controllers:
+            return
+        if self._arrays is None:
+            self._compile()
+        if self.gate is None or self.gate.out <= 0:
+            for regeln in self.regulated:
+                regeln()
+
+        divisor, power, analog_mA = self._arrays
+        value = np.fromiter((controller.out for controller in self.controllers), dtype=float,
+                            count=len(self.controllers)) / divisor
+        self.shown = (value * power).tolist()
+        self._write(np.where(analog_mA, (4 + (20 - 4) * value) * 1000, value).tolist())
+        if self.render is not None:
+            self.render_labels(self.render)
+
+    def _write(self, written):
+        for (output_device, channel), output in zip(self._targets, written):
+            output_device.values[channel] = output
+
+    def render_labels(self, render):
+        """Zeigt die Leistung des letzten step() in den Labels der Controller mit 'Power' an."""
+        shown = self.shown
+        if not shown:
+            return
+        for i, label, unit in self._labels:
+            render(label, f"{shown[i]:.2f} {unit}")
+
+    def safe_state(self):
+        """Setzt alle Ausgänge auf Leistung 0 (4 mA bei 'analog_mA'), ohne die Controller zu verändern."""
+        if not self.controllers:
+            return
+        if self._arrays is None:
+            self._compile()
+        self._write(np.where(self._arrays[2], (4 + 0.0) * 1000, 0.0).tolist())
+
+
+class LabelRenderer:
+    """
+    Render-Schicht für Text-Widgets.
+
+    Merkt sich den zuletzt an jedes Widget übergebenen Text und ruft configure() nur auf,
+    wenn sich der angezeigte Wert tatsächlich geändert hat. Mit coalesce=True werden
+    Änderungen gesammelt und erst mit flush() einmal pro Frame geschrieben; mehrfaches
+    Setzen desselben Widgets innerhalb eines Frames führt dann nur zu einem Tk-Aufruf.
+    """
+    def __init__(self, coalesce=True):
+        self.coalesce = coalesce
+        self._shown = {}    # Widget -> zuletzt angezeigter Text
+        self._pending = {}  # Widget -> Text, der beim nächsten flush() geschrieben wird
+
+    def set(self, widget, text):
+        """Merkt einen neuen Text für das Widget vor (bzw. schreibt ihn sofort ohne coalesce)."""
+        if self.coalesce:
+            self._pending[widget] = text
+        elif self._shown.get(widget) != text:
+            widget.configure(text=text)
+            self._shown[widget] = text
+
+    def flush(self):
+        """
+        Schreibt alle vorgemerkten Änderungen in einem Durchgang.
+
+        :return: Anzahl der tatsächlich ausgeführten configure()-Aufrufe.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        shown = self._shown
+        updates = 0
+        for widget, text in pending.items():
+            if shown.get(widget) != text:
+                widget.configure(text=text)
+                shown[widget] = text
+                updates += 1
+        return updates
+
+    def invalidate(self, widget=None):
+        """
+        Vergisst den gemerkten Text eines Widgets (oder aller Widgets), z. B. nachdem
+        das Widget außerhalb des Renderers geändert wurde.
+        """
+        if widget is None:
+            self._shown.clear()
+        else:
+            self._shown.pop(widget, None)
+
+
+class TrendPlot:
+    """
+    Trend ausgewählter Kanäle über ein Zeitfenster (z. B. 10 min, 1 h oder 24 h) auf einem Canvas.
+
+    Das Zeitfenster wird in so viele Spalten geteilt, wie die Zeichenfläche Pixel breit ist; je
+    Spalte und Kanal werden nur Minimum und Maximum gehalten (Min/Max-Downsampling). update()
+    verarbeitet nur die seit dem letzten Aufruf neuen Zeilen des Verlaufs, draw() setzt die
+    Koordinaten der bestehenden Linien neu, statt Elemente neu anzulegen. Der Aufwand je
+    Aktualisierung hängt damit von der Breite und den neuen Zeilen ab, nicht von der Länge
+    des Fensters. Beginnt der Verlauf neu (ChannelHistory.generation), wird auch der Trend geleert.
+    """
+    COLORS = ('#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f')
+
+    def __init__(self, canvas, channels, window=600, width=400, height=200, y_range=None, colors=None):
+        self.canvas = canvas
+        self.channels = list(channels)
+        self.width = int(width)
+        self.height = int(height)
+        self.y_range = y_range
+        colors = colors or self.COLORS
+        self.lines = [canvas.create_line(0, 0, 0, 0, fill=colors[i % len(colors)], width=1)
+                      for i in range(len(self.channels))]
+        self.text = canvas.create_text(4, 2, anchor='nw', text='', font=('Arial', 10))
+        self.latest = [float('nan')] * len(self.channels)
+        self.set_window(window)
+
+    def set_window(self, seconds):
+        """Stellt das Zeitfenster (Sekunden) ein; beim nächsten update() wird es neu gefüllt."""
+        self.window = float(seconds)
+        self.column_seconds = self.window / self.width
+        self._min = np.full((self.width, len(self.channels)), np.nan)
+        self._max = np.full((self.width, len(self.channels)), np.nan)
+        # Absolute Spaltennummer (Zeit / column_seconds) je Platz im Ring, -1 = leer
+        self._columns = np.full(self.width, -1, dtype=np.int64)
+        self.last_time = None
+        self.generation = None
+
+    def update(self, history):
+        """Übernimmt neue Zeilen aus history (ChannelHistory); True, wenn neu gezeichnet werden muss."""
+        if history.generation != self.generation:
+            if self.generation is not None:
+                self.set_window(self.window)
+            self.generation = history.generation
+        newest = history.last_timestamp
+        if newest is None or (self.last_time is not None and newest <= self.last_time):
+            return False
+        start = newest - self.window if self.last_time is None else max(self.last_time, newest - self.window)
+        times, values = history.since(start, self.channels)
+        if not len(times):
+            return False
+        self.last_time = float(times[-1])
+        self.latest = values[-1].tolist()
+
+        columns = np.floor(times / self.column_seconds).astype(np.int64)
+        # Zeilen sind zeitlich sortiert: Gruppen je Spalte zusammenfassen
+        starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+        columns = columns[starts]
+        mins = np.fmin.reduceat(values, starts, axis=0)
+        maxs = np.fmax.reduceat(values, starts, axis=0)
+        keep = columns > columns[-1] - self.width
+        columns, mins, maxs = columns[keep], mins[keep], maxs[keep]
+
+        slots = columns % self.width
+        fresh = self._columns[slots] != columns
+        self._min[slots[fresh]] = np.nan
+        self._max[slots[fresh]] = np.nan
+        self._columns[slots] = columns
+        self._min[slots] = np.fmin(self._min[slots], mins)
+        self._max[slots] = np.fmax(self._max[slots], maxs)
+        return True
+
+    def draw(self):
+        """Zeichnet je Kanal eine Linie durch Minimum und Maximum jeder Pixelspalte."""
+        if self.last_time is None:
+            return
+        current = int(np.floor(self.last_time / self.column_seconds))
+        visible = np.arange(current - self.width + 1, current + 1)
+        slots = visible % self.width
+        valid = (self._columns[slots] == visible)[:, None]
+        mins = np.where(valid, self._min[slots], np.nan)
+        maxs = np.where(valid, self._max[slots], np.nan)
+
+        if self.y_range is not None:
+            low, high = self.y_range
+        elif np.isfinite(mins).any():
+            low, high = float(np.nanmin(mins)), float(np.nanmax(maxs))
+        else:
+            low, high = 0.0, 1.0
+        if high <= low:
+            low, high = low - 0.5, high + 0.5
+        scale = (self.height - 1) / (high - low)
+
+        for i, line in enumerate(self.lines):
+            x = np.flatnonzero(np.isfinite(mins[:, i]))
+            if not len(x):
+                self.canvas.coords(line, 0, 0, 0, 0)
+                continue
+            points = np.empty((len(x), 4))
+            points[:, 0] = x
+            points[:, 1] = (high - maxs[x, i]) * scale
+            points[:, 2] = x
+            points[:, 3] = (high - mins[x, i]) * scale
+            self.canvas.coords(line, *points.ravel().tolist())
+
+        values = "   ".join(f"{name}: {value:.2f}" for name, value in zip(self.channels, self.latest))
+        self.canvas.itemconfigure(self.text, text=f"{_format_window(self.window)}   {values}   "
+                                                  f"[{low:.4g} .. {high:.4g}]")
+
+
+def _format_window(seconds):
+    """Beschriftung eines Zeitfensters: '10 min', '1 h', '24 h', '30 s'."""
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return f"{int(seconds // 3600)} h"
+    if seconds >= 60 and seconds % 60 == 0:
+        return f"{int(seconds // 60)} min"
+    return f"{seconds:g} s"
+
+
+def read_sources(sources):
+    """
+    Liest alle Quellen (Funktionen ohne Argumente) einmal aus.
+
+    Fehlerhafte Quellen liefern None, damit ein einzelnes Gerät nicht die gesamte
+    Abtastung abbricht.
+
+    :return: (Liste der Werte in Slot-Reihenfolge, Anzahl fehlgeschlagener Lesezugriffe)
+    """
+    values = []
+    errors = 0
+    for read in sources:
+        try:
+            values.append(read())
+        except Exception:
+            values.append(None)
+            errors += 1
+    return values, errors
+
+
+class AcquisitionThread(threading.Thread):
+    """
+    Hintergrund-Thread, der alle konfigurierten Eingänge mit fester Rate abtastet.
+
+    Jeder Durchlauf liest die Quellen in einen eigenen Puffer und veröffentlicht ihn erst
+    danach als unveränderlichen Snapshot (Zeitstempel, Werte). Leser sehen dadurch immer
+    einen vollständigen Datensatz, nie einen halb geschriebenen. start_loop rendert nur den
+    jeweils neuesten Snapshot, sodass langsame Modbus-Zugriffe oder blockierende Dialoge
+    Anzeige und Abtastung nicht mehr gegenseitig aufhalten.
+
+    Die Geräte werden dabei parallel zu den Schreibzugriffen der GUI gelesen (z. B. .flow einer
+    Modbus-Pumpe neben set_Flow()). Die Geräteklassen müssen das vertragen; TKH startet die
+    Erfassung deshalb nur mit 'threaded_acquisition': true.
+
+    Der Zeitstempel wird zu Beginn der Abtastung mit der monotonen Uhr genommen und einmalig
+    auf die Wanduhr abgebildet; Sprünge der Systemzeit verfälschen die Abstände daher nicht.
+    Mit add_listener() registrierte Funktionen werden nach jeder Abtastung im Thread mit
+    (Zeitstempel, Werte) aufgerufen, z. B. für das Logging.
+
+    Mit einem LoopProfiler und den Schlüsseln der Quellen (source_keys, z. B. ('tfh', uid, Kanal))
+    wird jeder Lesezugriff einzeln gemessen; TKH übergibt die Schlüssel nur mit 'profile_devices'.
+    Die Namen der Messungen werden dabei einmalig je Quellensatz gebildet. Eine eigene Uhr (clock, z. B. LogReplay.clock)
+    ersetzt die Zeitstempel; der Takt der Abtastung bleibt an die monotone Uhr gebunden.
+    """
+    def __init__(self, sources, rate=20.0, profiler=None, source_keys=None, clock=None):
+        super().__init__(name="TKH-Acquisition", daemon=True)
+        self.sources = sources
+        self.profiler = profiler
+        self.source_keys = source_keys
+        self._source_names = self._profile_names(source_keys)
+        self.period = 1.0 / rate
+        self.samples = 0
+        self.errors = 0
+        self.listeners = []
+        self._snapshot = None
+        self._sources_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wall_offset = time.time() - time.monotonic()
+        self.clock = clock
+
+    def add_listener(self, listener):
+        """Registriert eine Funktion listener(timestamp, values), die nach jeder Abtastung aufgerufen wird."""
+        self.listeners.append(listener)
+
+    def set_sources(self, sources, source_keys=None):
+        """
+        Tauscht die Quellen aus (z. B. nach TKH.reload_config). Ein Durchlauf, der noch mit den
+        alten Quellen liest, wird verworfen; bis zum ersten neuen Snapshot liefert latest() None.
+        """
+        names = self._profile_names(source_keys)
+        with self._sources_lock:
+            self.sources = sources
+            self.source_keys = source_keys
+            self._source_names = names
+            self._snapshot = None
+
+    @staticmethod
+    def _profile_names(source_keys):
+        """(Name der Messung, Geräteart) je Quelle für _read_profiled(), None ohne Schlüssel."""
+        if not source_keys:
+            return None
+        return [("source." + ":".join(str(part) for part in key[1:]), key[0]) for key in source_keys]
+
+    def run(self):
+        deadline = time.monotonic()
+        while not self._stop_event.is_set():
+            timestamp = time.monotonic() + self._wall_offset if self.clock is None else self.clock()
+            with self._sources_lock:
+                sources, names = self.sources, self._source_names
+            if names is not None and self.profiler is not None and self.profiler.enabled:
+                values, errors = self._read_profiled(sources, names)
+            else:
+                values, errors = read_sources(sources)
+            values = tuple(values)
+            with self._sources_lock:
+                current = sources is self.sources
+                if current:
+                    self._snapshot = (timestamp, values)
+            self.samples += 1
+            self.errors += errors
+            for listener in self.listeners if current else ():
+                try:
+                    listener(timestamp, values)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Fehler in Erfassungs-Listener {listener}: {e}")
+
+            # Feste Rate über absolute Zeitpunkte; bei Überlauf wird neu synchronisiert
+            deadline += self.period
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                deadline = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def _read_profiled(self, sources, names):
+        """Wie read_sources(), misst aber jeden Lesezugriff sowie die Summe je Geräteart."""
+        clock = time.perf_counter
+        record = self.profiler.record
+        totals = {}
+        values = []
+        errors = 0
+        for read, (name, kind) in zip(sources, names):
+            start = clock()
+            try:
+                values.append(read())
+            except Exception:
+                values.append(None)
+                errors += 1
+            duration = clock() - start
+            record(name, duration)
+            totals[kind] = totals.get(kind, 0.0) + duration
+        for kind, duration in totals.items():
+            record(f"acquisition.{kind}", duration)
+        return values, errors
+
+    def latest(self):
+        """Gibt den zuletzt veröffentlichten Snapshot (Zeitstempel, Werte) oder None zurück."""
+        return self._snapshot
+
+    def stop(self, timeout=1.0):
+        """Beendet die Abtastung und wartet auf das Ende des Threads."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class ControlThread(threading.Thread):
+    """
+    Hintergrund-Thread, der die Regelung (Controller und Ausgänge) mit fester Rate ausführt.
+
+    Die GUI übergibt Sollwerte und Schalterzustände nicht direkt, sondern mit submit(); die
+    Aufrufe werden zu Beginn des nächsten Durchlaufs im Thread ausgeführt. Ein Stocken der
+    Oberfläche verzögert so höchstens neue Sollwerte, nie die Regelung selbst.
+
+    Ein Watchdog-Thread prüft, ob step() regelmäßig durchläuft. Liegt der letzte Durchlauf
+    länger als watchdog_timeout Sekunden zurück, wird safe_state() aufgerufen (z. B. Heizungen
+    aus). step() und safe_state() laufen unter einer gemeinsamen Sperre, ein gerade laufender
+    Durchlauf kann den sicheren Zustand also nicht mehr überschreiben. Der Fehlerzustand bleibt
+    gespeichert (faulted): bis zum Quittieren mit reset() wird step() nicht mehr ausgeführt und
+    der sichere Zustand nach jedem Durchlauf erneut geschrieben. Sollwerte aus submit() werden
+    weiterhin übernommen.
+
+    Der Takt läuft auf clock (bei der Wiedergabe die virtuelle Zeit von LogReplay); Wartezeiten
+    werden durch time_scale() geteilt. Der Watchdog misst immer auf der Wanduhr.
+    """
+    def __init__(self, step, rate=20.0, safe_state=None, watchdog_timeout=None, profiler=None,
+                 clock=time.monotonic, time_scale=None):
+        super().__init__(name="TKH-Control", daemon=True)
+        self.step = step
+        self.period = 1.0 / rate
+        self.safe_state = safe_state
+        self.watchdog_timeout = watchdog_timeout if watchdog_timeout is not None else 10 * self.period
+        self.profiler = profiler
+        self.clock = clock
+        self.time_scale = time_scale
+        self.runs = 0
+        self.missed = 0       # ausgelassene Zeitpunkte, weil ein Durchlauf zu spät drankam
+        self.overruns = 0     # Durchläufe, die länger als eine Periode gedauert haben
+        self.errors = 0
+        self.faults = 0       # Auslösungen des Watchdogs
+        self.faulted = False
+        self.max_duration = 0.0
+        self.last_run = time.monotonic()
+        self._commands = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watchdog = threading.Thread(target=self._watch, name="TKH-ControlWatchdog", daemon=True)
+
+    def submit(self, func, *args):
+        """Führt func(*args) zu Beginn des nächsten Durchlaufs im Regel-Thread aus."""
+        self._commands.put((func, args))
+
+    def start(self):
+        super().start()
+        self._watchdog.start()
+
+    def run(self):
+        clock = self.clock
+        deadline = clock()
+        while not self._stop_event.is_set():
+            start = clock()
+            with self._lock:
+                self._run_commands()
+                if not self.faulted:
+                    try:
+                        self.step()
+                    except Exception as e:
+                        self.errors += 1
+                        print(f"Fehler in der Regelung: {e}")
+                if self.faulted:
+                    # Auch nach einem Durchlauf, der beim Auslösen des Watchdogs noch lief
+                    self._apply_safe_state()
+            end = clock()
+            self.last_run = time.monotonic()
+            self.runs += 1
+            duration = end - start
+            self.max_duration = max(self.max_duration, duration)
+            if duration > self.period:
+                self.overruns += 1
+            if self.profiler is not None:
+                self.profiler.record('control.thread', duration)
+
+            # Feste Rate über absolute Zeitpunkte; verpasste Zeitpunkte werden übersprungen
+            deadline += self.period
+            now = clock()
+            delay = deadline - now
+            if delay < 0:
+                self.missed += int(-delay // self.period)
+                deadline = now
+                delay = 0
+            elif delay > self.period:
+                # Die Uhr ist zurückgesprungen (LogReplay.seek): neu aufsetzen
+                deadline = now
+                delay = 0
+            self._stop_event.wait(delay / _time_scale(self.time_scale))
+
+    def _run_commands(self):
+        while True:
+            try:
+                func, args = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"Fehler beim Übernehmen von {func}: {e}")
+
+    def _apply_safe_state(self):
+        if self.safe_state is None:
+            return
+        try:
+            self.safe_state()
+        except Exception as e:
+            print(f"Watchdog: sicherer Zustand konnte nicht gesetzt werden: {e}")
+
+    def _watch(self):
+        interval = min(self.watchdog_timeout / 4, self.period)
+        while not self._stop_event.wait(interval):
+            stalled = time.monotonic() - self.last_run
+            if stalled > self.watchdog_timeout and not self.faulted:
+                self.faulted = True
+                self.faults += 1
+                print(f"Watchdog: Regelung seit {stalled:.2f} s ohne Durchlauf, Ausgänge werden abgeschaltet")
+                # Einen noch laufenden Durchlauf abwarten; hängt er, trotzdem abschalten (run()
+                # schreibt den sicheren Zustand erneut, sobald der Durchlauf zurückkehrt)
+                locked = self._lock.acquire(timeout=self.watchdog_timeout)
+                try:
+                    self._apply_safe_state()
+                finally:
+                    if locked:
+                        self._lock.release()
+
+    def reset(self):
+        """Quittiert eine Auslösung des Watchdogs; ab dem nächsten Durchlauf läuft step() wieder."""
+        with self._lock:
+            self.last_run = time.monotonic()
+            if self.faulted:
+                self.faulted = False
+                print("Watchdog quittiert, Regelung läuft wieder")
+
+    def stats(self):
+        """Statistik als Dictionary (Periode, Durchläufe, verpasste Zeitpunkte, Fehler, Watchdog)."""
+        return {
+            'period': self.period,
+            'runs': self.runs,
+            'missed': self.missed,
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'max_duration': self.max_duration,
+            'faults': self.faults,
+            'faulted': self.faulted,
+        }
+
+    def report(self):
+        """Kurzer Text für die Diagnose-Anzeige."""
+        state = "WATCHDOG" if self.faulted else "ok"
+        return (
+            f"regelung: {self.runs} Läufe, {self.missed} verpasst, {self.overruns} Überläufe, "
+            f"max {self.max_duration * 1000:.1f} ms (Periode {self.period * 1000:.0f} ms), "
+            f"{self.faults} Watchdog, {state}"
+        )
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        if self._watchdog.is_alive():
+            self._watchdog.join(timeout)
+
+
+class LoopProfiler:
+    """
+    Laufzeitmessung für Phasen und einzelne Geräte-Handler der Schleife.
+
+    Je Schlüssel (z. B. 'control.excel' oder 'device.Heater_1') werden die letzten window
+    Messwerte in einem Ringpuffer gehalten; stats() berechnet daraus p50/p95/p99/max.
+    Gemessen wird mit time.perf_counter(); ist enabled False, kosten record() und timed()
+    praktisch nichts.
+    """
+    def __init__(self, enabled=True, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self._samples = {}
+
+    def record(self, key, seconds):
+        """Trägt eine gemessene Dauer (Sekunden) für key ein."""
+        if not self.enabled:
+            return
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def timed(self, key, func):
+        """Gibt func so verpackt zurück, dass jede Ausführung unter key gemessen wird."""
+        record = self.record
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return func(*args)
+            finally:
+                record(key, clock() - start)
+        return wrapper
+
+    def stats(self):
+        """
+        Statistik je Schlüssel in Millisekunden.
+
+        :return: {key: {'count', 'mean', 'p50', 'p95', 'p99', 'max'}}
+        """
+        result = {}
+        for key, samples in list(self._samples.items()):
+            values = sorted(samples)
+            if not values:
+                continue
+            n = len(values)
+            result[key] = {
+                'count': n,
+                'mean': sum(values) / n * 1000,
+                'p50': values[int(0.50 * (n - 1))] * 1000,
+                'p95': values[int(0.95 * (n - 1))] * 1000,
+                'p99': values[int(0.99 * (n - 1))] * 1000,
+                'max': values[-1] * 1000,
+            }
+        return result
+
+    def report(self, top=None):
+        """Tabelle der Statistiken, sortiert nach p95 (absteigend); top begrenzt die Zeilenzahl."""
+        rows = sorted(self.stats().items(), key=lambda item: item[1]['p95'], reverse=True)
+        if top is not None:
+            rows = rows[:top]
+        lines = [f"{'Phase/Gerät':<28}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  ms"]
+        for key, s in rows:
+            lines.append(f"{key[:28]:<28}{s['p50']:8.2f}{s['p95']:8.2f}{s['p99']:8.2f}{s['max']:8.2f}")
+        return "\n".join(lines)
+
+    def reset(self):
+        self._samples.clear()
+
+
+def _time_scale(time_scale):
+    """Faktor von Wartezeiten auf der Takt-Uhr zur Wanduhr (time_scale() oder 1)."""
+    return 1.0 if time_scale is None else time_scale()
+
+
+class ScheduledTask:
+    """Periodische Aufgabe des DeadlineScheduler mit ihren Laufzeitstatistiken."""
+    def __init__(self, name, period, callback):
+        self.name = name
+        self.period = period
+        self.callback = callback
+        self.deadline = 0.0
+        self.runs = 0
+        self.missed = 0       # ausgelassene Zeitpunkte, weil die Aufgabe zu spät drankam
+        self.overruns = 0     # Durchläufe, die länger als eine Periode gedauert haben
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.max_lateness = 0.0
+
+
+class DeadlineScheduler:
+    """
+    Führt periodische Aufgaben zu absoluten Zeitpunkten auf der monotonen Uhr aus.
+
+    Anders als ein "after(50)" nach getaner Arbeit verschiebt sich der Takt nicht um die
+    Rechenzeit: der nächste Zeitpunkt ist immer deadline + period. Kommt eine Aufgabe mehr als
+    eine Periode zu spät dran, werden die verpassten Zeitpunkte gezählt und übersprungen statt
+    nachgeholt. Jede Aufgabe hat eine eigene Periode (z. B. Regelung, Anzeige, Logging).
+
+    after ist eine Funktion after(ms, callback) wie Tk.after; ohne after kann der Scheduler
+    über run_due() aus einer eigenen Schleife betrieben werden. Läuft clock schneller als die
+    Wanduhr (LogReplay), rechnet time_scale() die Wartezeit für after um; springt clock zurück,
+    beginnt der Takt beim neuen Zeitpunkt.
+    """
+    def __init__(self, after=None, clock=time.monotonic, time_scale=None):
+        self.tasks = []
+        self.clock = clock
+        self.time_scale = time_scale
+        self._after = after
+        self._running = False
+
+    def add(self, name, period, callback):
+        """Registriert callback() als Aufgabe mit der Periode period (Sekunden)."""
+        task = ScheduledTask(name, period, callback)
+        task.deadline = self.clock()
+        self.tasks.append(task)
+        return task
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Startet den Takt; alle Aufgaben sind sofort fällig."""
+        if self._running:
+            return
+        now = self.clock()
+        for task in self.tasks:
+            task.deadline = now
+        self._running = True
+        if self._after is not None:
+            self._tick()
+
+    def stop(self):
+        self._running = False
+
+    def run_due(self):
+        """
+        Führt alle fälligen Aufgaben aus.
+
+        :return: Zeit in Sekunden bis zum nächsten Zeitpunkt (0, falls bereits etwas fällig ist).
+        """
+        clock = self.clock
+        for task in self.tasks:
+            now = clock()
+            if task.deadline - now > task.period:
+                task.deadline = now
+            if now < task.deadline:
+                continue
+            lateness = now - task.deadline
+            task.max_lateness = max(task.max_lateness, lateness)
+            if lateness >= task.period:
+                skipped = int(lateness // task.period)
+                task.missed += skipped
+                task.deadline += skipped * task.period
+            task.deadline += task.period
+            try:
+                task.callback()
+            finally:
+                duration = clock() - now
+                task.runs += 1
+                task.last_duration = duration
+                task.max_duration = max(task.max_duration, duration)
+                if duration > task.period:
+                    task.overruns += 1
+        if not self.tasks:
+            return 0.0
+        return max(min(task.deadline for task in self.tasks) - clock(), 0.0)
+
+    def _tick(self):
+        if not self._running:
+            return
+        wait = 0.0
+        try:
+            wait = self.run_due()
+        finally:
+            if self._running:
+                self._after(int(math.ceil(wait / _time_scale(self.time_scale) * 1000)), self._tick)
+
+    def stats(self):
+        """Statistik je Aufgabe als Dictionary (Periode, Durchläufe, verpasste Zeitpunkte, Laufzeiten)."""
+        return {
+            task.name: {
+                'period': task.period,
+                'runs': task.runs,
+                'missed': task.missed,
+                'overruns': task.overruns,
+                'last_duration': task.last_duration,
+                'max_duration': task.max_duration,
+                'max_lateness': task.max_lateness,
+            }
+            for task in self.tasks
+        }
+
+    def report(self):
+        """Kurzer Text mit verpassten Zeitpunkten und Laufzeiten je Aufgabe."""
+        lines = []
+        for task in self.tasks:
+            lines.append(
+                f"{task.name}: {task.runs} Läufe, {task.missed} verpasst, {task.overruns} Überläufe, "
+                f"max {task.max_duration * 1000:.1f} ms (Periode {task.period * 1000:.0f} ms)"
+            )
+        return "\n".join(lines)
+
+
+class HeadlessWidget:
+    """
+    Platzhalter für ein CustomTkinter-Widget ohne Darstellung (Headless-Modus).
+
+    Optionen aus dem Konstruktor und configure() werden nur gespeichert und sind über
+    cget() abrufbar; place()/grid() merken sich die Platzierung.
+    """
+    def __init__(self, master=None, *args, **kwargs):
+        self.master = master
+        self.options = dict(kwargs)
+        self.placement = None
+
+    def configure(self, **kwargs):
+        self.options.update(kwargs)
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    def place(self, **kwargs):
+        self.placement = ('place', kwargs)
+
+    def grid(self, **kwargs):
+        self.placement = ('grid', kwargs)
+
+    def place_forget(self):
+        self.placement = None
+
+    def grid_forget(self):
+        self.placement = None
+
+    def winfo_ismapped(self):
+        return self.placement is not None
+
+    def lower(self, *args):
+        pass
+
+    def lift(self, *args):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def destroy(self):
+        self.placement = None
+
+
+class HeadlessEntry(HeadlessWidget):
+    """Eingabefeld ohne Darstellung; der Text wird im Speicher gehalten."""
+    def __init__(self, master=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.text = ""
+
+    def insert(self, index, text):
+        index = len(self.text) if index in (tk.END, 'end') else int(index)
+        self.text = self.text[:index] + str(text) + self.text[index:]
+
+    def delete(self, first, last=None):
+        first = int(first)
+        if last is None:
+            last = first + 1
+        elif last in (tk.END, 'end'):
+            last = len(self.text)
+        self.text = self.text[:first] + self.text[int(last):]
+
+    def get(self):
+        return self.text
+
+
+class HeadlessSwitch(HeadlessWidget):
+    """Schalter ohne Darstellung (get() liefert 1 oder 0)."""
+    def __init__(self, master=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.value = 0
+
+    def select(self):
+        self.value = 1
+
+    def deselect(self):
+        self.value = 0
+
+    def toggle(self):
+        self.value = 1 - self.value
+
+    def get(self):
+        return self.value
+
+
+class HeadlessProgressBar(HeadlessWidget):
+    def __init__(self, master=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class HeadlessCanvas(HeadlessWidget):
+    """Zeichenfläche ohne Darstellung; Koordinaten und Optionen der Elemente werden gespeichert."""
+    def __init__(self, master=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.items = {}
+        self._next_item = 1
+
+    def _create(self, kind, coords, options):
+        item = self._next_item
+        self._next_item += 1
+        self.items[item] = [kind, list(coords), dict(options)]
+        return item
+
+    def create_line(self, *coords, **options):
+        return self._create('line', coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create('text', coords, options)
+
+    def coords(self, item, *coords):
+        if coords:
+            self.items[item][1] = list(coords)
+        return self.items[item][1]
+
+    def itemconfigure(self, item, **options):
+        self.items[item][2].update(options)
+
+    def delete(self, item):
+        self.items.pop(item, None)
+
+
+class HeadlessWindow(HeadlessWidget):
+    """
+    Hauptfenster ohne Darstellung mit einer minimalen Ereignisschleife.
+
+    after() merkt Aufrufe zeitlich vor, mainloop() arbeitet sie der Reihe nach ab, bis
+    destroy() aufgerufen wird oder die optionale Laufzeit abgelaufen ist. Damit laufen
+    Scheduler und Hintergrund-Abfragen von TKH unverändert ohne Tk.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(None, *args, **kwargs)
+        self._timers = []
+        self._counter = 0
+        self._cancelled = set()
+        self._destroyed = False
+
+    def geometry(self, *args):
+        pass
+
+    def title(self, *args):
+        pass
+
+    def attributes(self, *args):
+        pass
+
+    def protocol(self, *args):
+        pass
+
+    def after(self, ms, func=None, *args):
+        self._counter += 1
+        heapq.heappush(self._timers, (time.monotonic() + ms / 1000, self._counter, func, args))
+        return self._counter
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def update(self):
+        """Führt alle fälligen Aufrufe aus."""
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now and not self._destroyed:
+            _, timer_id, func, args = heapq.heappop(self._timers)
+            if timer_id in self._cancelled:
+                self._cancelled.discard(timer_id)
+                continue
+            func(*args)
+
+    def update_idletasks(self):
+        pass
+
+    def mainloop(self, duration=None):
+        """Arbeitet vorgemerkte Aufrufe ab, bis destroy() aufgerufen wird (oder duration Sekunden vergangen sind)."""
+        end = None if duration is None else time.monotonic() + duration
+        while not self._destroyed:
+            self.update()
+            now = time.monotonic()
+            if end is not None and now >= end:
+                break
+            wait = self._timers[0][0] - now if self._timers else 0.05
+            if end is not None:
+                wait = min(wait, end - now)
+            if wait > 0:
+                time.sleep(wait)
+
+    def destroy(self):
+        self._destroyed = True
+
+
+# Ersatz für das customtkinter-Modul im Headless-Modus (gleiche Namen wie in customtkinter)
+HEADLESS_UI = SimpleNamespace(
+    CTk=HeadlessWindow,
+    CTkLabel=HeadlessWidget,
+    CTkButton=HeadlessWidget,
+    CTkFrame=HeadlessWidget,
+    CTkImage=HeadlessWidget,
+    CTkEntry=HeadlessEntry,
+    CTkSwitch=HeadlessSwitch,
+    CTkProgressBar=HeadlessProgressBar,
+    CTkCanvas=HeadlessCanvas,
+    set_appearance_mode=lambda mode: None,
+)
+
+
+# Index-Dictionaries in TKH.labels bzw. TKH.entries, die aus den Widgets je Gerät aufgebaut werden
+DEVICE_LABEL_KINDS = ('mfc', 'Tc', 'Pressure', 'Vorgabe', 'FlowMeter', 'ExtInput', 'ExtOutput', 'Modbus_Pump', 'analytic')
+DEVICE_ENTRY_KINDS = ('mfc', 'Vorgabe', 'ExtOutput', 'Modbus_Pump')
+
+
+class DeviceWidgets:
+    """Widgets und Controller eines Geräts; TKH._index_devices() baut daraus die Index-Dictionaries."""
+    def __init__(self):
+        self.labels = []        # (Art, Label) in der Reihenfolge der Slots in TKH.labels[Art]
+        self.entries = []       # (Art, Eingabefeld) für TKH.entries[Art]
+        self.switch = None      # Ventil-Schalter (TKH.buttons[Name])
+        self.controller = None  # (Art, Controller) für TKH.controller[Art]
+        self.static = []        # weitere Widgets ohne eigenen Slot (Name, Einheit)
+
+    def widgets(self):
+        widgets = [label for _, label in self.labels] + [entry for _, entry in self.entries] + self.static
+        if self.switch is not None:
+            widgets.append(self.switch)
+        if self.controller is not None:
+            widgets.extend([self.controller[1].entry, self.controller[1].label])
+        return widgets
+
+    def destroy(self):
+        """Entfernt alle Widgets des Geräts (der Controller selbst bleibt erhalten)."""
+        for widget in self.widgets():
+            widget.destroy()
+
+    def save_state(self):
+        """Eingaben und Schalterstellung, die beim Neuaufbau der Widgets erhalten bleiben."""
+        entries = [entry.get() for _, entry in self.entries]
+        if self.controller is not None:
+            entries.append(self.controller[1].entry.get())
+        return entries, self.switch.get() if self.switch is not None else None
+
+    def restore_state(self, state):
+        entries, switch = state
+        widgets = [entry for _, entry in self.entries]
+        if self.controller is not None:
+            widgets.append(self.controller[1].entry)
+        for entry, text in zip(widgets, entries):
+            entry.delete(0, tk.END)
+            entry.insert(0, text)
+        if self.switch is not None and switch == 1:
+            self.switch.select()
+
+
+# Zustand eines virtuellen Widgets, solange es kein echtes Widget hat
+_VIRTUAL_MODELS = {'CTkLabel': HeadlessWidget, 'CTkEntry': HeadlessEntry, 'CTkSwitch': HeadlessSwitch}
+
+
+class VirtualWidget:
+    """
+    Stellvertreter für das Widget eines Geräts im virtualisierten Modus (VirtualPanel).
+
+    Text, Eingaben und Schalterzustand liegen in einem Headless-Modell; nur solange die Seite
+    des Widgets angezeigt wird, ist ein echtes Widget aus dem Pool gebunden, an das alle
+    Aufrufe weitergereicht werden. Anzeige-Updates für verdeckte Seiten kosten so nur das
+    Speichern des Textes, Logging und Regelung lesen die Werte wie bei echten Widgets.
+    """
+    def __init__(self, panel, widget_class, master, page, options):
+        self.panel = panel
+        self.widget_class = widget_class
+        self.master = master
+        self.page = page
+        self.model = _VIRTUAL_MODELS[widget_class](master, **options)
+        self.real = None
+        self.method = 'place'
+        panel.pages.setdefault(page, []).append(self)
+
+    # Platzierung: wird gespeichert und beim Binden auf das echte Widget angewendet
+    def place(self, **kwargs):
+        self.model.place(**kwargs)
+        self._placed()
+
+    def grid(self, **kwargs):
+        self.model.grid(**kwargs)
+        self._placed()
+
+    def _placed(self):
+        if self.real is not None:
+            method, kwargs = self.model.placement
+            self.method = method
+            getattr(self.real, method)(**kwargs)
+        elif self.page == self.panel.current:
+            self.panel.bind(self)
+
+    def place_forget(self):
+        self.model.place_forget()
+        if self.real is not None:
+            self.panel.release(self)
+
+    grid_forget = place_forget
+
+    def destroy(self):
+        self.place_forget()
+        self.panel.pages[self.page].remove(self)
+
+    def winfo_ismapped(self):
+        return self.real is not None
+
+    def configure(self, **kwargs):
+        self.model.configure(**kwargs)
+        if self.real is not None:
+            self.real.configure(**kwargs)
+
+    def cget(self, key):
+        if self.real is not None:
+            return self.real.cget(key)
+        return self.model.cget(key)
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def lower(self, *args):
+        if self.real is not None:
+            self.real.lower(*args)
+
+    def lift(self, *args):
+        if self.real is not None:
+            self.real.lift(*args)
+
+    # Eingabefelder und Schalter: solange gebunden, ist das echte Widget maßgeblich
+    def get(self):
+        return (self.real or self.model).get()
+
+    def insert(self, index, text):
+        (self.real or self.model).insert(index, text)
+
+    def delete(self, first, last=None):
+        (self.real or self.model).delete(first, last)
+
+    def select(self):
+        (self.real or self.model).select()
+
+    def deselect(self):
+        (self.real or self.model).deselect()
+
+    def toggle(self):
+        (self.real or self.model).toggle()
+
+    def save_state(self):
+        """Übernimmt Eingabe bzw. Schalterzustand des echten Widgets ins Modell."""
+        if self.widget_class == 'CTkEntry':
+            self.model.text = self.real.get()
+        elif self.widget_class == 'CTkSwitch':
+            self.model.value = self.real.get()
+
+    def restore_state(self):
+        """Überträgt Optionen, Eingabe bzw. Schalterzustand des Modells auf das echte Widget."""
+        if self.model.options:
+            self.real.configure(**self.model.options)
+        if self.widget_class == 'CTkEntry':
+            self.real.delete(0, tk.END)
+            self.real.insert(0, self.model.text)
+        elif self.widget_class == 'CTkSwitch':
+            if self.model.value == 1:
+                self.real.select()
+            else:
+                self.real.deselect()
+        self.method, kwargs = self.model.placement
+        getattr(self.real, self.method)(**kwargs)
+
+
+class VirtualPanel:
+    """
+    Virtualisierte Geräteanzeige für sehr viele Kanäle.
+
+    Die Widgets der Geräte werden als VirtualWidget angelegt und einer Seite zugeordnet;
+    echte CustomTkinter-Widgets gibt es nur für die angezeigte Seite. Beim Blättern werden
+    sie in einen Pool je Widget-Klasse und Parent zurückgegeben und für die neue Seite
+    wiederverwendet, statt neue Widgets zu erzeugen.
+    """
+    def __init__(self, ui, page=0):
+        self.ui = ui
+        self.current = page
+        self.pages = {}
+        self._pool = {}
+        self.created = 0
+
+    def factory(self, page):
+        """Ersatz für das ui-Modul, dessen CTkLabel/CTkEntry/CTkSwitch virtuelle Widgets auf page erzeugen."""
+        def make(widget_class):
+            return lambda master, *args, **kwargs: VirtualWidget(self, widget_class, master, page, kwargs)
+        return SimpleNamespace(**{widget_class: make(widget_class) for widget_class in _VIRTUAL_MODELS})
+
+    def bind(self, widget):
+        """Verbindet widget mit einem echten Widget aus dem Pool (oder einem neuen)."""
+        free = self._pool.get((widget.widget_class, id(widget.master)))
+        if free:
+            widget.real = free.pop()
+        else:
+            widget.real = getattr(self.ui, widget.widget_class)(widget.master, **widget.model.options)
+            self.created += 1
+        widget.restore_state()
+
+    def release(self, widget):
+        """Gibt das echte Widget von widget in den Pool zurück."""
+        widget.save_state()
+        real, widget.real = widget.real, None
+        getattr(real, widget.method + '_forget')()
+        self._pool.setdefault((widget.widget_class, id(widget.master)), []).append(real)
+
+    def page_count(self):
+        return max((page for page, widgets in self.pages.items() if widgets), default=0) + 1
+
+    def show(self, page):
+        """Zeigt die Seite page an: Widgets der alten Seite freigeben, die der neuen binden."""
+        page = min(max(page, 0), self.page_count() - 1)
+        if page == self.current:
+            return
+        for widget in self.pages.get(self.current, []):
+            if widget.real is not None:
+                self.release(widget)
+        self.current = page
+        for widget in self.pages.get(page, []):
+            if widget.model.placement is not None:
+                self.bind(widget)
+
+
+# --- Konfiguration prüfen, normalisieren und zwischenspeichern ---
+CONFIG_CACHE_VERSION = 4
+_NUMBER = (int, float)
+
+# Schema des TKINTER-Blocks: Schlüssel -> (erlaubte Typen, Standardwert; None = nicht ergänzen)
+TKINTER_SCHEMA = {
+    'Name': (str, 'Default Title'),
+    'screen_width': (int, 1280),
+    'screen_height': (int, 720),
+    'background-color': (str, '#FFFFFF'),
+    'fullscreen': ((bool, int), True),
+    'headless': (bool, False),
+    'has_save_function': ((bool, int), False),
+    'has_excel_function': ((bool, int), False),
+    'has_close_button': ((bool, int), False),
+    'cache_dir': ((str, type(None)), None),
+    'profile_devices': (bool, False),
+    'threaded_acquisition': (bool, False),
+    'acquisition_rate': (_NUMBER, 20),
+    'control_period': (_NUMBER, 50),
+    'display_period': (_NUMBER, 50),
+    'log_period': (_NUMBER, 50),
+    'log_rate': (_NUMBER, 1.0),
+    'log_groups': (dict, {}),
+    'log_format': (str, 'dat'),
+    'log_units': (str, 'raw'),
+    'log_fsync': (bool, False),
+    'log_rotate_bytes': ((int, type(None)), None),
+    'log_rotate_interval': ((int, float, type(None)), None),
+    'log_compress': (str, 'gzip'),
+    'control_thread': (bool, False),
+    'control_rate': (_NUMBER, 20),
+    'watchdog_timeout': (_NUMBER, 0.5),
+    'watchdog_close_valves': (bool, False),
+    'virtual_widgets': (bool, False),
+    'page_size': ((int, type(None)), None),
+    'page_controls': (dict, {}),
+    'trends': (dict, {}),
+    'history_seconds': (_NUMBER, 86400),
+    'history_rate': (_NUMBER, 1.0),
+    'history_channels': ((str, list), None),
+}
+# Zulässige Werte für Auswahloptionen
+TKINTER_CHOICES = {'log_format': ('dat', 'bin'), 'log_units': ('raw', 'converted'),
+                   'log_compress': ('gzip', 'lzma', 'none')}
+# Schalter, die wie in älteren Konfigurationen auch als 0/1 angegeben werden dürfen
+TKINTER_FLAGS = ('fullscreen', 'has_save_function', 'has_excel_function', 'has_close_button')
+# Positive Zahlen (Raten, Perioden, Größen)
+TKINTER_POSITIVE = ('acquisition_rate', 'control_period', 'display_period', 'log_period', 'log_rate',
+                    'control_rate', 'watchdog_timeout', 'page_size', 'history_seconds', 'history_rate',
+                    'log_rotate_bytes', 'log_rotate_interval')
+# Optionen, die TKH.reload_config() im laufenden Betrieb übernimmt; alle anderen erst nach einem Neustart
+TKINTER_RELOADABLE = ('acquisition_rate', 'control_period', 'display_period', 'log_period', 'log_rate', 'log_groups',
+                      'log_format', 'log_units', 'log_fsync', 'profile_devices', 'control_rate', 'watchdog_timeout',
+                      'watchdog_close_valves', 'page_size', 'log_rotate_bytes', 'log_rotate_interval', 'log_compress')
+# Optionen, nach deren Änderung eine laufende Logdatei neu geöffnet wird
+_LOG_OPTIONS = ('log_rate', 'log_groups', 'log_format', 'log_units', 'log_fsync', 'log_rotate_bytes',
+                'log_rotate_interval', 'log_compress')
+
+# Pflichtfelder der Geräte in tfh_obj.config je Typ (DeviceInfo-Felder mit "DeviceInfo.")
+TFH_DEVICE_SCHEMA = {
+    'thermocouple': ('x', 'y', 'input_device'),
+    'pressure': ('x', 'y', 'input_device', 'input_channel'),
+    'analytic': ('x', 'y', 'input_device', 'input_channel'),
+    'FlowMeter': ('x', 'y', 'input_device', 'input_channel'),
+    'ExtInput': ('x', 'y', 'input_device', 'input_channel'),
+    'mfc': ('x', 'y', 'input_device', 'input_channel', 'output_device', 'output_channel',
+            'DeviceInfo.gradient', 'DeviceInfo.y-axis'),
+    'valve': ('x', 'y', 'output_device', 'output_channel'),
+    'easy_PI': ('x', 'y', 'input_device', 'output_device', 'output_channel', 'DeviceInfo.P_Value', 'DeviceInfo.I_Value'),
+    'direct_Heat': ('x', 'y', 'output_device', 'output_channel'),
+    'Vorgabe': ('x', 'y'),
+    'Modbus_Pump': ('x', 'y'),
+}
+# Felder, die Zahlen sein müssen, wenn sie vorhanden sind
+_NUMERIC_FIELDS = ('x', 'y', 'DeviceInfo.gradient', 'DeviceInfo.y-axis', 'DeviceInfo.P_Value', 'DeviceInfo.I_Value')
+
+
+class ConfigError(ValueError):
+    """Ungültige Konfiguration; errors enthält alle gefundenen Fehler."""
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("Ungültige Konfiguration:\n  " + "\n  ".join(self.errors))
+
+
+def _field(rule, path):
+    """Liest ein Feld wie 'x' oder 'DeviceInfo.gradient' aus einer Gerätekonfiguration (_MISSING wenn nicht vorhanden)."""
+    value = rule
+    for part in path.split('.', 1) if path.startswith('DeviceInfo.') else (path,):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+_MISSING = object()
+
+
+def _validate_devices(tfh_obj, modbus_obj):
+    errors = []
+    tfh_config = tfh_obj.config
+    inputs = getattr(tfh_obj, 'inputs', None)
+    outputs = getattr(tfh_obj, 'outputs', None)
+
+    for name, rule in tfh_config.items():
+        where = f"tfh.{name}"
+        if not isinstance(rule, dict):
+            errors.append(f"{where}: Eintrag muss ein Objekt sein")
+            continue
+        if not isinstance(rule.get('DeviceInfo'), dict):
+            errors.append(f"{where}: 'DeviceInfo' fehlt oder ist kein Objekt")
+        device_type = rule.get('type')
+        required = TFH_DEVICE_SCHEMA.get(device_type, ())
+        if device_type == 'mfc' and 'modbus' in str(rule.get('input_device', '')).lower():
+            required = ('x', 'y')
+        if device_type == 'ExtInput' and isinstance(rule.get('DeviceInfo'), dict) and rule['DeviceInfo'].get('Power'):
+            required = required + ('DeviceInfo.gradient', 'DeviceInfo.y-axis')
+        for path in required:
+            if _field(rule, path) in (_MISSING, None):
+                errors.append(f"{where}: Pflichtfeld '{path}' fehlt (type '{device_type}')")
+        for path in _NUMERIC_FIELDS:
+            value = _field(rule, path)
+            if value not in (_MISSING, None) and (not isinstance(value, _NUMBER) or isinstance(value, bool)):
+                errors.append(f"{where}: '{path}' muss eine Zahl sein, nicht {value!r}")
+
+        input_device = rule.get('input_device')
+        if device_type == 'easy_PI' and input_device is not None and 'extern' not in str(input_device).lower():
+            # Eingang eines Reglers ist ein anderer Eintrag der tfh-Konfiguration
+            source = tfh_config.get(input_device)
+            if not isinstance(source, dict):
+                errors.append(f"{where}: input_device '{input_device}' ist kein Eintrag der tfh-Konfiguration")
+            elif inputs is not None and source.get('input_device') not in inputs:
+                errors.append(f"{where}: Eingang '{source.get('input_device')}' von '{input_device}' existiert nicht")
+        elif (device_type in TFH_DEVICE_SCHEMA and input_device is not None and inputs is not None
+              and 'input_device' in required and input_device not in inputs):
+            errors.append(f"{where}: input_device '{input_device}' existiert nicht")
+        output_device = rule.get('output_device')
+        if 'output_device' in required and output_device is not None and outputs is not None and output_device not in outputs:
+            errors.append(f"{where}: output_device '{output_device}' existiert nicht")
+
+    devices = getattr(modbus_obj, 'devices', None)
+    for name, rule in modbus_obj.config.items():
+        where = f"modbus.{name}"
+        if not isinstance(rule, dict):
+            errors.append(f"{where}: Eintrag muss ein Objekt sein")
+            continue
+        if rule.get('type') != 'mfc':
+            continue
+        if not isinstance(rule.get('DeviceInfo'), dict) or not isinstance(rule['DeviceInfo'].get('unit'), str):
+            errors.append(f"{where}: 'DeviceInfo.unit' fehlt")
+        if rule.get('Box') != 1:
+            for path in ('x', 'y'):
+                if _field(rule, path) in (_MISSING, None):
+                    errors.append(f"{where}: Pflichtfeld '{path}' fehlt (ohne 'Box': 1)")
+        if devices is not None and name not in devices:
+            errors.append(f"{where}: kein Modbus-Gerät mit diesem Namen")
+    return errors
+
+
+def validate_config(config, tfh_obj, modbus_obj):
+    """
+    Prüft die TKINTER-Konfiguration (TKINTER, Frames, Bilder, Close) zusammen mit den
+    Gerätekonfigurationen von tfh_obj und modbus_obj.
+
+    :return: Liste der Fehlermeldungen (leer, wenn alles gültig ist). Unbekannte Schlüssel im
+             TKINTER-Block werden nur als Warnung ausgegeben.
+    """
+    errors = []
+    if not isinstance(config, dict):
+        return ["Konfiguration muss ein Objekt sein"]
+
+    tk_config = config.get('TKINTER')
+    if not isinstance(tk_config, dict):
+        errors.append("Block 'TKINTER' fehlt")
+        tk_config = {}
+    for key, value in tk_config.items():
+        if key not in TKINTER_SCHEMA:
+            print(f"Warnung: unbekannte Option TKINTER.{key}")
+            continue
+        types = TKINTER_SCHEMA[key][0]
+        if not isinstance(value, types) or (isinstance(value, bool) and types in (_NUMBER, int)):
+            errors.append(f"TKINTER.{key}: ungültiger Typ {type(value).__name__} ({value!r})")
+        elif key in TKINTER_CHOICES and value not in TKINTER_CHOICES[key]:
+            errors.append(f"TKINTER.{key}: '{value}' ist keiner von {TKINTER_CHOICES[key]}")
+        elif key in TKINTER_POSITIVE and value is not None and value <= 0:
+            errors.append(f"TKINTER.{key}: muss größer als 0 sein")
+    for group_name, group in tk_config.get('log_groups', {}).items() if isinstance(tk_config.get('log_groups'), dict) else ():
+        if not isinstance(group, dict) or not isinstance(group.get('channels', []), list):
+            errors.append(f"TKINTER.log_groups.{group_name}: erwartet {{'rate': ..., 'channels': [...]}}")
+        elif not isinstance(group.get('rate', 1.0), _NUMBER) or group.get('rate', 1.0) <= 0:
+            errors.append(f"TKINTER.log_groups.{group_name}: 'rate' muss eine positive Zahl sein")
+
+    devices = set(tfh_obj.config) | set(modbus_obj.config)
+    history_channels = tk_config.get('history_channels')
+    if isinstance(history_channels, str) and history_channels != 'all':
+        errors.append(f"TKINTER.history_channels: 'all' oder eine Liste von Kanälen, nicht {history_channels!r}")
+    elif isinstance(history_channels, list):
+        for channel in history_channels:
+            if not isinstance(channel, str) or channel.split('.power')[0] not in devices:
+                errors.append(f"TKINTER.history_channels: Kanal {channel!r} ist kein Gerät der Konfiguration")
+    for trend_name, trend in tk_config.get('trends', {}).items() if isinstance(tk_config.get('trends'), dict) else ():
+        where = f"TKINTER.trends.{trend_name}"
+        if not isinstance(trend, dict) or not isinstance(trend.get('channels'), list) or not trend['channels']:
+            errors.append(f"{where}: erwartet {{'channels': [...], 'x': ..., 'y': ...}}")
+            continue
+        for channel in trend['channels']:
+            if not isinstance(channel, str) or channel.split('.power')[0] not in devices:
+                errors.append(f"{where}: Kanal {channel!r} ist kein Gerät der Konfiguration")
+        for field in ('x', 'y', 'width', 'height', 'window'):
+            if field in trend and (not isinstance(trend[field], _NUMBER) or isinstance(trend[field], bool)):
+                errors.append(f"{where}.{field}: muss eine Zahl sein")
+        windows = trend.get('windows', [])
+        if not isinstance(windows, list) or not all(isinstance(w, _NUMBER) and w > 0 for w in windows):
+            errors.append(f"{where}.windows: erwartet eine Liste positiver Zahlen (Sekunden)")
 
-from utilities.regler import DirectHeatController
-import time
-import json
-import os
-import openpyxl
+    frames = config.get('Frames', {})
+    if not isinstance(frames, dict):
+        errors.append("'Frames' muss ein Objekt sein")
+        frames = {}
+    for frame_name, frame_config in frames.items():
+        if not isinstance(frame_config, dict):
+            errors.append(f"Frames.{frame_name}: Eintrag muss ein Objekt sein")
+        elif ('x' in frame_config) != ('y' in frame_config):
+            errors.append(f"Frames.{frame_name}: 'x' und 'y' nur gemeinsam angeben")
+    enabled = {name for name, frame_config in frames.items() if isinstance(frame_config, dict) and frame_config.get('enabled', False)}
+    if 'control' not in enabled:
+        errors.append("Frames.control: muss vorhanden und aktiviert sein (Buttons, Timer)")
+    if 'mfc' not in enabled and any(isinstance(rule, dict) and rule.get('type') == 'mfc' and rule.get('Box') == 1
+                                    for rule in modbus_obj.config.values()):
+        errors.append("Frames.mfc: muss aktiviert sein, wenn Modbus-mfc mit 'Box': 1 konfiguriert sind")
 
-# Globaler Timer für Excel-Logging
-save_timer = time.time()
-write_header = 1
+    for key, pic_conf in config.items():
+        if isinstance(pic_conf, dict) and pic_conf.get('type') == 'picture':
+            if not isinstance(pic_conf.get('name') or pic_conf.get('png'), str):
+                errors.append(f"{key}: Bild ohne 'name' bzw. 'png'")
+            for field in ('width', 'height', 'x', 'y'):
+                try:
+                    int(pic_conf.get(field, 0))
+                except (TypeError, ValueError):
+                    errors.append(f"{key}.{field}: muss eine Zahl sein")
 
-def Excel_timing(sheet, section, t0):
+    if tk_config.get('has_close_button', False):
+        close = config.get('Close')
+        if not isinstance(close, dict):
+            errors.append("Close: fehlt (has_close_button ist aktiviert)")
+        else:
+            if not isinstance(close.get('name'), str):
+                errors.append("Close.name: Bildpfad fehlt")
+            for field in ('x', 'y'):
+                if not isinstance(close.get(field), _NUMBER):
+                    errors.append(f"Close.{field}: muss eine Zahl sein")
+
+    errors.extend(_validate_devices(tfh_obj, modbus_obj))
+    return errors
+
+
+def compile_config(config, tfh_obj, modbus_obj):
     """
-    Liest aus der gegebenen Zeile (section) des Excel-Sheets:
-      - Die erste Zelle enthält die Zeitdauer (in Sekunden) des Abschnitts.
-      - Die restlichen Zellen enthalten entweder einen direkten Sollwert (z.B. 200) oder
-        einen Bereich im Format "Start-End" (z.B. "100-200"), für den ein interpolierter Sollwert ermittelt wird.
-    
-    Parameter:
-      sheet   : Das geöffnete Excel-Arbeitsblatt (openpyxl Worksheet)
-      section : Die Zeilennummer, die aktuell abgearbeitet wird
-      t0      : Der Zeitpunkt, an dem der aktuelle Abschnitt begonnen hat (time.time())
-    
-    Rückgabe:
-      output    : Dictionary, z. B. { 'Heater_1': <aktueller Sollwert>, ... }
-      section   : ggf. aktualisierte Zeilennummer (nächster Abschnitt, falls abgelaufen)
-      t_section : Verbleibende Zeit des aktuellen Abschnitts (Sekunden)
-      t0        : ggf. aktualisierter Startzeitpunkt für den neuen Abschnitt
+    Prüft die Konfiguration (validate_config) und gibt eine normalisierte Kopie zurück,
+    in der fehlende Optionen des TKINTER-Blocks mit ihren Standardwerten ergänzt und die
+    Schalter aus TKINTER_FLAGS in bool umgewandelt sind.
+
+    :raises ConfigError: mit allen gefundenen Fehlern, bevor ein Fenster erzeugt wird.
     """
+    errors = validate_config(config, tfh_obj, modbus_obj)
+    if errors:
+        raise ConfigError(errors)
+    compiled = json.loads(json.dumps(config))
+    tk_config = compiled['TKINTER']
+    for key, (_, default) in TKINTER_SCHEMA.items():
+        if default is not None and key not in tk_config:
+            tk_config[key] = json.loads(json.dumps(default))
+    for key in TKINTER_FLAGS:
+        tk_config[key] = bool(tk_config[key])
+    compiled.setdefault('Frames', {})
+    return compiled
 
-    # Lese alle Zellen der aktuellen Zeile (ohne Filter, damit die Spaltenreihenfolge erhalten bleibt)
-    row = sheet[section]
-    values = [cell.value for cell in row]
 
-    # Die erste Zelle enthält die Zeitdauer des Abschnitts
-    try:
-        section_time = float(str(values[0]).replace(',', '.'))
-    except (ValueError, TypeError):
-        raise ValueError(f"Ungültiger Zeitwert in Zeile {section}: {values[0]}")
-    
-    # Berechne die verstrichene Zeit seit Beginn des Abschnitts und die verbleibende Zeit
-    elapsed = time.time() - t0
-    t_section = section_time - elapsed
+def _device_fingerprint(tfh_obj, modbus_obj):
+    """Gerätekonfigurationen und vorhandene Ein-/Ausgänge, von denen die Prüfung abhängt."""
+    return json.dumps({
+        'tfh': tfh_obj.config,
+        'modbus': modbus_obj.config,
+        'inputs': sorted(map(str, getattr(tfh_obj, 'inputs', {}) or {})),
+        'outputs': sorted(map(str, getattr(tfh_obj, 'outputs', {}) or {})),
+        'devices': sorted(map(str, getattr(modbus_obj, 'devices', {}) or {})),
+    }, sort_keys=True, default=str)
 
-    # Hole die Header aus Zeile 1 (angenommen, hier stehen die Spaltenüberschriften)
-    header = [cell.value for cell in sheet[2]]
 
-    output = {}
-    # Gehe alle Zellen ab der 2. Spalte durch, da die 1. Spalte die Zeitdauer ist.
-    for i, val in enumerate(values[1:], start=1):
-        # Hole den entsprechenden Spaltennamen, falls vorhanden
-        key = header[i] if i < len(header) else f"Column_{i}"
-        
-        # Falls der Zellinhalt ein String mit '-' ist, wird ein Bereich erwartet
-        if isinstance(val, str) and '-' in val:
-            parts = val.split('-')
-            try:
-                lower = float(parts[0].replace(',', '.').strip())
-                upper = float(parts[1].replace(',', '.').strip())
-                #print(f"Interpolating {lower} to {upper} at {elapsed} / {section_time}")
-            except ValueError:
-                # Bei einem Umrechnungsproblem wird der Originalinhalt übernommen
-                output[key] = val
-                continue
-            # Berechne den Fortschritt im aktuellen Abschnitt, abgeklammert zwischen 0 und 1
-            progress = min(max(elapsed / section_time, 0), 1)
-            interp_val = lower + (upper - lower) * progress
-            output[key] = interp_val
-            #print(f"Interpolated value: {interp_val}")
-            #print(key, lower, upper, progress)
-        else:
-            # Falls es sich um eine einzelne Zahl handelt, versuche sie in float zu konvertieren
-            try:
-                output[key] = float(str(val).replace(',', '.'))
-            except (ValueError, TypeError):
-                output[key] = val
+def _configured_cache_dir(source):
+    """
+    Liest 'cache_dir' aus dem TKINTER-Block von source (Pfad oder Dictionary), bevor die
+    Konfiguration geladen wird. Fehlt die Option oder ist die Datei nicht lesbar, gilt der
+    Standardwert aus TKINTER_SCHEMA (None, kein Cache); Fehler meldet danach load_config().
+    """
+    default = TKINTER_SCHEMA['cache_dir'][1]
+    config = source
+    if not isinstance(source, dict):
+        try:
+            with open(source, 'rb') as f:
+                config = json.loads(f.read().decode('utf-8'))
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+            return default
+    tk_config = config.get('TKINTER') if isinstance(config, dict) else None
+    cache_dir = tk_config.get('cache_dir', default) if isinstance(tk_config, dict) else default
+    return cache_dir if isinstance(cache_dir, str) else default
 
-    # Wenn die Zeit des aktuellen Abschnitts abgelaufen ist, gehe zum nächsten Abschnitt und setze t0 zurück.
-    if t_section < 0:
-        section += 1
-        t0 = time.time()
 
-    return output, section, t_section, t0
+def load_config(source, tfh_obj, modbus_obj, cache_dir=None):
+    """
+    Lädt und kompiliert die Konfiguration mit Cache.
+
+    source ist der Pfad einer JSON-Datei oder ein bereits geladenes Dictionary (config-Modul).
+    Der Cache-Schlüssel ist der Hash der Quelldatei zusammen mit dem der Gerätekonfigurationen
+    und der Standardwerte von TKINTER_SCHEMA; bei einem Treffer wird das kompilierte Ergebnis
+    (JSON, siehe FileCache) aus cache_dir geladen, ohne die Datei zu parsen oder erneut zu prüfen.
+
+    :raises ConfigError: bei ungültiger Konfiguration (auch bei fehlerhaftem JSON).
+    """
+    if isinstance(source, dict):
+        raw = json.dumps(source, sort_keys=True, default=str).encode('utf-8')
+    else:
+        with open(source, 'rb') as f:
+            raw = f.read()
+    cache = FileCache(cache_dir, "Config", ".config.json")
+    # Die Standardwerte des Schemas gehören zum Schlüssel: ändern sie sich, wird neu kompiliert
+    schema = json.dumps({key: default for key, (_, default) in TKINTER_SCHEMA.items()}, sort_keys=True, default=str)
+    cache_file = cache.path(CONFIG_CACHE_VERSION, hashlib.sha1(raw).hexdigest(),
+                            hashlib.sha1(_device_fingerprint(tfh_obj, modbus_obj).encode('utf-8')).hexdigest(),
+                            hashlib.sha1(schema.encode('utf-8')).hexdigest())
+    compiled = cache.load_json(cache_file)
+    if isinstance(compiled, dict):
+        return compiled
+
+    if isinstance(source, dict):
+        config = source
+    else:
+        try:
+            config = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ConfigError([f"{source}: kein gültiges JSON ({e})"])
+    compiled = compile_config(config, tfh_obj, modbus_obj)
+    cache.store_json(cache_file, compiled)
+    return compiled
+
+
+class _SaveFileView:
+    """Sicht auf ein TKH-Objekt mit eigenem entries['SaveFile'], ohne das Original zu verändern."""
+    def __init__(self, tkh, save_file):
+        self._tkh = tkh
+        self.entries = dict(tkh.entries, SaveFile=save_file)
+
+    def __getattr__(self, name):
+        return getattr(self._tkh, name)
 
 
 class TKH:
@@ -105,44 +3154,198 @@ class TKH:
       - Erstellen von Fenstern, Frames, Labels, Buttons und Eingabefeldern
       - Einfügen von Hintergrundbildern und weiteren Grafiken
       - Regelmäßiges Aktualisieren und Speichern der Messwerte
+
+    clock liefert die Zeitstempel der Messwerte in Sekunden seit Epoch (Standard: Systemzeit).
+    Für die Wiedergabe einer Aufzeichnung LogReplay.clock (oder das LogReplay selbst): dann
+    laufen auch Regelung, Excel-Ablauf und Takte in virtueller Zeit (siehe LogReplay).
     """
-    def __init__(self, tfh_obj, modbus_obj, json_name=False):
+    def __init__(self, tfh_obj, modbus_obj, json_name=False, headless=None, clock=None):
         # Objekte für Daten/Steuerung speichern
         self.tfh_obj = tfh_obj
         self.modbus_obj = modbus_obj
+        replay = clock if isinstance(clock, LogReplay) else getattr(clock, '__self__', None)
+        self.replay = replay if isinstance(replay, LogReplay) else None
+        if self.replay is not None:
+            self.clock = self.monotonic = self.replay.clock
+            self.time_scale = self.replay.time_scale
+        else:
+            self.clock = clock or time.time
+            # Uhr für Zeitabstände (Takte von Scheduler und ControlThread)
+            self.monotonic = time.monotonic
+            self.time_scale = None
         self.write_header = True
         self.save_timer = time.time()
         self.running_excel = 0
+        self.recipe_loader = None
+        self.data_logger = None
+        self.logging_enabled = False
+        self.log_state = None
+        self._log_lock = threading.Lock()
+        # Dauer der Startphasen in Sekunden (siehe startup_report)
+        self.startup_times = {}
+        started = phase_start = time.perf_counter()
         
         # Konfiguration laden (JSON oder über ein config-Modul)
-        self.config = self.get_config(json_name)
+        # Ungültige Konfigurationen werden hier mit ConfigError abgelehnt, bevor ein Fenster entsteht
+        self.json_name = json_name
+        self.config = self.load_config(json_name)
         if not self.config:
             raise ValueError("Configuration could not be loaded")
+        phase_start = self._startup_phase('config', phase_start)
+
+        # Headless-Modus: Widgets ohne Darstellung, Betrieb über eine einfache Schleife statt Tk
+        if headless is None:
+            headless = self.config['TKINTER'].get('headless', False)
+        self.headless = headless
+        self.ui = HEADLESS_UI if headless else ctk
         
+        # Vorskalierte Bilder für set_all_pictures und den Close-Button
+        self.image_cache = ImageCache(self.config['TKINTER'].get('cache_dir'))
+
         # Fenster und GUI-Komponenten initialisieren
         self.window = self.initialize_window()
+        phase_start = self._startup_phase('window', phase_start)
         self.set_all_pictures()
+        phase_start = self._startup_phase('pictures', phase_start)
+
+        # Module für Excel-Abläufe und Dateidialoge im Hintergrund vorladen, sobald die Funktion aktiv ist
+        if not self.headless:
+            preload = []
+            if self.config['TKINTER'].get('has_excel_function', False):
+                preload += ['openpyxl', 'tkinter.filedialog']
+            if self.config['TKINTER'].get('has_save_function', False):
+                preload += ['tkinter.filedialog', 'utilities.data_functions']
+            if preload:
+                preload_modules(list(dict.fromkeys(preload)))
+
+        # Render-Schicht: configure() nur bei geänderten Texten, gesammelt einmal pro Tick
+        self.renderer = LabelRenderer()
+
+        # Laufzeitmessung der Schleifenphasen (und optional je Gerät)
+        self.profiler = LoopProfiler()
         
+        # Virtualisierte Geräteanzeige: echte Widgets nur für die angezeigte Seite
+        self.virtual = None
+        self.device_pages = {}
+        if self.config['TKINTER'].get('virtual_widgets', False):
+            self.virtual = VirtualPanel(self.ui)
+            self.device_pages = self.assign_pages()
+        self._page_factories = {}
+
         # Dictionaries zum Speichern von Widgets
         self.labels = {}
         self.entries = {}
         self.buttons = {}
         self.controller = {}
+        # Register Gerätename -> DeviceEntry(kind, index, widget, controller), wird beim Erzeugen der Widgets gefüllt
+        self.registry = {}
+        # Widgets und Controller je Gerät (DeviceWidgets), Grundlage für registry und die Index-Dictionaries
+        self.device_widgets = {}
+        self._switch_names = set()
         
         # Frames, Eingabefelder, Labels, Buttons und Controller erstellen
         self.create_frames()
         self.create_entries(tfh_obj)
         self.create_labels(tfh_obj)
         self.create_buttons(tfh_obj)
+        self.create_page_controls()
+        phase_start = self._startup_phase('widgets', phase_start)
         self.setup_controller(tfh_obj)
+        phase_start = self._startup_phase('controller', phase_start)
+
+        # Konfiguration einmalig in einen Ausführungsplan für start_loop übersetzen
+        self.compile_plan()
+        # Stand der Gerätekonfigurationen, gegen den reload_config() vergleicht
+        self._device_config = self._copy_device_config()
+        phase_start = self._startup_phase('plan', phase_start)
+
+        # Verlauf der Messwerte im Speicher und Trenddarstellungen ('trends' im TKINTER-Block)
+        self.history = None
+        self.trends = {}
+        self.create_history()
+        self.create_trends()
+        phase_start = self._startup_phase('history', phase_start)
+
+        # Erfassung der Eingänge in einem eigenen Thread (entkoppelt vom Tk-Mainloop); nur auf
+        # Anforderung, da die Geräte dann gleichzeitig aus GUI (set_Flow, Ausgänge) und Thread
+        # angesprochen werden und das selbst vertragen müssen
+        self.acquisition = None
+        if self.config['TKINTER'].get('threaded_acquisition', False):
+            # Die Erfassung muss mindestens so schnell laufen wie das schnellste Logging
+            log_rates = [self.config['TKINTER'].get('log_rate', 1.0)]
+            log_rates += [group.get('rate', log_rates[0]) for group in self.config['TKINTER'].get('log_groups', {}).values()]
+            rate = max([self.config['TKINTER'].get('acquisition_rate', 20)] + log_rates)
+            self.acquisition = AcquisitionThread(self.sources, rate, self.profiler, self._source_keys(), clock=self.clock)
+            self.acquisition.add_listener(self._on_sample)
+            if self.history is not None:
+                self.acquisition.add_listener(self._record_history)
+            self.acquisition.start()
+
+        # Regelung in einem eigenen Thread mit fester Rate und Watchdog (sonst im 'control'-Takt der GUI)
+        self.control_thread = None
+        if self.config['TKINTER'].get('control_thread', False):
+            self.control_thread = ControlThread(
+                self.run_controllers,
+                rate=self.config['TKINTER'].get('control_rate', 20),
+                safe_state=self.safe_outputs,
+                watchdog_timeout=self.config['TKINTER'].get('watchdog_timeout', 0.5),
+                profiler=self.profiler,
+                clock=self.monotonic,
+                time_scale=self.time_scale
+            )
+            self.control_thread.start()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        phase_start = self._startup_phase('acquisition', phase_start)
+
+        # Taktgeber für Regelung, Anzeige und Logging mit getrennten Perioden (ms)
+        self.scheduler = DeadlineScheduler(self.window.after, clock=self.monotonic, time_scale=self.time_scale)
+        self.scheduler.add('control', self.config['TKINTER'].get('control_period', 50) / 1000, self.control_step)
+        self.scheduler.add('display', self.config['TKINTER'].get('display_period', 50) / 1000, self.display_step)
+        self.scheduler.add('logging', self.config['TKINTER'].get('log_period', 50) / 1000, self.update_logging)
+        if self.trends:
+            self.scheduler.add('trends', 0.5, self.update_trends)
+
+        # Diagnose-Anzeige mit Laufzeitstatistik (F12 schaltet um)
+        self.diagnostics = None
+        self.scheduler.add('diagnostics', 1.0, self.update_diagnostics)
+        self.window.bind('<F12>', lambda event: self.toggle_diagnostics())
+        self._startup_phase('scheduler', phase_start)
+        self.startup_times['total'] = time.perf_counter() - started
+
+    def _startup_phase(self, name, start):
+        """Speichert die Dauer der Startphase name in self.startup_times und gibt den neuen Startzeitpunkt zurück."""
+        now = time.perf_counter()
+        self.startup_times[name] = now - start
+        return now
+
+    def startup_report(self):
+        """
+        Textbericht über die Startzeit: Import von tkinter_lib, die Phasen von __init__
+        und die bisher nachgeladenen Module (lazy_import).
+        """
+        lines = [f"{'Startphase':<24}{'ms':>10}", f"{'import':<24}{IMPORT_TIME * 1000:>10.1f}"]
+        for name, seconds in self.startup_times.items():
+            lines.append(f"{name:<24}{seconds * 1000:>10.1f}")
+        if lazy_import_times:
+            lines.append("")
+            lines.append(f"{'nachgeladen':<24}{'ms':>10}")
+            for module_name, seconds in lazy_import_times.items():
+                lines.append(f"{module_name:<24}{seconds * 1000:>10.1f}")
+        if self.history is not None:
+            lines.append("")
+            lines.append(f"{'Verlauf':<24}{self.history.nbytes / 1e6:>7.1f} MB "
+                         f"({len(self.history.names)} Kanäle x {self.history.capacity} Zeilen)")
+        return "\n".join(lines)
     
     # --- Hilfsfunktionen zum Erzeugen von Widgets ---
-    def _create_label(self, parent, text, font_size, x=None, y=None, grid_opts=None, **kwargs):
+    def _create_label(self, parent, text, font_size, x=None, y=None, grid_opts=None, ui=None, **kwargs):
         """
         Erzeugt ein Label mit dem angegebenen Parent, Text und Schriftgröße.
         Platzierung erfolgt entweder über .grid() oder .place().
+        ui ersetzt self.ui, z. B. für virtuelle Widgets eines Geräts (siehe _device_ui).
         """
-        label = ctk.CTkLabel(parent, font=('Arial', font_size), text=text, bg_color='white', **kwargs)
+        kwargs.setdefault('bg_color', 'white')
+        label = (ui or self.ui).CTkLabel(parent, font=('Arial', font_size), text=text, **kwargs)
         if grid_opts:
             label.grid(**grid_opts)
         else:
@@ -153,18 +3356,18 @@ class TKH:
         """
         Erzeugt einen Button mit dem angegebenen Parent, Text und Callback.
         """
-        button = ctk.CTkButton(parent, text=text, command=command, **kwargs)
+        button = self.ui.CTkButton(parent, text=text, command=command, **kwargs)
         if grid_opts:
             button.grid(**grid_opts)
         else:
             button.place(x=x, y=y)
         return button
     
-    def _create_entry(self, parent, default_text, x=None, y=None, grid_opts=None, **kwargs):
+    def _create_entry(self, parent, default_text, x=None, y=None, grid_opts=None, ui=None, **kwargs):
         """
         Erzeugt ein Eingabefeld (Entry), füllt es mit dem Default-Text und platziert es.
         """
-        entry = ctk.CTkEntry(parent, **kwargs)
+        entry = (ui or self.ui).CTkEntry(parent, **kwargs)
         entry.insert(0, str(default_text))
         if grid_opts:
             entry.grid(**grid_opts)
@@ -172,6 +3375,13 @@ class TKH:
             entry.place(x=x, y=y)
         return entry
     
+    def _register(self, device_name, kind, index, widget, controller=None):
+        """
+        Trägt ein Gerät mit seinem Widget (und ggf. Controller) in self.registry ein,
+        damit es per Namen in konstanter Zeit gefunden werden kann.
+        """
+        self.registry[device_name] = DeviceEntry(kind, index, widget, controller)
+
     # --- Konfiguration laden und Fenster initialisieren ---
     def get_config(self, config_name):
         """
@@ -191,12 +3401,32 @@ class TKH:
             print(f"Error loading config: {e}")
             return None
 
+    def load_config(self, config_name):
+        """
+        Lädt die Konfiguration wie get_config(), prüft sie zusammen mit den Gerätekonfigurationen
+        und ergänzt Standardwerte (siehe load_config/compile_config). Ist 'cache_dir' im
+        TKINTER-Block gesetzt, werden kompilierte Konfigurationen dort zwischengespeichert.
+
+        :return: Konfigurationsdictionary oder None, wenn die Datei fehlt.
+        :raises ConfigError: bei ungültiger Konfiguration.
+        """
+        if config_name:
+            source = f'./json_files/{config_name}.json'
+            if not os.path.exists(source):
+                print(f"Error loading config: Datei '{source}' nicht gefunden")
+                return None
+        else:
+            source = self.get_config(config_name)
+            if not source:
+                return None
+        return load_config(source, self.tfh_obj, self.modbus_obj, _configured_cache_dir(source))
+
     def initialize_window(self):
         """
         Initialisiert das Hauptfenster basierend auf Konfigurationsparametern.
         """
-        window = ctk.CTk()
-        ctk.set_appearance_mode("light")
+        window = self.ui.CTk()
+        self.ui.set_appearance_mode("light")
         
         # Bildschirmgröße aus der Konfiguration oder Standardwerte
         scrW = self.config.get('TKINTER', {}).get('screen_width', 1280)
@@ -217,6 +3447,8 @@ class TKH:
         Unterstützt werden Einträge, die entweder den Schlüssel "name" oder "png" für den Bildpfad enthalten.
         Größe und Position werden aus der Konfiguration ausgelesen.
         """
+        if self.headless:
+            return
         for key, pic_conf in self.config.items():
             if pic_conf.get("type") == "picture":
                 # Ermittele Bildpfad (name oder png)
@@ -231,8 +3463,8 @@ class TKH:
                 y = int(pic_conf.get("y", 0))
                 
                 try:
-                    image = ctk.CTkImage(Image.open(image_path), size=(width, height))
-                    label = ctk.CTkLabel(self.window, image=image, text="")
+                    image = self._load_image(image_path, (width, height))
+                    label = self.ui.CTkLabel(self.window, image=image, text="")
                     label.place(x=x, y=y)
                     label.lower()  # Hintergrundbild nach hinten verschieben
                     
@@ -243,6 +3475,72 @@ class TKH:
                 except FileNotFoundError:
                     print(f"Bilddatei '{image_path}' für {key} nicht gefunden.")
 
+    def _load_image(self, path, size):
+        """
+        Erzeugt ein CTkImage der Größe size aus dem ImageCache.
+
+        Das Bild liegt bereits in der Pixelgröße für die aktuelle Skalierung des Fensters vor,
+        so dass CTkImage es nicht erneut umrechnen muss.
+        """
+        try:
+            scaling = self.ui.ScalingTracker.get_widget_scaling(self.window)
+        except (AttributeError, KeyError):
+            scaling = 1.0
+        image = self.image_cache.get(path, size, scaling)
+        if size[0] <= 0 or size[1] <= 0:
+            size = (image.width / scaling, image.height / scaling)
+        return self.ui.CTkImage(image, size=size)
+
+    # --- Virtualisierte Geräteanzeige ---
+    def assign_pages(self):
+        """
+        Ordnet jedem Gerät eine Seite zu: 'page' in der Gerätekonfiguration, sonst fortlaufend
+        mit 'page_size' Geräten je Seite ('page_size' im TKINTER-Block, ohne Angabe alle auf Seite 0).
+        """
+        page_size = self.config['TKINTER'].get('page_size')
+        pages = {}
+        for i, (control_name, control_rule) in enumerate(
+                list(self.modbus_obj.config.items()) + list(self.tfh_obj.config.items())):
+            pages[control_name] = control_rule.get('page', i // page_size if page_size else 0)
+        return pages
+
+    def _device_ui(self, control_name):
+        """ui-Modul für die Widgets eines Geräts: self.ui oder virtuelle Widgets auf dessen Seite."""
+        if self.virtual is None:
+            return self.ui
+        page = self.device_pages.get(control_name, 0)
+        if page not in self._page_factories:
+            self._page_factories[page] = self.virtual.factory(page)
+        return self._page_factories[page]
+
+    def create_page_controls(self):
+        """Buttons zum Blättern und Seitenanzeige, wenn die Geräte auf mehrere Seiten verteilt sind."""
+        if self.virtual is None or self.virtual.page_count() < 2:
+            return
+        position = self.config['TKINTER'].get('page_controls', {})
+        x = position.get('x', 20)
+        y = position.get('y', 20)
+        self.buttons['PagePrev'] = self._create_button(
+            parent=self.window, text='<', command=lambda: self.show_page(self.virtual.current - 1),
+            x=x, y=y, width=40, fg_color='brown', text_color='white'
+        )
+        self.labels['Page'] = self._create_label(
+            parent=self.window, text='', font_size=18, x=x + 50, y=y
+        )
+        self.buttons['PageNext'] = self._create_button(
+            parent=self.window, text='>', command=lambda: self.show_page(self.virtual.current + 1),
+            x=x + 140, y=y, width=40, fg_color='brown', text_color='white'
+        )
+        self.show_page(self.virtual.current)
+
+    def show_page(self, page):
+        """Zeigt die Geräte der Seite page an (nur im virtualisierten Modus)."""
+        if self.virtual is None:
+            return
+        self.virtual.show(page)
+        if 'Page' in self.labels:
+            self.labels['Page'].configure(text=f"Seite {self.virtual.current + 1}/{self.virtual.page_count()}")
+
     # --- Frames erstellen ---
     def create_frames(self):
         """
@@ -255,7 +3553,7 @@ class TKH:
         frames_dict = {}
         for frame_name, frame_config in self.config.get('Frames', {}).items():
             if frame_config.get('enabled', False):
-                frames_dict[frame_name] = ctk.CTkFrame(
+                frames_dict[frame_name] = self.ui.CTkFrame(
                     self.window,
                     fg_color=frame_config.get('fg_color', '#FFFFFF'),
                     border_color=frame_config.get('border_color', '#000000'),
@@ -270,7 +3568,7 @@ class TKH:
                     )
                 
                 if 'title' in frame_config:
-                    name_frame = ctk.CTkLabel(
+                    name_frame = self.ui.CTkLabel(
                         frames_dict[frame_name],
                         font=('Arial', 20),
                         text=frame_config['title']
@@ -289,181 +3587,14 @@ class TKH:
           - self.modbus_obj.config: Für Geräte, die über Modbus gesteuert werden.
           - tfh_obj.config: Für zusätzliche externe Geräte.
           
-        Die Labels werden in einem Dictionary (self.labels) gespeichert.
+        Die Labels je Gerät legt _create_device_labels() an, _index_devices() ordnet sie
+        in self.labels ein.
         """
-        # Initialisiere Dictionaries und Indexzähler für verschiedene Gerätetypen.
-        labels_dict = {
-            'mfc': {},
-            'Tc': {},
-            'Pressure': {},
-            'Vorgabe': {},
-            'FlowMeter': {},
-            'ExtInput': {},
-            'ExtOutput': {},
-            'Modbus_Pump': {},
-            'analytic': {}
-        }
-        index_counters = {key: 0 for key in labels_dict}
-
-        # --- Verarbeitung der Modbus-Konfiguration ---
-        for control_name, control_rule in self.modbus_obj.config.items():
-            device_type = control_rule.get("type")
-            if device_type == "mfc":
-                idx = index_counters['mfc']
-                # Ersetze Unterstriche im Namen durch Leerzeichen für eine bessere Anzeige
-                display_text = control_name.replace("_", " ")
-                if control_rule.get("Box") == 1:
-                    parent_var = self.frames['mfc']
-                    options = {'grid_opts': {'column': 1, 'row': idx + 1, 'ipadx': 7, 'ipady': 7, 'padx': 5, 'pady': 5}}
-                else:
-                    parent_var = self.window
-                    options = {'x': control_rule.get("x") + 25, 'y': control_rule.get("y") + 45}
-                
-                # Erstes Label: Anzeigen des (formatierten) control_name
-                labels_dict['mfc'][idx] = self._create_label(
-                    parent=parent_var,
-                    text=display_text,
-                    font_size=18,
-                    **options
-                )
-                
-                # Zweites Label: Anzeige des Werts "0" plus Einheit aus DeviceInfo
-                if control_rule.get("Box") == 1:
-                    parent_var = self.frames['mfc']
-                    options = {'grid_opts': {'column': 4, 'row': idx + 1, 'ipadx': 7, 'ipady': 7, 'padx': 20}}
-                else:
-                    parent_var = self.window
-                    options = {'x': control_rule.get("x") + 25, 'y': control_rule.get("y") + 45}
-                labels_dict['mfc'][idx] = self._create_label(
-                    parent=parent_var,
-                    text="0 " + control_rule["DeviceInfo"].get("unit"),
-                    font_size=18,
-                    **options
-                )
-                
-                # Drittes Label: Anzeige der Einheit (Standard 'mV' falls nicht vorhanden)
-                if control_rule.get("Box") == 1:
-                    parent_var = self.frames['mfc']
-                    options = {'grid_opts': {'column': 3, 'row': idx + 1, 'ipadx': 1, 'ipady': 7, 'padx': 20}}
-                else:
-                    parent_var = self.window
-                    options = {'x': control_rule.get("x") + 50, 'y': control_rule.get("y")}
-                self._create_label(
-                    parent=parent_var,
-                    text=control_rule["DeviceInfo"].get("unit", 'mV'),
-                    font_size=18,
-                    **options
-                )
-                index_counters['mfc'] += 1
-
-        # --- Verarbeitung der tfh-Konfiguration (externe Geräte) ---
-        for control_name, control_rule in tfh_obj.config.items():
-            device_type = control_rule.get("type")
-            if device_type == "mfc" and "modbus" not in control_rule.get("input_device", "").lower():
-                idx = index_counters['mfc']
-                # Erstes Label: Standard '0 mV'
-                labels_dict['mfc'][idx] = self._create_label(
-                    parent=self.window,
-                    text='0 mV',
-                    font_size=18,
-                    x=control_rule.get("x") + 25,
-                    y=control_rule.get("y") + 45,
-                )
-                # Zweites Label: Anzeige der Einheit
-                self._create_label(
-                    parent=self.window,
-                    text=control_rule["DeviceInfo"].get("unit", 'mV'),
-                    font_size=18,
-                    x=control_rule.get("x") + 50,
-                    y=control_rule.get("y")
-                )
-                index_counters['mfc'] += 1
-
-            elif device_type == "thermocouple":
-                idx = index_counters['Tc']
-                labels_dict['Tc'][idx] = self._create_label(
-                    parent=self.window,
-                    text='0 °C',
-                    font_size=18,
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y")
-                )
-                index_counters['Tc'] += 1
-
-            elif device_type == "pressure":
-                idx = index_counters['Pressure']
-                labels_dict['Pressure'][idx] = self._create_label(
-                    parent=self.window,
-                    text='0 bar',
-                    font_size=18,
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y")
-                )
-                index_counters['Pressure'] += 1
-            
-            elif device_type == "analytic":
-                idx = index_counters['analytic']
-                labels_dict['analytic'][idx] = self._create_label(
-                    parent=self.window,
-                    text='0',
-                    font_size=18,
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y")
-                )
-                index_counters['analytic'] += 1
-
-            elif device_type == "FlowMeter":
-                idx = index_counters['FlowMeter']
-                labels_dict['FlowMeter'][idx] = self._create_label(
-                    parent=self.window,
-                    text='0 kg/h',
-                    font_size=18,
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y")
-                )
-                index_counters['FlowMeter'] += 1
-
-            elif device_type == "Vorgabe":
-                idx = index_counters['Vorgabe']
-                labels_dict['Vorgabe'][idx] = self._create_label(
-                    parent=self.window,
-                    text=control_rule["DeviceInfo"].get("unit", ''),
-                    font_size=18,
-                    x=control_rule.get("x") + 55,
-                    y=control_rule.get("y")
-                )
-                index_counters['Vorgabe'] += 1
-
-            elif device_type == "Modbus_Pump":
-                idx = index_counters['Modbus_Pump']
-                labels_dict['Modbus_Pump'][idx] = self._create_label(
-                    parent=self.window,
-                    text=control_rule["DeviceInfo"].get("unit", ''),
-                    font_size=18,
-                    x=control_rule.get("x") + 55,
-                    y=control_rule.get("y")
-                )
-                index_counters['Modbus_Pump'] += 1
-
-            elif device_type == "ExtInput":
-                idx = index_counters['ExtInput']
-                labels_dict['ExtInput'][idx] = self._create_label(
-                    parent=self.window,
-                    text='0 mA',
-                    font_size=18,
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y")
-                )
-                # Zusätzliches Label für Leistung (Watt)
-                labels_dict['ExtInput'][idx + 1] = self._create_label(
-                    parent=self.window,
-                    text='0 Watt',
-                    font_size=18,
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y") + 40,
-                    bg_color='white'
-                )
-                index_counters['ExtInput'] += 2
+        rows = self._modbus_rows()
+        for source, control_name, control_rule in self._device_configs():
+            self._create_device_labels(source, control_name, control_rule, rows.get(control_name))
+        self._index_devices()
+        labels_dict = self.labels
 
         # Timer-Label (nur wenn Excel-Funktion aktiviert)
         if self.config['TKINTER'].get('has_excel_function', False):
@@ -473,6 +3604,8 @@ class TKH:
                 font_size=18,
                 grid_opts={'column': 2, 'row': 0, 'ipadx': 2, 'ipady': 2, 'padx': 10, 'pady': 10},
             )
+            # Fortschrittsanzeige für das Laden des Ablaufs (nur während des Ladens sichtbar)
+            labels_dict['ExcelProgress'] = self.ui.CTkProgressBar(self.frames['control'])
         
         self.labels = labels_dict
 
@@ -484,20 +3617,11 @@ class TKH:
         Neben den Ventilen (Switches) werden auch Buttons für das Setzen von Werten,
         Excel-Funktionen, Dateiauswahl und das Schließen des Programms erstellt.
         """
-        buttons_dict = {}
-
-        # Ventile: Ersetze "_" im Namen durch Leerzeichen
-        for control_name, control_rule in tfh_obj.config.items():
-            if control_rule.get("type") == "valve":
-                display_text = control_name.replace("_", " ")
-                buttons_dict[control_name] = ctk.CTkSwitch(
-                    self.window,
-                    text=display_text,
-                    font=('Arial', 16),
-                    bg_color=self.config['TKINTER'].get('background-color', '#FFFFFF')
-                )
-                buttons_dict[control_name].place(x=control_rule.get('x'), y=control_rule.get('y'))
-                
+        # Ventile (siehe _create_device_switch)
+        for source, control_name, control_rule in self._device_configs():
+            self._create_device_switch(source, control_name, control_rule)
+        self._index_devices()
+        buttons_dict = self.buttons
 
         # "Set Values"-Button
         buttons_dict['Set'] = self._create_button(
@@ -538,7 +3662,7 @@ class TKH:
         
         # Speichern und Dateiauswahl (falls aktiviert)
         if self.config['TKINTER'].get('has_save_function', False):
-            buttons_dict['Save'] = ctk.CTkSwitch(
+            buttons_dict['Save'] = self.ui.CTkSwitch(
                 self.frames.get('control', self.window),
                 text="Speichern",
                 font=('Arial', 16)
@@ -556,11 +3680,13 @@ class TKH:
 
         # Schließen-Button (falls aktiviert)
         if self.config['TKINTER'].get('has_close_button', False):
-            close_img = ctk.CTkImage(Image.open(self.config['Close']['name']), size=(80, 80))
-            buttons_dict['Exit'] = ctk.CTkButton(
+            close_img = None
+            if not self.headless:
+                close_img = self._load_image(self.config['Close']['name'], (80, 80))
+            buttons_dict['Exit'] = self.ui.CTkButton(
                 master=self.window,
                 text="",
-                command=self.window.destroy,
+                command=self.close,
                 fg_color='transparent',
                 bg_color='white',
                 hover_color='#F2F2F2',
@@ -575,230 +3701,652 @@ class TKH:
         """
         Erstellt Eingabefelder für verschiedene Gerätetypen (mfc, Vorgabe, Modbus_Pump).
         
-        Die Positionierung erfolgt über .grid() oder .place() basierend auf der Konfiguration.
+        Die Positionierung erfolgt über .grid() oder .place() basierend auf der Konfiguration
+        (siehe _create_device_entries).
         """
-        entries_dict = {
-            'mfc': {},
-            'Vorgabe': {},
-            'ExtOutput': {},
-            'Modbus_Pump': {}
-        }
-        i_MFC, i_V, i_MP = 0, 0, 0
-        index_counters = {key: 0 for key in entries_dict}
+        rows = self._modbus_rows()
+        for source, control_name, control_rule in self._device_configs():
+            self._create_device_entries(source, control_name, control_rule, rows.get(control_name))
+        self._index_devices()
+
+        # Speichere Standard-Dateipfade für Save/Excel-Funktion
+        self.entries['SaveFile'] = "../Daten/test.dat"
+        self.entries['ExcelFile'] = "../Excel.xlsx"
+
+    def setup_controller(self, tfh_obj):
+        """
+        Richtet Controller basierend auf der Konfiguration ein.
+        
+        Für jeden Controller wird neben dem Regelungsobjekt auch ein Eingabefeld (Entry)
+        und ein Label zur Anzeige des Ausgangswerts erstellt (siehe _create_device_controller).
+        """
+        for source, control_name, control_rule in self._device_configs():
+            self._create_device_controller(source, control_name, control_rule)
+        self._index_devices()
 
-        # Erzeuge Eingabefelder für mfc-Geräte aus der Modbus-Konfiguration
+    # --- Widgets und Controller je Gerät ---
+    def _device_configs(self):
+        """Alle Geräte als (Quelle, Name, Konfiguration): erst Modbus, dann tfh (Reihenfolge der Indizes)."""
         for control_name, control_rule in self.modbus_obj.config.items():
-            if control_rule.get("type") == "mfc":
-                parent_var, options = (
-                    (self.frames['mfc'], {'grid_opts': {'column': 2, 'row': i_MFC + 1, 'ipadx': 7, 'ipady': 7, 'padx': 2}})
-                    if control_rule.get("Box") == 1
-                    else (self.window, {'x': control_rule.get("x") + 25, 'y': control_rule.get("y") + 45})
-                )
-                entries_dict['mfc'][i_MFC] = self._create_entry(
-                    parent=parent_var,
-                    default_text="0",
-                    font=('Arial', 18),
-                    width=40,
-                    fg_color='light blue',
-                    **options
-                )
-                entries_dict['mfc'][i_MFC].deviceName = control_name
-                i_MFC += 1
-            if control_rule.get("type") == "ExtOutput":
-                ic = index_counters['ExtOutput']
-                parent_var, options = (
-                    (self.frames['mfc'], {'grid_opts': {'column': 2, 'row': ic + 1, 'ipadx': 7, 'ipady': 7, 'padx': 2}})
-                    if control_rule.get("Box") == 1
-                    else (self.window, {'x': control_rule.get("x") + 25, 'y': control_rule.get("y") + 45})
-                )
-                entries_dict['ExtOutput'][ic] = self._create_entry(
-                    parent=parent_var,
-                    default_text="0",
-                    font=('Arial', 18),
-                    width=40,
-                    fg_color='light blue',
-                    **options
-                )
-                entries_dict['ExtOutput'][ic].deviceName = control_name
-                index_counters['ExtOutput'] += 1
+            yield 'modbus', control_name, control_rule
+        for control_name, control_rule in self.tfh_obj.config.items():
+            yield 'tfh', control_name, control_rule
+
+    def _modbus_rows(self):
+        """Zeile im mfc-Frame für Modbus-mfc und ExtOutput (Zähler je Typ, wie bei 'Box': 1 verwendet)."""
+        rows = {}
+        counters = {'mfc': 0, 'ExtOutput': 0}
+        for control_name, control_rule in self.modbus_obj.config.items():
+            device_type = control_rule.get("type")
+            if device_type in counters:
+                rows[control_name] = counters[device_type]
+                counters[device_type] += 1
+        return rows
+
+    def _device_record(self, control_name):
+        record = self.device_widgets.get(control_name)
+        if record is None:
+            record = self.device_widgets[control_name] = DeviceWidgets()
+        return record
+
+    def _index_devices(self):
+        """
+        Baut self.labels, self.entries, self.buttons (Ventile), self.controller und self.registry
+        aus den Widgets je Gerät (self.device_widgets) in der Reihenfolge der Konfiguration neu auf.
+        Die Indizes entsprechen damit den Zählern in set_data(), compile_plan() usw.
+        """
+        labels = {kind: {} for kind in DEVICE_LABEL_KINDS}
+        entries = {kind: {} for kind in DEVICE_ENTRY_KINDS}
+        controllers = {'easy_PI': {}, 'direct_Heat': {}}
+        switches = {}
+        self.registry = {}
+        for _, control_name, _ in self._device_configs():
+            record = self.device_widgets.get(control_name)
+            if record is None:
+                continue
+            for kind, label in record.labels:
+                labels[kind][len(labels[kind])] = label
+            for kind, entry in record.entries:
+                index = len(entries[kind])
+                entries[kind][index] = entry
+                self._register(control_name, kind, index, entry)
+            if record.switch is not None:
+                switches[control_name] = record.switch
+                self._register(control_name, 'valve', None, record.switch)
+            if record.controller is not None:
+                kind, ctrl = record.controller
+                index = len(controllers[kind])
+                controllers[kind][index] = ctrl
+                self._register(control_name, kind, index, ctrl.entry, ctrl)
+
+        self.labels = {**labels, **{key: value for key, value in self.labels.items() if key not in labels}}
+        self.entries = {**entries, **{key: value for key, value in self.entries.items() if key not in entries}}
+        self.buttons = {**switches, **{key: value for key, value in self.buttons.items()
+                                       if key not in self._switch_names}}
+        self._switch_names = set(switches)
+        self.controller = controllers
+
+    def _create_device_labels(self, source, control_name, control_rule, row=None):
+        record = self._device_record(control_name)
+        ui = self._device_ui(control_name)
+        device_type = control_rule.get("type")
+
+        def label(text, x=None, y=None, **options):
+            return self._create_label(parent=self.window, ui=ui, text=text, font_size=18, x=x, y=y, **options)
+
+        if source == 'modbus':
+            if device_type == "mfc":
+                x, y = control_rule.get("x"), control_rule.get("y")
+                if control_rule.get("Box") == 1:
+                    parent_var = self.frames['mfc']
+                    name_opts = {'grid_opts': {'column': 1, 'row': row + 1, 'ipadx': 7, 'ipady': 7, 'padx': 5, 'pady': 5}}
+                    value_opts = {'grid_opts': {'column': 4, 'row': row + 1, 'ipadx': 7, 'ipady': 7, 'padx': 20}}
+                    unit_opts = {'grid_opts': {'column': 3, 'row': row + 1, 'ipadx': 1, 'ipady': 7, 'padx': 20}}
+                else:
+                    parent_var = self.window
+                    name_opts = value_opts = {'x': x + 25, 'y': y + 45}
+                    unit_opts = {'x': x + 50, 'y': y}
+                # Erstes Label: Anzeigen des control_name (Unterstriche als Leerzeichen)
+                record.static.append(self._create_label(parent=parent_var, ui=ui, text=control_name.replace("_", " "),
+                                                        font_size=18, **name_opts))
+                # Zweites Label: Anzeige des Werts "0" plus Einheit aus DeviceInfo
+                record.labels.append(('mfc', self._create_label(
+                    parent=parent_var, ui=ui, text="0 " + control_rule["DeviceInfo"].get("unit"),
+                    font_size=18, **value_opts)))
+                # Drittes Label: Anzeige der Einheit (Standard 'mV' falls nicht vorhanden)
+                record.static.append(self._create_label(parent=parent_var, ui=ui,
+                                                        text=control_rule["DeviceInfo"].get("unit", 'mV'),
+                                                        font_size=18, **unit_opts))
+            return
+
+        x, y = control_rule.get("x"), control_rule.get("y")
+        if device_type == "mfc" and "modbus" not in control_rule.get("input_device", "").lower():
+            # Erstes Label: Standard '0 mV', zweites Label: Anzeige der Einheit
+            record.labels.append(('mfc', label('0 mV', x + 25, y + 45)))
+            record.static.append(label(control_rule["DeviceInfo"].get("unit", 'mV'), x + 50, y))
+        elif device_type == "thermocouple":
+            record.labels.append(('Tc', label('0 °C', x, y)))
+        elif device_type == "pressure":
+            record.labels.append(('Pressure', label('0 bar', x, y)))
+        elif device_type == "analytic":
+            record.labels.append(('analytic', label('0', x, y)))
+        elif device_type == "FlowMeter":
+            record.labels.append(('FlowMeter', label('0 kg/h', x, y)))
+        elif device_type in ("Vorgabe", "Modbus_Pump"):
+            record.labels.append((device_type, label(control_rule["DeviceInfo"].get("unit", ''), x + 55, y)))
+        elif device_type == "ExtInput":
+            record.labels.append(('ExtInput', label('0 mA', x, y)))
+            # Zusätzliches Label für Leistung (Watt)
+            record.labels.append(('ExtInput', label('0 Watt', x, y + 40, bg_color='white')))
+
+    def _create_device_entries(self, source, control_name, control_rule, row=None):
+        record = self._device_record(control_name)
+        device_type = control_rule.get("type")
+        if source == 'modbus':
+            if device_type not in ("mfc", "ExtOutput"):
+                return
+            parent_var, options = (
+                (self.frames['mfc'], {'grid_opts': {'column': 2, 'row': row + 1, 'ipadx': 7, 'ipady': 7, 'padx': 2}})
+                if control_rule.get("Box") == 1
+                else (self.window, {'x': control_rule.get("x") + 25, 'y': control_rule.get("y") + 45})
+            )
+        elif device_type in ("Vorgabe", "Modbus_Pump") or (
+                device_type == "mfc" and "modbus" not in control_rule.get("input_device", "").lower()):
+            parent_var, options = self.window, {'x': control_rule.get("x"), 'y': control_rule.get("y")}
+        else:
+            return
+        entry = self._create_entry(
+            parent=parent_var,
+            ui=self._device_ui(control_name),
+            default_text="0",
+            font=('Arial', 18),
+            width=40,
+            fg_color='light blue',
+            **options
+        )
+        entry.deviceName = control_name
+        record.entries.append((device_type, entry))
+
+    def _create_device_switch(self, source, control_name, control_rule):
+        if source != 'tfh' or control_rule.get("type") != "valve":
+            return
+        # Ventile: Ersetze "_" im Namen durch Leerzeichen
+        switch = self._device_ui(control_name).CTkSwitch(
+            self.window,
+            text=control_name.replace("_", " "),
+            font=('Arial', 16),
+            bg_color=self.config['TKINTER'].get('background-color', '#FFFFFF')
+        )
+        switch.place(x=control_rule.get('x'), y=control_rule.get('y'))
+        self._device_record(control_name).switch = switch
+
+    def _create_device_controller(self, source, control_name, control_rule, ctrl=None):
+        """
+        Legt den Controller eines easy_PI/direct_Heat-Eintrags mit Eingabefeld und Label an.
+        Mit ctrl wird ein bestehender Controller (samt Regelzustand) nur mit neuen Widgets versehen.
+        """
+        device_type = control_rule.get("type")
+        if source != 'tfh' or device_type not in ("easy_PI", "direct_Heat"):
+            return
+        if ctrl is None:
+            ctrl = self._new_controller(control_name, control_rule)
+        ui = self._device_ui(control_name)
+        # Eingabefeld für den Soll- bzw. Vorgabewert
+        ctrl.entry = ui.CTkEntry(
+            self.window,
+            font=('Arial', 16),
+            width=50,
+            fg_color='light blue'
+        )
+        ctrl.entry.place(x=control_rule.get("x"), y=control_rule.get("y"))
+        # Label zur Anzeige des Ausgangswerts
+        ctrl.label = ui.CTkLabel(
+            self.window,
+            font=('Arial', 18),
+            text='0 %',
+            bg_color='white'
+        )
+        ctrl.label.place(x=control_rule.get("x"), y=control_rule.get("y") + 35)
+        self._device_record(control_name).controller = (device_type, ctrl)
+
+    def _new_controller(self, control_name, control_rule):
+        regler = lazy_import('utilities.regler')
+        out_device = control_rule.get("output_device")
+        out_channel = control_rule.get("output_channel")
+        if control_rule.get("type") == "direct_Heat":
+            # Keine Regelung sondern direkte Vorgabe der %-tualen Heizleistung
+            return regler.DirectHeatController(control_name)
+
+        P_val = control_rule["DeviceInfo"].get("P_Value")
+        I_val = control_rule["DeviceInfo"].get("I_Value")
+        # Wähle den Eingang: extern oder über ein anderes Gerät
+        if "extern" in control_rule.get("input_device", "").lower():
+            ctrl = regler.easy_PI(out_device, out_channel, "extern", 0, I_val, P_val)
+        else:
+            in_device = self.tfh_obj.config[control_rule.get("input_device")].get("input_device")
+            ctrl = regler.easy_PI(out_device, out_channel, self.tfh_obj.inputs[in_device], 0, I_val, P_val)
+        # Speichere den control_name als Attribut
+        ctrl.deviceName = control_name
+        return ctrl
+
+    # --- Konfiguration im laufenden Betrieb neu laden ---
+    def _copy_device_config(self):
+        return json.loads(json.dumps({'modbus': self.modbus_obj.config, 'tfh': self.tfh_obj.config}))
 
-        # Erzeuge weitere Eingabefelder anhand der tfh-Konfiguration
-        for control_name, control_rule in tfh_obj.config.items():
+    @staticmethod
+    def _driven_outputs(tfh_config):
+        """Dauerhaft beschriebene Ausgänge (Ventile, Controller) mit ihrem sicheren Wert."""
+        outputs = {}
+        for control_rule in tfh_config.values():
             device_type = control_rule.get("type")
-            if device_type == "mfc" and "modbus" not in control_rule.get("input_device", "").lower():
-                entries_dict['mfc'][i_MFC] = self._create_entry(
-                    parent=self.window,
-                    default_text="0",
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y"),
-                    font=('Arial', 18),
-                    width=40,
-                    fg_color='light blue'
-                )
-                entries_dict['mfc'][i_MFC].deviceName = control_name
-                i_MFC += 1
-            elif device_type == "Vorgabe":
-                entries_dict['Vorgabe'][i_V] = self._create_entry(
-                    parent=self.window,
-                    default_text="0",
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y"),
-                    font=('Arial', 18),
-                    width=40,
-                    fg_color='light blue'
-                )
-                entries_dict['Vorgabe'][i_V].deviceName = control_name
-                i_V += 1
-            elif device_type == "Modbus_Pump":
-                entries_dict['Modbus_Pump'][i_MP] = self._create_entry(
-                    parent=self.window,
-                    default_text="0",
-                    x=control_rule.get("x"),
-                    y=control_rule.get("y"),
-                    font=('Arial', 18),
-                    width=40,
-                    fg_color='light blue'
-                )
-                entries_dict['Vorgabe'][i_MP].deviceName = control_name
-                i_MP += 1
+            if device_type in ("valve", "easy_PI", "direct_Heat"):
+                safe = False if device_type == "valve" else (
+                    4 * 1000.0 if control_rule.get("output_type") == "analog_mA" else 0.0)
+                outputs[(control_rule.get("output_device"), control_rule.get("output_channel"))] = safe
+        return outputs
 
-        # Speichere Standard-Dateipfade für Save/Excel-Funktion
-        entries_dict['SaveFile'] = "../Daten/test.dat"
-        entries_dict['ExcelFile'] = "../Excel.xlsx"
-        self.entries = entries_dict
+    def _release_outputs(self, outputs):
+        for (output_device_uid, channel), safe in outputs.items():
+            output_device = self.tfh_obj.outputs.get(output_device_uid)
+            if output_device is not None:
+                output_device.values[channel] = safe
 
-    # --- Controller (z. B. easy_PI) einrichten ---
-    def setup_controller(self, tfh_obj):
+    def _controller_key(self, control_rule, tfh_config):
+        """Alles, was beim Anlegen eines Controllers fest eingebaut wird (Typ, Ein- und Ausgang)."""
+        input_device = control_rule.get("input_device")
+        source = tfh_config.get(input_device) if isinstance(input_device, str) else None
+        return (control_rule.get("type"), input_device, source.get("input_device") if isinstance(source, dict) else None,
+                control_rule.get("output_device"), control_rule.get("output_channel"))
+
+    @staticmethod
+    def _retune_controller(ctrl, control_rule):
+        """Übernimmt P- und I-Anteil in einen laufenden easy_PI; False, wenn der Regler sie nicht als Attribute führt."""
+        if not (hasattr(ctrl, 'P') and hasattr(ctrl, 'I')):
+            return False
+        ctrl.P = control_rule["DeviceInfo"].get("P_Value")
+        ctrl.I = control_rule["DeviceInfo"].get("I_Value")
+        return True
+
+    def _rebuild_device(self, source, control_name, control_rule, row=None, ctrl=None, keep_state=True):
+        """Baut die Widgets eines Geräts neu auf; Eingaben, Schalterstellung und ctrl bleiben erhalten."""
+        record = self.device_widgets.pop(control_name, None)
+        state = None
+        if record is not None:
+            state = record.save_state() if keep_state else None
+            record.destroy()
+        self._create_device_entries(source, control_name, control_rule, row)
+        self._create_device_labels(source, control_name, control_rule, row)
+        self._create_device_switch(source, control_name, control_rule)
+        self._create_device_controller(source, control_name, control_rule, ctrl)
+        if state is not None and control_name in self.device_widgets:
+            self.device_widgets[control_name].restore_state(state)
+
+    def reload_config(self, json_name=None, tfh_config=None, modbus_config=None):
         """
-        Richtet Controller basierend auf der Konfiguration ein.
-        
-        Für jeden Controller wird neben dem Regelungsobjekt auch ein Eingabefeld (Entry)
-        und ein Label zur Anzeige des Ausgangswerts erstellt.
+        Übernimmt eine geänderte Konfiguration, ohne das Fenster neu aufzubauen.
+
+        Neue Gerätekonfigurationen werden als tfh_config/modbus_config übergeben oder vorher in
+        tfh_obj.config/modbus_obj.config geändert; json_name lädt eine andere TKINTER-Datei
+        (ohne Angabe die beim Start verwendete). Die alte und die neue Konfiguration werden
+        verglichen und nur die betroffenen Geräte angepasst:
+          - entfernte Geräte: Widgets löschen, Ventile und Controller-Ausgänge auf 0 setzen
+          - neue Geräte: Widgets und Controller anlegen
+          - verschobene Geräte (x, y, Box, Seite, Einheit): nur die Widgets neu aufbauen;
+            Eingaben, Schalterstellung und der Controller samt Integrator bleiben erhalten
+          - geänderte Kalibrierung bzw. P/I-Werte: nur Ausführungsplan bzw. Regler anpassen
+        Ein Controller wird nur neu angelegt, wenn sich Typ, Ein- oder Ausgang ändern.
+        Eine laufende Logdatei wird weitergeschrieben; ändern sich die Spalten oder Log-Optionen,
+        wird ein neuer Spaltenkopf angehängt (binäre Logs: neue Datei mit Zeitstempel).
+        TKINTER-Optionen außerhalb von TKINTER_RELOADABLE, Frames und Bilder werden nur gemeldet.
+
+        :return: Dictionary mit den Listen 'added', 'removed', 'rebuilt', 'updated' und 'restart'.
+        :raises ConfigError: bei ungültiger Konfiguration; es wird dann nichts geändert.
         """
-        controllers_dict = {'easy_PI': {},'direct_Heat': {}}
-        i_PI = 0
-        i_directHeat = 0
+        old_devices = self._device_config
+        old_rows = self._modbus_rows()
+        old_columns = self.log_columns()
+        new_tfh = self.tfh_obj.config if tfh_config is None else tfh_config
+        new_modbus = self.modbus_obj.config if modbus_config is None else modbus_config
+        self.tfh_obj.config, self.modbus_obj.config = new_tfh, new_modbus
+        try:
+            new_config = self.load_config(self.json_name if json_name is None else json_name)
+            if not new_config:
+                raise ConfigError(["Konfiguration konnte nicht geladen werden"])
+        except ConfigError:
+            self.tfh_obj.config, self.modbus_obj.config = old_devices['tfh'], old_devices['modbus']
+            raise
+        if json_name is not None:
+            self.json_name = json_name
 
-        for control_name, control_rule in tfh_obj.config.items():
-            if control_rule.get("type") == "direct_Heat": # Keine Regelung sondern direkte Vorgabe der %-tualen Heizleistung
-                
-                out_device = control_rule.get("output_device")
-                out_channel = control_rule.get("output_channel")
-                # Speichere den control_name als Attribut
-                controllers_dict['direct_Heat'][i_directHeat] = DirectHeatController(control_name)
-                # Erzeuge Eingabefeld für den Vorgabewert
-                controllers_dict['direct_Heat'][i_directHeat].entry = ctk.CTkEntry(
-                    self.window,
-                    font=('Arial', 16),
-                    width=50,
-                    fg_color='light blue'
-                )
-                controllers_dict['direct_Heat'][i_directHeat].entry.place(x=control_rule.get("x"), y=control_rule.get("y"))
-                
-                # Erzeuge Label zur Anzeige des Ausgangswerts
-                controllers_dict['direct_Heat'][i_directHeat].label = ctk.CTkLabel(
-                    self.window,
-                    font=('Arial', 18),
-                    text='0 %',
-                    bg_color='white'
-                )
-                controllers_dict['direct_Heat'][i_directHeat].label.place(x=control_rule.get("x"), y=control_rule.get("y") + 35)
+        # TKINTER-Optionen: live übernehmbare setzen, alle übrigen Änderungen nur melden
+        old_tk, new_tk = self.config['TKINTER'], new_config['TKINTER']
+        changed_options = {key for key in set(old_tk) | set(new_tk) if old_tk.get(key) != new_tk.get(key)}
+        restart = sorted(f"TKINTER.{key}" for key in changed_options if key not in TKINTER_RELOADABLE)
+        restart += sorted(key for key in set(self.config) | set(new_config)
+                          if key != 'TKINTER' and self.config.get(key) != new_config.get(key))
+        tk_config = dict(old_tk)
+        for key in changed_options & set(TKINTER_RELOADABLE):
+            if key in new_tk:
+                tk_config[key] = new_tk[key]
+            else:
+                tk_config.pop(key, None)
+        self.config = dict(self.config, TKINTER=tk_config)
 
-                i_directHeat += 1
+        # Geräte vergleichen
+        old_pages = self.device_pages
+        if self.virtual is not None:
+            self.device_pages = self.assign_pages()
+        new_rows = self._modbus_rows()
+        old_all = {name: ('modbus', rule) for name, rule in old_devices['modbus'].items()}
+        old_all.update((name, ('tfh', rule)) for name, rule in old_devices['tfh'].items())
+        report = {'added': [], 'removed': [], 'rebuilt': [], 'updated': [], 'restart': restart}
 
+        for name in old_all:
+            if name not in new_modbus and name not in new_tfh:
+                self.device_widgets.pop(name, DeviceWidgets()).destroy()
+                report['removed'].append(name)
 
+        for source, name, rule in self._device_configs():
+            if name not in old_all or old_all[name][0] != source:
+                if name in old_all:
+                    self.device_widgets.pop(name, DeviceWidgets()).destroy()
+                self._rebuild_device(source, name, rule, new_rows.get(name))
+                report['added'].append(name)
+                continue
+            old_rule = old_all[name][1]
+            if old_rule == rule and old_pages.get(name) == self.device_pages.get(name):
+                continue
+            record = self.device_widgets.get(name)
+            ctrl = record.controller[1] if record is not None and record.controller is not None else None
+            if ctrl is not None and self._controller_key(old_rule, old_devices['tfh']) != self._controller_key(rule, new_tfh):
+                ctrl = None
+            elif ctrl is not None and rule.get("type") == "easy_PI" and old_rule.get("DeviceInfo") != rule.get("DeviceInfo"):
+                if not self._retune_controller(ctrl, rule):
+                    print(f"{name}: P/I-Werte nicht übertragbar, Regler wird neu angelegt")
+                    ctrl = None
+            layout = (any(old_rule.get(field) != rule.get(field) for field in ('x', 'y', 'Box', 'type', 'input_device'))
+                      or old_rule.get("DeviceInfo", {}).get("unit") != rule.get("DeviceInfo", {}).get("unit")
+                      or old_rows.get(name) != new_rows.get(name)
+                      or old_pages.get(name) != self.device_pages.get(name))
+            if layout or (record is not None and record.controller is not None and ctrl is None):
+                self._rebuild_device(source, name, rule, new_rows.get(name), ctrl,
+                                     keep_state=old_rule.get("type") == rule.get("type"))
+                report['rebuilt'].append(name)
+            else:
+                report['updated'].append(name)
 
-            if control_rule.get("type") == "easy_PI":
-                out_device = control_rule.get("output_device")
-                out_channel = control_rule.get("output_channel")
-                P_val = control_rule["DeviceInfo"].get("P_Value")
-                I_val = control_rule["DeviceInfo"].get("I_Value")
+        # Modbus-Geräte in der mfc-Box rücken nach, wenn sich die Zeilen verschieben
+        for name, row in new_rows.items():
+            if old_rows.get(name, row) != row and name not in report['rebuilt'] + report['added']:
+                record = self.device_widgets.get(name)
+                self._rebuild_device('modbus', name, new_modbus[name], row,
+                                     record.controller[1] if record is not None and record.controller else None)
+                report['rebuilt'].append(name)
 
-                # Wähle den Eingang: extern oder über ein anderes Gerät
-                if "extern" in control_rule.get("input_device", "").lower():
-                    controllers_dict['easy_PI'][i_PI] = easy_PI(out_device, out_channel, "extern", 0, I_val, P_val)
-                else:
-                    in_device = tfh_obj.config[control_rule.get("input_device")].get("input_device")
-                    controllers_dict['easy_PI'][i_PI] = easy_PI(out_device, out_channel, tfh_obj.inputs[in_device], 0, I_val, P_val)
-                
-                # Speichere den control_name als Attribut
-                controllers_dict['easy_PI'][i_PI].deviceName = control_name
-                # Erzeuge Eingabefeld für den Sollwert
-                controllers_dict['easy_PI'][i_PI].entry = ctk.CTkEntry(
-                    self.window,
-                    font=('Arial', 16),
-                    width=50,
-                    fg_color='light blue'
-                )
-                controllers_dict['easy_PI'][i_PI].entry.place(x=control_rule.get("x"), y=control_rule.get("y"))
+        self._index_devices()
+        if self.virtual is not None:
+            if 'PagePrev' not in self.buttons:
+                self.create_page_controls()
+            self.show_page(min(self.virtual.current, max(self.virtual.page_count() - 1, 0)))
 
-                # Erzeuge Label zur Anzeige des Ausgangswerts
-                controllers_dict['easy_PI'][i_PI].label = ctk.CTkLabel(
-                    self.window,
-                    font=('Arial', 18),
-                    text='0 %',
-                    bg_color='white'
-                )
-                controllers_dict['easy_PI'][i_PI].label.place(x=control_rule.get("x"), y=control_rule.get("y") + 35)
+        # Ausführungsplan und Log-Layout neu übersetzen, ohne dass die Erfassung dazwischen loggt
+        with self._log_lock:
+            self.compile_plan()
+            self.log_state = None
+            if self.history is not None:
+                self._compile_history()
+            if self.acquisition is not None:
+                self.acquisition.set_sources(self.sources, self._source_keys())
+        released = {key: safe for key, safe in self._driven_outputs(old_devices['tfh']).items()
+                    if key not in self._driven_outputs(new_tfh)}
+        if released:
+            self._control_call(self._release_outputs, released)
 
-                i_PI += 1
+        if self.acquisition is not None:
+            log_rates = [tk_config.get('log_rate', 1.0)]
+            log_rates += [group.get('rate', log_rates[0]) for group in tk_config.get('log_groups', {}).values()]
+            self.acquisition.period = 1.0 / max([tk_config.get('acquisition_rate', 20)] + log_rates)
+        if self.control_thread is not None:
+            self.control_thread.period = 1.0 / tk_config.get('control_rate', 20)
+            self.control_thread.watchdog_timeout = tk_config.get('watchdog_timeout', 0.5)
+        for task in self.scheduler.tasks:
+            if task.name in ('control', 'display'):
+                task.period = tk_config.get(f'{task.name}_period', 50) / 1000
+            elif task.name == 'logging':
+                task.period = tk_config.get('log_period', 50) / 1000
 
-        self.controller = controllers_dict
+        # Laufende Logdatei weiterführen
+        log_changed = old_columns != self.log_columns() or any(
+            old_tk.get(key) != tk_config.get(key) for key in _LOG_OPTIONS)
+        if self.data_logger is not None and log_changed:
+            rotating = tk_config.get('log_rotate_bytes') or tk_config.get('log_rotate_interval')
+            # Rotierte Logs beginnen ohnehin ein neues Segment mit eigenem Header
+            if tk_config.get('log_format', 'dat') == 'bin' and not rotating and os.path.exists(self._binary_log_path()):
+                stem, extension = os.path.splitext(self.entries['SaveFile'])
+                self.entries['SaveFile'] = f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+                print(f"Logspalten geändert, binäres Log wird in '{self._binary_log_path()}' fortgesetzt")
+            self.open_log(device_informations=False)
+
+        self._device_config = self._copy_device_config()
+        if restart:
+            print("Erst nach einem Neustart wirksam: " + ", ".join(restart))
+        return report
 
     # --- Werte in Datei speichern ---
     def save_values(self):
         """
-        Schreibt aktuelle Werte der Geräte in eine Logdatei.
+        Schreibt sofort eine Zeile mit den aktuellen Werten der Geräte in die Logdatei.
         
         Beim ersten Aufruf wird ein Header mit Geräteinformationen und Spaltenüberschriften geschrieben.
-        Danach wird in regelmäßigen Abständen (alle ca. 1 Sekunde) eine Zeile mit Zeitstempel
-        und den Mess-/Eingabewerten angehängt.
+        Das regelmäßige Logging mit 'log_rate' übernimmt dagegen _on_sample() im Takt der Erfassung.
+
+        Mit 'log_format': 'bin' im TKINTER-Block wird statt der .dat-Textdatei ein BinaryLog
+        (gleicher Dateiname mit Endung .bin) geschrieben.
         """
         if self.write_header:
-            write_device_informations(self, self.tfh_obj)
-            header_comment = "### Device Names"
-            header_columns = ["Zeitpunkt"]
-            
-            for control_name, control_rule in self.modbus_obj.config.items():  
-                device_type = control_rule.get("type")
-                if device_type == "mfc":
-                    header_columns.extend([f"{control_name}_Soll", f"{control_name}_Ist"])
-                else:
-                    header_columns.append(control_name)
+            self.open_log()
+        timestamp, data_columns = self.log_row()
+        with self._log_lock:
+            if self.data_logger is not None:
+                self.data_logger.write(timestamp, data_columns)
 
-            for control_name, control_rule in self.tfh_obj.config.items():
-                device_type = control_rule.get("type")
-                if device_type == "mfc":
-                    header_columns.extend([f"{control_name}_Soll", f"{control_name}_Ist"])
-                elif device_type == "easy_PI":
-                    header_columns.extend([f"{control_name}_Soll", f"{control_name}_Output"])
-                elif device_type == "direct_Heat":
-                    header_columns.extend([f"{control_name}_Soll", f"{control_name}_Output"])
-                else:
-                    header_columns.append(control_name)
-            with open(self.entries['SaveFile'], 'a') as f:
-                f.write(header_comment + "\n" + "\t".join(header_columns) + "\n")
-            self.write_header = False
+    def open_log(self, device_informations=True):
+        """
+        Öffnet die Logdatei(en) für self.entries['SaveFile'] und schreibt die Header.
 
-        i_MFC, i_PI, i_V, i_MP,i_directHeat = 0, 0, 0, 0, 0
-        data_columns = [datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')]
-        
-           
-            
-        for control_name, control_rule in self.modbus_obj.config.items():            
+        Rate und Kanalgruppen kommen aus 'log_rate' und 'log_groups' im TKINTER-Block.
+        Mit device_informations=False wird in einer laufenden .dat-Datei nur ein neuer
+        Spaltenkopf angehängt (reload_config).
+
+        Mit 'log_rotate_bytes' (Größe) und/oder 'log_rotate_interval' (Sekunden, auf der Wanduhr
+        ausgerichtet) wird in Segmente <Name>_0001.dat, <Name>_0002.dat, ... geschrieben, die
+        jeweils mit den Geräteinformationen und dem Spaltenkopf beginnen. Abgeschlossene
+        Segmente werden im Hintergrund nach 'log_compress' ('gzip' Standard, 'lzma', 'none')
+        komprimiert.
+        """
+        self.close_log()
+        tk_config = self.config['TKINTER']
+        binary = tk_config.get('log_format', 'dat') == 'bin'
+        rotating = bool(tk_config.get('log_rotate_bytes') or tk_config.get('log_rotate_interval'))
+        preamble = ''
+        if binary:
+            path = self._binary_log_path()
+        else:
+            if rotating:
+                preamble = self._device_informations_text()
+            elif device_informations:
+                lazy_import('utilities.data_functions').write_device_informations(self, self.tfh_obj)
+            path = self.entries['SaveFile']
+        logger = DataLogger(
+            path,
+            self.log_columns(),
+            rate=tk_config.get('log_rate', 1.0),
+            groups=tk_config.get('log_groups'),
+            binary=binary,
+            metadata=self._log_metadata() if binary else None,
+            writer_options={
+                'fsync': tk_config.get('log_fsync', False),
+                'rotate_bytes': tk_config.get('log_rotate_bytes'),
+                'rotate_interval': tk_config.get('log_rotate_interval'),
+            },
+            preamble=preamble,
+            compress=tk_config.get('log_compress', 'gzip'),
+        )
+        with self._log_lock:
+            self.data_logger = logger
+        self.write_header = False
+
+    def _device_informations_text(self):
+        """
+        Geräteinformationen von write_device_informations() als Text (für den Header jedes Segments).
+
+        write_device_informations() schreibt immer nach entries['SaveFile']; es erhält daher eine
+        _SaveFileView mit einer temporären Datei, self.entries bleibt unverändert.
+        """
+        tempfile = lazy_import('tempfile')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "device_informations.dat")
+            lazy_import('utilities.data_functions').write_device_informations(_SaveFileView(self, path), self.tfh_obj)
+            if not os.path.exists(path):
+                return ''
+            with open(path, 'r') as f:
+                return f.read()
+
+    def close_log(self):
+        """Schreibt alle ausstehenden Logzeilen und schließt die aktuellen Logdateien."""
+        with self._log_lock:
+            logger, self.data_logger = self.data_logger, None
+        if logger is not None:
+            logger.close()
+
+    def _on_sample(self, timestamp, values):
+        """Listener der Erfassung: loggt mit der konfigurierten Rate, solange Speichern aktiv ist."""
+        if not self.logging_enabled:
+            return
+        state = self.log_state
+        start = time.perf_counter()
+        with self._log_lock:
+            if self.data_logger is not None and state is not None:
+                self.data_logger.sample(timestamp, lambda: self.compose_log_row(values, state))
+        self.profiler.record('logging.write', time.perf_counter() - start)
+
+    def update_logging(self):
+        """
+        Übernimmt im GUI-Takt den Zustand des Save-Schalters und die aktuellen Sollwerte
+        (self.log_state), aus denen die Erfassung ihre Logzeilen zusammensetzt.
+        """
+        start = time.perf_counter()
+        saving = self.buttons['Save'].get() == 1 if 'Save' in self.buttons else False
+        if saving and self.write_header:
+            self.open_log()
+        self.log_state = self.read_log_state()
+        self.logging_enabled = saving
+        # Ohne Erfassungs-Thread wird im GUI-Takt geloggt
+        if saving and self.acquisition is None:
+            timestamp, values = self.get_snapshot()
+            with self._log_lock:
+                if self.data_logger is not None:
+                    self.data_logger.sample(timestamp, lambda: self.compose_log_row(values, self.log_state))
+        self.report_log_errors()
+        self.profiler.record('logging.state', time.perf_counter() - start)
+
+    def report_log_errors(self):
+        """
+        Zeigt Fehler der Schreib-Threads mit show_error an. Kann eine Logdatei nicht mehr
+        geschrieben werden, wird Speichern beendet; erneutes Einschalten öffnet sie neu.
+        """
+        logger = self.data_logger
+        if logger is None:
+            return
+        problems = logger.poll_errors()
+        if not problems:
+            return
+        self.show_error("Logfehler", "\n".join(message for message, _ in problems))
+        if any(stopped for _, stopped in problems):
+            self.close_log()
+            self.write_header = True
+            self.logging_enabled = False
+            if 'Save' in self.buttons:
+                self.buttons['Save'].deselect()
+
+    def log_columns(self):
+        """Spaltenüberschriften der Logdatei (erste Spalte ist der Zeitstempel)."""
+        header_columns = ["Zeitpunkt"]
+
+        for control_name, control_rule in self.modbus_obj.config.items():
+            device_type = control_rule.get("type")
+            if device_type == "mfc":
+                header_columns.extend([f"{control_name}_Soll", f"{control_name}_Ist"])
+            else:
+                header_columns.append(control_name)
+
+        for control_name, control_rule in self.tfh_obj.config.items():
+            device_type = control_rule.get("type")
+            if device_type == "mfc":
+                header_columns.extend([f"{control_name}_Soll", f"{control_name}_Ist"])
+            elif device_type == "easy_PI":
+                header_columns.extend([f"{control_name}_Soll", f"{control_name}_Output"])
+            elif device_type == "direct_Heat":
+                header_columns.extend([f"{control_name}_Soll", f"{control_name}_Output"])
+            else:
+                header_columns.append(control_name)
+        return header_columns
+
+    def _log_metadata(self):
+        """Zusatzinformationen für den Header binärer Logdateien (Gerätekonfigurationen)."""
+        return {
+            'name': self.config['TKINTER'].get('Name', ''),
+            'devices': {
+                control_name: {'type': control_rule.get('type'), 'DeviceInfo': control_rule.get('DeviceInfo', {})}
+                for config in (self.modbus_obj.config, self.tfh_obj.config)
+                for control_name, control_rule in config.items()
+            },
+        }
+
+    def _binary_log_path(self):
+        return os.path.splitext(self.entries['SaveFile'])[0] + BinaryLog.EXTENSION
+
+    def compile_log_layout(self):
+        """
+        Legt fest, woher jede Logspalte ihren Wert bezieht (in der Reihenfolge von log_columns()).
+
+        Messwerte stammen aus einem Slot des Erfassungs-Snapshots, Soll- und Ausgangswerte aus
+        self.log_state, das read_log_state() im GUI-Thread aus Eingabefeldern und Controllern liest.
+        Einträge in self.log_layout: (LOG_SLOT, Slot), (LOG_STATE, Index) oder (LOG_CONST, Wert).
+
+        Mit 'log_units': 'converted' im TKINTER-Block werden Messwerte mit eigenem Kanal in
+        self.channels umgerechnet geloggt (LOG_CHANNEL, Kanal), sonst als Rohwerte wie bisher.
+        """
+        layout = []
+        readers = []
+        slots = self.source_slots
+        channels = self.channels if self.config['TKINTER'].get('log_units', 'raw') == 'converted' else {}
+
+        def state(reader):
+            layout.append((LOG_STATE, len(readers)))
+            readers.append(reader)
+
+        def measured(key, control_name):
+            if control_name in channels:
+                layout.append((LOG_CHANNEL, channels[control_name]))
+            elif key in slots:
+                layout.append((LOG_SLOT, slots[key]))
+            else:
+                layout.append((LOG_CONST, None))
+
+        i_MFC, i_PI, i_V, i_MP, i_directHeat = 0, 0, 0, 0, 0
+
+        for control_name, control_rule in self.modbus_obj.config.items():
             if control_rule.get("type") == "mfc":
-                if self.modbus_obj.operation_mode != 1:  
-                    mfc_value = self.entries['mfc'][i_MFC].get()
+                if self.modbus_obj.operation_mode != 1:
+                    state(self.entries['mfc'][i_MFC].get)
                     if self.tfh_obj.operation_mode != 1:
-                        input_val = self.modbus_obj.devices[control_name].flow
+                        measured(('modbus', control_name), control_name)
                     else:
-                        input_val = 0.0
-                    data_columns.extend([str(mfc_value), str(input_val)])
+                        layout.append((LOG_CONST, 0.0))
                     i_MFC += 1
             elif control_rule.get("type") == "ExtOutput":
-                entry_id = self.getID("ExtOutput", control_name)
-                output_value = self.entries['ExtOutput'][entry_id].get()
-                data_columns.append(str(output_value))
+                state(self.registry[control_name].widget.get)
 
         for control_name, control_rule in self.tfh_obj.config.items():
             device_type = control_rule.get("type")
@@ -808,58 +4356,117 @@ class TKH:
             output_channel = control_rule.get("output_channel")
 
             if device_type in ("thermocouple", "pressure", "FlowMeter", "ExtInput", "analytic"):
-                input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
-                data_columns.append(str(input_val))
+                measured(('tfh', input_device_uid, input_channel), control_name)
             elif device_type == "valve":
-                output_val = int(self.tfh_obj.outputs[output_device_uid].values[output_channel])
-                data_columns.append(str(output_val))
+                output_device = self.tfh_obj.outputs[output_device_uid]
+                state(lambda output_device=output_device, channel=output_channel: int(output_device.values[channel]))
             elif device_type == "Vorgabe":
-                vorgabe_value = self.entries['Vorgabe'][i_V].get()
-                data_columns.append(str(vorgabe_value))
+                state(self.entries['Vorgabe'][i_V].get)
                 i_V += 1
             elif device_type == "Modbus_Pump":
-                vorgabe_value = self.entries['Modbus_Pump'][i_MP].get()
-                data_columns.append(str(vorgabe_value))
+                state(self.entries['Modbus_Pump'][i_MP].get)
                 i_MP += 1
             elif device_type == "mfc":
-                mfc_value = self.entries['mfc'][i_MFC].get()
+                if "modbus" in control_rule.get("input_device", "").lower():
+                    # Kein eigenes Eingabefeld (siehe create_entries), Spalten bleiben leer
+                    layout.extend([(LOG_CONST, None), (LOG_CONST, None)])
+                    continue
+                state(self.entries['mfc'][i_MFC].get)
                 if self.tfh_obj.operation_mode != 1:
-                    input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
+                    measured(('tfh', input_device_uid, input_channel), control_name)
                 else:
-                    input_val = 0.0
-                data_columns.extend([str(mfc_value), str(input_val)])
+                    layout.append((LOG_CONST, 0.0))
                 i_MFC += 1
-            elif device_type == "easy_PI":
-                output_percent = self.controller['easy_PI'][i_PI].out * 100
-                setpoint_value = self.controller['easy_PI'][i_PI].soll
-                data_columns.extend([str(setpoint_value), str(output_percent)])
-                i_PI += 1
-            elif device_type == "direct_Heat":
-                output_percent = self.controller['direct_Heat'][i_directHeat].out * 100
-                setpoint_value = self.controller['direct_Heat'][i_directHeat].soll
-                data_columns.extend([str(setpoint_value), str(output_percent)])
-                i_directHeat += 1
+            elif device_type in ("easy_PI", "direct_Heat"):
+                i_ctrl = i_PI if device_type == "easy_PI" else i_directHeat
+                ctrl = self.controller[device_type][i_ctrl]
+                state(lambda ctrl=ctrl: ctrl.soll)
+                state(lambda ctrl=ctrl: ctrl.out * 100)
+                if device_type == "easy_PI":
+                    i_PI += 1
+                else:
+                    i_directHeat += 1
+
+        self.log_layout = layout
+        self.log_state_readers = readers
+        self._log_converted = any(source == LOG_CHANNEL for source, _ in layout)
+        return layout
 
-        with open(self.entries['SaveFile'], 'a') as f:
-            f.write("\t".join(data_columns) + "\n")
+    def read_log_state(self):
+        """Liest Soll- und Ausgangswerte für das Logging (nur im GUI-Thread aufrufen)."""
+        return tuple(reader() for reader in self.log_state_readers)
+
+    def compose_log_row(self, values, state):
+        """Setzt eine Logzeile aus Snapshot-Werten und log_state gemäß self.log_layout zusammen."""
+        row = []
+        converted = self.calibration.convert(values) if self._log_converted else None
+        for source, index in self.log_layout:
+            if source == LOG_SLOT:
+                row.append(values[index])
+            elif source == LOG_STATE:
+                row.append(state[index])
+            elif source == LOG_CHANNEL:
+                row.append(converted[index])
+            else:
+                row.append(index)
+        return row
+
+    def log_row(self):
+        """
+        Erfasst eine Zeile der Logdatei aus dem aktuellen Snapshot und den aktuellen Sollwerten.
+
+        :return: (Zeitstempel der Erfassung in Sekunden seit Epoch, Liste der Werte in Spaltenreihenfolge ohne Zeitstempel)
+        """
+        timestamp, values = self.get_snapshot()
+        return timestamp, self.compose_log_row(values, self.read_log_state())
 
     # --- Excel-Funktionen ---
     def start_excel(self):
         """
         Startet den Excel-Modus:
-         - Lädt die Excel-Datei
-         - Setzt den Startpunkt und initialisiert den Timer
+         - Lädt die Excel-Datei im Hintergrund (mit Fortschrittsanzeige und Cache)
+         - Setzt danach den Startpunkt und initialisiert den Timer
          - Deaktiviert den Start-Button und aktiviert den Save-Switch
         """
-        self.excel_data = openpyxl.load_workbook(self.entries['ExcelFile'], data_only=True)
+        if self.recipe_loader is not None:
+            return  # Es wird bereits ein Ablauf geladen
+        self.buttons['StartExcel'].configure(state="disabled")
+        self.recipe_loader = RecipeLoader(self.entries['ExcelFile'], self.config['TKINTER'].get('cache_dir'))
+        self.recipe_loader.start()
+        self.labels['ExcelProgress'].set(0)
+        self.labels['ExcelProgress'].grid(column=0, columnspan=3, row=5, padx=20, pady=10, sticky="EW")
+        self.window.after(100, self._poll_recipe_loader)
+
+    def _poll_recipe_loader(self):
+        """Aktualisiert die Fortschrittsanzeige und startet den Ablauf, sobald er geladen ist."""
+        loader = self.recipe_loader
+        if loader.is_alive():
+            self.labels['ExcelProgress'].set(loader.progress)
+            self.window.after(100, self._poll_recipe_loader)
+            return
+        self.recipe_loader = None
+        self.labels['ExcelProgress'].grid_forget()
+        if loader.error is not None:
+            self.show_error("Excelfehler", f"Excel-Datei konnte nicht geladen werden:\n{loader.error}")
+            self.buttons['StartExcel'].configure(state="normal")
+            return
+        self.run_recipe(loader.recipe)
+
+    def run_recipe(self, recipe):
+        """Startet einen bereits kompilierten Ablauf."""
+        self.recipe = recipe
+        if self.recipe.run_time is None:
+            self.show_error("Excelfehler", "Laufzeit nicht in Excelsheet!")
+            self.buttons['StartExcel'].configure(state="normal")
+            return
+        if len(self.recipe) == 0:
+            self.show_error("Excelfehler", "Keine Abschnitte im Excelsheet!")
+            self.buttons['StartExcel'].configure(state="normal")
+            return
         self.running_excel = 1
-        self.section = 4  # Start in Zeile 4
-        self.t0 = time.time()
-        self.sheet = self.excel_data["Ablauf"]
-        tmp = self.sheet[1][1]
-        if tmp.value is None:
-            messagebox.showerror("Excelfehler", "Laufzeit nicht in Excelsheet!")
-        self.run_time = tmp.value * 60 + self.t0
+        self.section = self.recipe.first_row  # Start in Zeile 4
+        self.t0 = self.clock()  # Beginn des gesamten Ablaufs
+        self.run_time = self.recipe.run_time * 60 + self.t0
         self.buttons['Save'].select()
         self.buttons['StartExcel'].configure(state="disabled")
         print("Start")
@@ -871,7 +4478,7 @@ class TKH:
         self.running_excel = 0
         self.buttons['StartExcel'].configure(state="enabled")
         self.buttons['Save'].deselect()
-        self.labels["Timer"].configure(text="0.00 min")
+        self.renderer.set(self.labels["Timer"], "0.00 min")
         print("Stop")
 
     # --- Werte an die Geräte senden ---
@@ -938,28 +4545,39 @@ class TKH:
             if device_type == "easy_PI":
                 if controller['easy_PI'][i_PI].entry.get() != '':
                     value = float(controller['easy_PI'][i_PI].entry.get())
-                    if not controller['easy_PI'][i_PI].running:
-                        controller['easy_PI'][i_PI].start(value)
-                    else:
-                        controller['easy_PI'][i_PI].set_soll(value)
+                    self._control_call(self._apply_setpoint, controller['easy_PI'][i_PI], value)
                 i_PI += 1
 
             if device_type == "direct_Heat":
                 if controller['direct_Heat'][i_directHeat].entry.get() != '':
                     value = float(controller['direct_Heat'][i_directHeat].entry.get())
-                    if not controller['direct_Heat'][i_directHeat].running:
-                        controller['direct_Heat'][i_directHeat].start(value)
-                    else:
-                        controller['direct_Heat'][i_directHeat].set_soll(value)
+                    self._control_call(self._apply_setpoint, controller['direct_Heat'][i_directHeat], value)
                 i_directHeat += 1
 
+    def _control_call(self, func, *args):
+        """Führt func(*args) im Regel-Thread aus (bzw. sofort, wenn die Regelung in der GUI läuft)."""
+        if self.control_thread is not None:
+            self.control_thread.submit(func, *args)
+        else:
+            func(*args)
+
+    @staticmethod
+    def _apply_setpoint(ctrl, value):
+        if not ctrl.running:
+            ctrl.start(value)
+        else:
+            ctrl.set_soll(value)
+
     # --- Dateiauswahlfunktionen ---
     def get_file(self):
         """
         Öffnet einen Dialog zur Dateiauswahl für den Speicherpfad und aktualisiert den entsprechenden Eintrag.
         """
-        file_path = asksaveasfilename(defaultextension=".dat", initialdir="./Daten/")
+        file_path = lazy_import('tkinter.filedialog').asksaveasfilename(defaultextension=".dat", initialdir="./Daten/")
         if file_path:
+            # Aktuelle Datei sauber abschließen; die neue Datei erhält einen eigenen Header
+            self.close_log()
+            self.write_header = True
             self.entries['SaveFile'] = file_path
             parent_folder = os.path.basename(os.path.dirname(file_path))
             file_name = os.path.basename(file_path)
@@ -971,7 +4589,7 @@ class TKH:
         """
         Öffnet einen Dialog zur Auswahl einer Excel-Datei und aktualisiert den entsprechenden Eintrag.
         """
-        file_path = askopenfilename(defaultextension=".xlsx", initialdir="./")
+        file_path = lazy_import('tkinter.filedialog').askopenfilename(defaultextension=".xlsx", initialdir="./")
         if file_path:
             self.entries['ExcelFile'] = file_path
             parent_folder = os.path.basename(os.path.dirname(file_path))
@@ -980,197 +4598,579 @@ class TKH:
             if 'ExcelFile' in self.labels:
                 self.labels['ExcelFile'].configure(text=short_text)
 
+    def show_error(self, title, message):
+        """Zeigt eine Fehlermeldung an (im Headless-Modus nur auf der Konsole)."""
+        if self.headless:
+            print(f"{title}: {message}")
+        else:
+            lazy_import('tkinter.messagebox').showerror(title, message)
+
     # --- Hauptschleife ---
-    def run(self):
-        """Startet die Hauptschleife der GUI."""
-        self.window.mainloop()
+    def run(self, duration=None):
+        """
+        Startet die Hauptschleife der GUI.
+
+        Im Headless-Modus läuft stattdessen die Ereignisschleife von HeadlessWindow, optional
+        nur für duration Sekunden (z. B. für Benchmarks oder unbeaufsichtigte Abläufe).
+        """
+        if self.headless:
+            self.window.mainloop(duration)
+        else:
+            self.window.mainloop()
+
+    def close(self):
+        """Beendet die Erfassung, schreibt ausstehende Logzeilen und schließt das Fenster."""
+        self.scheduler.stop()
+        if self.control_thread is not None:
+            self.control_thread.stop()
+        if self.acquisition is not None:
+            self.acquisition.stop()
+        self.close_log()
+        self.window.destroy()
+
 
+    # --- Laufzeitdiagnose ---
+    def timing_stats(self):
+        """
+        Laufzeitstatistik der Schleife.
+
+        :return: {'phases': LoopProfiler.stats() in ms, 'scheduler': DeadlineScheduler.stats(),
+                  'acquisition': {'samples', 'errors'} oder None, 'control': ControlThread.stats() oder None}
+        """
+        acquisition = None
+        if self.acquisition is not None:
+            acquisition = {'samples': self.acquisition.samples, 'errors': self.acquisition.errors}
+        return {
+            'phases': self.profiler.stats(),
+            'scheduler': self.scheduler.stats(),
+            'acquisition': acquisition,
+            'control': self.control_thread.stats() if self.control_thread is not None else None,
+        }
+
+    # --- Trends ---
+    def create_trends(self):
+        """
+        Legt die Trenddarstellungen aus 'trends' im TKINTER-Block an, z. B.
+            "trends": {"Temperaturen": {"channels": ["T1", "T2"], "x": 20, "y": 400,
+                                        "width": 400, "height": 200, "window": 600,
+                                        "windows": [600, 3600, 86400]}}
+        Optional legen "y_min"/"y_max" die y-Achse fest (sonst automatisch). Für jeden Eintrag in
+        "windows" gibt es einen Button zum Umschalten des Zeitfensters (Sekunden).
+        Die Werte kommen aus self.history (siehe create_history).
+        """
+        trends = self.config['TKINTER'].get('trends', {})
+        for trend_name, trend in trends.items():
+            x, y = trend.get('x', 20), trend.get('y', 20)
+            width, height = trend.get('width', 400), trend.get('height', 200)
+            canvas = self.ui.CTkCanvas(self.window, width=width, height=height, bg='white', highlightthickness=0)
+            canvas.place(x=x, y=y)
+            y_range = (trend['y_min'], trend['y_max']) if 'y_min' in trend and 'y_max' in trend else None
+            plot = TrendPlot(canvas, trend['channels'], trend.get('window', 600), width, height, y_range)
+            self.trends[trend_name] = plot
+            for i, seconds in enumerate(trend.get('windows', [])):
+                self.buttons[f"Trend_{trend_name}_{seconds}"] = self._create_button(
+                    parent=self.window,
+                    text=_format_window(seconds),
+                    command=lambda plot=plot, seconds=seconds: self.set_trend_window(plot, seconds),
+                    x=x + i * 70, y=y + height + 5,
+                    width=60, fg_color='brown', text_color='white'
+                )
+
+    # --- Verlauf im Speicher ---
+    def create_history(self):
+        """
+        Legt self.history (ChannelHistory) an, wenn Kanäle dafür konfiguriert sind:
+        'history_channels' im TKINTER-Block ("all" oder eine Liste von Kanälen wie "T1",
+        "E1.power") sowie die Kanäle aller Trends. Gespeichert werden die umgerechneten Werte mit
+        'history_rate' Zeilen pro Sekunde über 'history_seconds' Sekunden; der Speicher dafür
+        wird beim Start vollständig angelegt (siehe startup_report).
+        Mit "all" gelten die Kanäle beim Start; reload_config() ergänzt keine neuen Kanäle.
+        """
+        tk_config = self.config['TKINTER']
+        history_channels = tk_config.get('history_channels') or []
+        names = list(self.channels) if history_channels == 'all' else list(history_channels)
+        names += [channel for trend in tk_config.get('trends', {}).values() for channel in trend['channels']]
+        names = list(dict.fromkeys(names))
+        if not names:
+            return
+        rate = tk_config.get('history_rate', 1.0)
+        self.history = ChannelHistory(names, tk_config.get('history_seconds', 86400) * rate + 1)
+        self._history_period = 1.0 / rate
+        self._history_due = 0.0
+        self._compile_history()
+
+    def _compile_history(self):
+        """Kanal in den umgerechneten Werten je Spalte von self.history (fehlende Kanäle: NaN)."""
+        self._history_columns = np.array(
+            [self.channels.get(name, len(self.calibration)) for name in self.history.names], dtype=np.intp
+        )
+
+    def _record_history(self, timestamp, values):
+        """Listener der Erfassung: schreibt mit 'history_rate' eine Zeile in self.history."""
+        if len(values) != len(self.sources):
+            return
+        newest = self.history.last_timestamp
+        if newest is not None and timestamp < newest:
+            # Zeit läuft zurück (LogReplay.seek): append() beginnt den Verlauf neu
+            self._history_due = timestamp
+        if timestamp < self._history_due:
+            return
+        self._history_due += self._history_period
+        if self._history_due <= timestamp:
+            self._history_due = timestamp + self._history_period
+        converted = np.append(self.calibration.convert_array(values), np.nan)
+        self.history.append(timestamp, converted[self._history_columns])
+
+    def set_trend_window(self, plot, seconds):
+        """Schaltet das Zeitfenster eines Trends um und zeichnet ihn neu."""
+        plot.set_window(seconds)
+        if plot.update(self.history):
+            plot.draw()
+
+    def update_trends(self):
+        """Überträgt neue Zeilen des Verlaufs in die Trends und zeichnet geänderte neu."""
+        start = time.perf_counter()
+        for plot in self.trends.values():
+            if plot.update(self.history):
+                plot.draw()
+        self.profiler.record('display.trends', time.perf_counter() - start)
+
+    def toggle_diagnostics(self):
+        """Blendet die Diagnose-Anzeige (Laufzeiten je Phase/Gerät) ein bzw. aus."""
+        if self.diagnostics is None:
+            self.diagnostics = self.ui.CTkLabel(
+                self.window,
+                font=('Courier', 12),
+                text='',
+                justify='left',
+                anchor='nw',
+                bg_color='white'
+            )
+            self.diagnostics.place(relx=1.0, x=-10, y=10, anchor='ne')
+            self.update_diagnostics()
+        else:
+            self.diagnostics.destroy()
+            self.diagnostics = None
+
+    def update_diagnostics(self):
+        if self.diagnostics is not None:
+            report = self.scheduler.report()
+            if self.control_thread is not None:
+                report += "\n" + self.control_thread.report()
+            self.diagnostics.configure(text=report + "\n\n" + self.profiler.report(top=15))
 
     def getID(self, ctrl_type, device_name):
         """
-        Sucht in self.controller nach einem Controller des Typs ctrl_type,
+        Sucht in self.registry nach einem Controller bzw. Eingabefeld des Typs ctrl_type,
         dessen deviceName dem übergebenen device_name entspricht.
         Gibt den Index zurück oder None, falls nicht gefunden.
         """
-        
-        if ctrl_type == "easy_PI":
-            for idx, controller in self.controller.get(ctrl_type, {}).items():
-                if controller.deviceName == device_name:
-                    return idx
-        if ctrl_type == "direct_Heat":
-            for idx, controller in self.controller.get(ctrl_type, {}).items():
-                if controller.deviceName == device_name:
-                    return idx
-        if ctrl_type == "mfc" or ctrl_type == "ExtOutput":
-            for idx, entry in self.entries.get(ctrl_type, {}).items():
-                if entry.deviceName == device_name:
-                    return idx
+        entry = self.registry.get(device_name)
+        if entry is not None and entry.kind == ctrl_type:
+            return entry.index
         return None
 
-
-    def start_loop(self):
+    # --- Ausführungsplan für start_loop ---
+    def compile_plan(self):
         """
-        Aktualisiert periodisch die GUI:
-          - Verarbeitet Excel-Daten, falls der Excel-Modus aktiv ist.
-          - Aktualisiert Labels und Controller anhand der Sensordaten.
-          - Ruft save_values() periodisch auf.
-          - Plant den nächsten Aufruf in 50ms.
+        Übersetzt modbus_obj.config und tfh_obj.config einmalig in einen flachen Ausführungsplan.
+
+        Jeder Eintrag ist ein Handler, an den Widget, Gerät, Kanal, Gradient und Offset
+        bereits gebunden sind. Die Aufgaben des Schedulers führen die Handler nur noch der Reihe
+        nach aus, statt in jedem Tick die Konfiguration erneut zu durchlaufen:
+          - self.display_plan : Anzeige der Messwerte, step(converted) mit den umgerechneten Werten
+          - self.control_plan : Controller (easy_PI, direct_Heat), step(); standardmäßig ein
+                                einziger Schritt von self.controller_bank (mit 'profile_devices'
+                                einzelne Handler je Controller)
+          - self.output_plan  : Ventilausgänge, step()
+        Mit 'profile_devices' wird jeder Handler einzeln im LoopProfiler gemessen.
+
+        Alle Gerätezugriffe zum Lesen werden dabei als Quellen in self.sources gesammelt
+        (ein Slot je Gerät/Kanal). Die Handler lesen ihre Werte nur noch aus dem Snapshot
+        dieser Quellen, den die Erfassung (AcquisitionThread) bereitstellt.
+        Gradient, Offset und Skalierung je Kanal sammelt self.calibration (SensorCalibration),
+        self.channels ordnet jedem Gerätenamen seinen Kanal zu (ExtInput zusätzlich '<Name>.power').
+        Muss erneut aufgerufen werden, wenn sich Konfiguration oder Widgets ändern.
         """
-        i_MFC, i_Tc, i_PI, i_p,i_a, i_exI, i_FI,i_directHeat = 0, 0, 0, 0, 0, 0, 0, 0
-        
-        # Excel-Modus: Aktualisiere Timer und Eingaben aus Excel
-        if self.running_excel == 1:
-            entries = self.entries
-            controller = self.controller
-            self.t_end = self.run_time - time.time()
-            output, self.section, self.t_section, self.t0 = Excel_timing(self.sheet, self.section, self.t0)
-            self.labels['Timer'].configure(text=f"{self.t_end/60:.2f} min")
-            for control_name, control_rule in self.modbus_obj.config.items():
-                # Aktualisiere den Controller und die mfc-Eingaben
-                if control_rule.get("type") == "easy_PI":
-                    controller_id = self.getID("easy_PI", control_name)
-                    controller['easy_PI'][controller_id].entry.delete(0, tk.END)
-                    controller['easy_PI'][controller_id].entry.insert(0, f"{output[control_name]:.2f}")
-               
-                elif control_rule.get("type") == "mfc":
-                    mfc_id = self.getID("mfc", control_name)
-                    entries['mfc'][mfc_id].delete(0, tk.END)
-                    entries['mfc'][mfc_id].insert(0, f"{output[control_name]:.2f}")
-                elif control_rule.get("type") == "ExtOutput":
-                    entry_id = self.getID("ExtOutput", control_name)
-                    entries['ExtOutput'][entry_id].delete(0, tk.END)
-                    entries['ExtOutput'][entry_id].insert(0, f"{output[control_name]:.2f}")
-                    
-            
-            for control_name, control_rule in self.tfh_obj.config.items():
-                # Aktualisiere den Controller und die mfc-Eingaben
-                if control_rule.get("type") == "easy_PI":
-                    controller_id = self.getID("easy_PI", control_name)
-                    controller['easy_PI'][controller_id].entry.delete(0, tk.END)
-                    controller['easy_PI'][controller_id].entry.insert(0, f"{output[control_name]:.2f}")
-                elif control_rule.get("type") == "direct_Heat":
-                    controller_id = self.getID("direct_Heat", control_name)
-                    controller['direct_Heat'][controller_id].entry.delete(0, tk.END)
-                    controller['direct_Heat'][controller_id].entry.insert(0, f"{output[control_name]:.2f}")
-                elif control_rule.get("type") == "mfc":
-                    mfc_id = self.getID("mfc", control_name)
-                    entries['mfc'][mfc_id].delete(0, tk.END)
-                    entries['mfc'][mfc_id].insert(0, f"{output[control_name]:.2f}")
-                elif control_rule.get("type") == "valve":
-                    if output[control_name] == 1:
-                        self.buttons[control_name].select() 
-                    else:
-                        self.buttons[control_name].deselect() 
-                                    
-            self.set_data()
-                
-            if self.t_end < 0:
-                self.stop_excel()
-        
-        # Aktualisiere die Labels basierend auf den aktuellen Sensordaten
+        display_plan = []
+        control_plan = []
+        output_plan = []
+        profile_devices = self.profiler.enabled and self.config['TKINTER'].get('profile_devices', False)
+
+        def add(plan, control_name, step):
+            if profile_devices:
+                step = self.profiler.timed(f"device.{control_name}", step)
+            plan.append(step)
+
+        self.sources = []
+        self.source_slots = {}
+        # Im ControlThread laufen die Controller immer gesammelt, die Anzeige übernimmt display_plan
+        threaded_control = self.config['TKINTER'].get('control_thread', False)
+        use_bank = threaded_control or not profile_devices
+        self.controller_bank = ControllerBank(
+            None if threaded_control else self.renderer.set, self.controller['direct_Heat'].get(0)
+        )
+        self.valves = []
+        self.calibration = calibration = SensorCalibration()
+        self.channels = channels = {}
+
+        def channel(name, slot, **params):
+            channels[name] = calibration.add(name, slot, **params)
+            return channels[name]
+
+        i_MFC, i_Tc, i_PI, i_p, i_a, i_exI, i_FI, i_directHeat = 0, 0, 0, 0, 0, 0, 0, 0
+
         for control_name, control_rule in self.modbus_obj.config.items():
-            unit = control_rule["DeviceInfo"].get("unit")
-            
             if control_rule.get("type") == "mfc":
-                if self.modbus_obj.operation_mode != 1:                    
-                    value = self.modbus_obj.devices[control_name].flow
-                if value is not None:
-                    text = f"{round(value, 0)} {unit}"
-                else:
-                    text = "Error"  # oder ein anderer Platzhalter/Text
-                self.labels['mfc'][i_MFC].configure(text=text)
+                if self.modbus_obj.operation_mode != 1:
+                    add(display_plan, control_name, self._plan_input(
+                        channel(control_name, self._modbus_source(control_name)),
+                        self.labels['mfc'][i_MFC],
+                        control_rule["DeviceInfo"].get("unit"),
+                        digits=0
+                    ))
                 i_MFC += 1
 
-
+        tfh_active = self.tfh_obj.operation_mode != 1
         for control_name, control_rule in self.tfh_obj.config.items():
+            device_type = control_rule.get("type")
+            device_info = control_rule.get("DeviceInfo", {})
             input_channel = control_rule.get("input_channel")
             input_device_uid = control_rule.get("input_device")
             output_channel = control_rule.get("output_channel")
             output_device_uid = control_rule.get("output_device")
-            gradient = control_rule["DeviceInfo"].get("gradient")
-            y_axis = control_rule["DeviceInfo"].get("y-axis")
-            unit = control_rule["DeviceInfo"].get("unit")
-            device_type = control_rule.get("type")
-            
+            gradient = device_info.get("gradient")
+            y_axis = device_info.get("y-axis")
+            unit = device_info.get("unit")
+
             if device_type == "thermocouple":
-                input_val = self.tfh_obj.inputs[input_device_uid].values[0]
-                self.labels['Tc'][i_Tc].configure(text=f"{round(input_val, 2)} {unit}")
+                add(display_plan, control_name, self._plan_input(
+                    channel(control_name, self._tfh_source(input_device_uid, 0)), self.labels['Tc'][i_Tc], unit
+                ))
                 i_Tc += 1
 
             elif device_type == "pressure":
-                if self.tfh_obj.operation_mode != 1:
-                    input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
-                    converted_value = ((input_val/1e6 - y_axis) * gradient)
-                    converted_value = input_val
-                    self.labels['Pressure'][i_p].configure(text=f"{round(converted_value, 2)} {unit}")
+                if tfh_active:
+                    add(display_plan, control_name, self._plan_input(
+                        channel(control_name, self._tfh_source(input_device_uid, input_channel)),
+                        self.labels['Pressure'][i_p], unit
+                    ))
                 i_p += 1
 
             elif device_type == "analytic":
-                if self.tfh_obj.operation_mode != 1:
-                    input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
-                    converted_value = ((input_val/1e6 - y_axis) * gradient)
-                    converted_value = input_val
-                    #print(f"reading input on device {control_name} - {input_channel} {input_val}")
-                    self.labels['analytic'][i_a].configure(text=f"{round(converted_value, 2)} {unit}")
+                if tfh_active:
+                    add(display_plan, control_name, self._plan_input(
+                        channel(control_name, self._tfh_source(input_device_uid, input_channel)),
+                        self.labels['analytic'][i_a], unit
+                    ))
                 i_a += 1
 
             elif device_type == "FlowMeter":
-                if self.tfh_obj.operation_mode != 1:
-                    input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
-                    converted_value = 0 + (100 - 0) / (20 - 4) * (input_val/1e6 - 4)
-                    converted_value = max(converted_value, 0)
-                    self.labels['FlowMeter'][i_FI].configure(text=f"{round(converted_value, 2)} {unit}")
+                if tfh_active:
+                    # 4-20 mA (Rohwert in nA) auf 0-100
+                    add(display_plan, control_name, self._plan_input(
+                        channel(control_name, self._tfh_source(input_device_uid, input_channel),
+                                gradient=(100 - 0) / (20 - 4), offset=4, scale=1e6, lower=0),
+                        self.labels['FlowMeter'][i_FI], unit
+                    ))
                 i_FI += 1
 
             elif device_type == "mfc":
-                if self.tfh_obj.operation_mode != 1:
-                    input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
-                    converted_value = (input_val - y_axis) * gradient
-                    self.labels['mfc'][i_MFC].configure(text=f"{round(converted_value, 2)} {unit}")
+                # mfc mit Modbus-Eingang haben kein eigenes Label (siehe create_labels)
+                if "modbus" in control_rule.get("input_device", "").lower():
+                    continue
+                if tfh_active:
+                    add(display_plan, control_name, self._plan_input(
+                        channel(control_name, self._tfh_source(input_device_uid, input_channel),
+                                gradient=gradient, offset=y_axis),
+                        self.labels['mfc'][i_MFC], unit
+                    ))
                 i_MFC += 1
 
+            elif device_type == "easy_PI" and use_bank:
+                self.controller_bank.add(
+                    self.controller['easy_PI'][i_PI],
+                    self.tfh_obj.outputs[output_device_uid], output_channel,
+                    regulate=True,
+                    power=device_info.get('Power', False),
+                    analog_mA=control_rule.get("output_type") == "analog_mA",
+                    unit=unit
+                )
+                i_PI += 1
+
+            elif device_type == "direct_Heat" and use_bank:
+                self.controller_bank.add(
+                    self.controller['direct_Heat'][i_directHeat],
+                    self.tfh_obj.outputs[output_device_uid], output_channel,
+                    regulate=False,
+                    divisor=100,  # Vorgabe in Prozent
+                    power=device_info.get('Power', False),
+                    unit=unit
+                )
+                i_directHeat += 1
+
             elif device_type == "easy_PI":
-                
-                if  self.controller['direct_Heat'][0].out <= 0:
-                    self.controller['easy_PI'][i_PI].regeln()
-
-                value = self.controller['easy_PI'][i_PI].out
-                if control_rule["DeviceInfo"].get('Power', False):
-                    Power = control_rule["DeviceInfo"].get('Power')
-                    self.controller['easy_PI'][i_PI].label.configure(text=f"{value*Power:.2f} {unit}")
-                if control_rule.get("output_type") == "analog_mA":
-                    value = (4 + (20 - 4) * value) * 1000
-                self.tfh_obj.outputs[output_device_uid].values[output_channel] = value
+                add(control_plan, control_name, self._plan_easy_pi(
+                    self.controller['easy_PI'][i_PI],
+                    self.controller['direct_Heat'].get(0),
+                    self.tfh_obj.outputs[output_device_uid], output_channel,
+                    device_info.get('Power', False),
+                    control_rule.get("output_type") == "analog_mA",
+                    unit
+                ))
                 i_PI += 1
 
             elif device_type == "direct_Heat":
-                value = self.controller['direct_Heat'][i_directHeat].out/100 # Vorgabe in Prozent
-                if control_rule["DeviceInfo"].get('Power', False):
-                    Power = control_rule["DeviceInfo"].get('Power')
-                    self.controller['direct_Heat'][i_directHeat].label.configure(text=f"{value*Power:.2f} {unit}")
-                self.tfh_obj.outputs[output_device_uid].values[output_channel] = value
+                add(control_plan, control_name, self._plan_direct_heat(
+                    self.controller['direct_Heat'][i_directHeat],
+                    self.tfh_obj.outputs[output_device_uid], output_channel,
+                    device_info.get('Power', False),
+                    unit
+                ))
                 i_directHeat += 1
 
             elif device_type == "ExtInput":
-                input_val = self.tfh_obj.inputs[input_device_uid].values[input_channel]
-                self.labels['ExtInput'][i_exI].configure(text=f"{round(input_val / 1e6, 2)} mA")
-                i_exI += 1
-                if control_rule["DeviceInfo"].get('Power', False):
-                    converted_value = (input_val - y_axis) * gradient
-                    converted_value = max(converted_value, 0)
-                    self.labels['ExtInput'][i_exI].configure(text=f"{round(converted_value, 2)} {unit}")
-                i_exI += 1
+                slot = self._tfh_source(input_device_uid, input_channel)
+                power_channel = None
+                if device_info.get('Power', False):
+                    power_channel = channel(f"{control_name}.power", slot, gradient=gradient, offset=y_axis, lower=0)
+                add(display_plan, control_name, self._plan_ext_input(
+                    channel(control_name, slot, scale=1e6),
+                    power_channel,
+                    self.labels['ExtInput'][i_exI],
+                    self.labels['ExtInput'][i_exI + 1] if power_channel is not None else None,
+                    unit
+                ))
+                i_exI += 2
 
             elif device_type == "valve":
-                if self.buttons[control_name].get() == 1:
-                    self.tfh_obj.outputs[output_device_uid].values[output_channel] = True
-                else:
-                    self.tfh_obj.outputs[output_device_uid].values[output_channel] = False
+                self.valves.append((self.buttons[control_name], self.tfh_obj.outputs[output_device_uid], output_channel))
+                add(output_plan, control_name, self._plan_valve(*self.valves[-1]))
+
+        # Quellen für save_values registrieren, die nicht angezeigt werden
+        for control_name, control_rule in self.modbus_obj.config.items():
+            if control_rule.get("type") == "mfc" and self.modbus_obj.operation_mode != 1:
+                self._modbus_source(control_name)
+        for control_name, control_rule in self.tfh_obj.config.items():
+            if control_rule.get("type") in ("thermocouple", "pressure", "FlowMeter", "ExtInput", "analytic", "mfc"):
+                if control_rule.get("input_device") in self.tfh_obj.inputs:
+                    self._tfh_source(control_rule.get("input_device"), control_rule.get("input_channel"))
+
+        if len(self.controller_bank):
+            control_plan.append(self.controller_bank.step)
+            if threaded_control:
+                bank, render = self.controller_bank, self.renderer.set
+                display_plan.append(lambda converted: bank.render_labels(render))
+
+        self.display_plan = display_plan
+        self.control_plan = control_plan
+        self.output_plan = output_plan
+        self.converted = [float('nan')] * len(calibration)
+        self.compile_log_layout()
+        return display_plan, control_plan, output_plan
+
+    def _source_keys(self):
+        """Schlüssel der Quellen in Slot-Reihenfolge für die Einzelmessung der Erfassung (nur mit 'profile_devices')."""
+        if not self.config['TKINTER'].get('profile_devices', False):
+            return None
+        return sorted(self.source_slots, key=self.source_slots.get)
+
+    def _tfh_source(self, input_device_uid, channel):
+        """Registriert einen tfh-Eingangskanal als Quelle und gibt dessen Slot im Snapshot zurück."""
+        key = ('tfh', input_device_uid, channel)
+        if key not in self.source_slots:
+            input_device = self.tfh_obj.inputs[input_device_uid]
+            self.source_slots[key] = len(self.sources)
+            self.sources.append(lambda: input_device.values[channel])
+        return self.source_slots[key]
+
+    def _modbus_source(self, control_name):
+        """Registriert den Durchfluss eines Modbus-Geräts als Quelle und gibt dessen Slot zurück."""
+        key = ('modbus', control_name)
+        if key not in self.source_slots:
+            device = self.modbus_obj.devices[control_name]
+            self.source_slots[key] = len(self.sources)
+            self.sources.append(lambda: device.flow)
+        return self.source_slots[key]
+
+    def get_snapshot(self):
+        """
+        Liefert den aktuellen Snapshot aller Quellen als (Zeitstempel, Werte).
+
+        Bei laufender Erfassung wird nur der zuletzt veröffentlichte Snapshot zurückgegeben,
+        ohne ein Gerät anzusprechen. Ohne Erfassungs-Thread (oder vor dessen erstem Durchlauf)
+        werden die Quellen direkt gelesen.
+        """
+        snapshot = self.acquisition.latest() if self.acquisition is not None else None
+        if snapshot is None:
+            snapshot = (self.clock(), read_sources(self.sources)[0])
+        return snapshot
+
+    # --- Handler-Fabriken für den Ausführungsplan ---
+    def _plan_input(self, channel, label, unit, digits=2):
+        # Umgerechneter Wert eines Kanals (siehe SensorCalibration), NaN bei fehlendem Rohwert
+        render = self.renderer.set
+
+        def step(converted):
+            value = converted[channel]
+            if value != value:
+                render(label, "Error")
+                return
+            render(label, f"{round(value, digits)} {unit}")
+        return step
+
+    def _plan_easy_pi(self, controller, direct_heat, output_device, channel, power, analog_mA, unit):
+        render = self.renderer.set
+
+        def step():
+            if direct_heat is None or direct_heat.out <= 0:
+                controller.regeln()
+
+            value = controller.out
+            if power:
+                render(controller.label, f"{value*power:.2f} {unit}")
+            if analog_mA:
+                value = (4 + (20 - 4) * value) * 1000
+            output_device.values[channel] = value
+        return step
+
+    def _plan_direct_heat(self, controller, output_device, channel, power, unit):
+        render = self.renderer.set
+
+        def step():
+            value = controller.out/100 # Vorgabe in Prozent
+            if power:
+                render(controller.label, f"{value*power:.2f} {unit}")
+            output_device.values[channel] = value
+        return step
+
+    def _plan_ext_input(self, channel, power_channel, label, power_label, unit):
+        render = self.renderer.set
+
+        def step(converted):
+            value = converted[channel]
+            if value != value:
+                render(label, "Error")
+                return
+            render(label, f"{round(value, 2)} mA")
+            if power_label is not None:
+                render(power_label, f"{round(converted[power_channel], 2)} {unit}")
+        return step
+
+    def _plan_valve(self, switch, output_device, channel):
+        def step():
+            output_device.values[channel] = switch.get() == 1
+        return step
+
+    def start_loop(self):
+        """
+        Startet den periodischen Betrieb über den DeadlineScheduler (self.scheduler):
+          - control : Excel-Ablauf, Controller und Ausgänge (control_step); mit ControlThread
+                      ('control_thread': true) nur Excel-Ablauf und Übergabe der Schalter
+          - display : Anzeige der Messwerte (display_step)
+          - logging : Save-Switch und Sollwerte für das Logging (update_logging)
+          - trends  : Trenddarstellungen aus dem Verlauf (update_trends, nur mit 'trends')
+        Die Perioden kommen aus 'control_period', 'display_period' und 'log_period'
+        (Millisekunden, Standard jeweils 50) im TKINTER-Block; die Trends laufen alle 500 ms.
+        """
+        self.scheduler.start()
+
+    def control_step(self):
+        """Excel-Ablauf fortschreiben und Controller/Ausgänge aktualisieren."""
+        clock = time.perf_counter
+        record = self.profiler.record
+
+        # Excel-Modus: Aktualisiere Timer und Eingaben aus Excel
+        if self.running_excel == 1:
+            start = clock()
+            now = self.clock()
+            self.t_end = self.run_time - now
+            output, segment, self.t_section = self.recipe.evaluate(now - self.t0)
+            self.section = self.recipe.first_row + segment
+            self.renderer.set(self.labels['Timer'], f"{self.t_end/60:.2f} min")
+            registry = self.registry
+            for control_name, control_rule in self.modbus_obj.config.items():
+                # Aktualisiere den Controller und die mfc-Eingaben
+                if control_rule.get("type") in ("easy_PI", "mfc", "ExtOutput"):
+                    entry = registry[control_name].widget
+                    entry.delete(0, tk.END)
+                    entry.insert(0, f"{output[control_name]:.2f}")
+
+            for control_name, control_rule in self.tfh_obj.config.items():
+                # Aktualisiere den Controller und die mfc-Eingaben
+                device_type = control_rule.get("type")
+                if device_type in ("easy_PI", "direct_Heat", "mfc"):
+                    entry = registry[control_name].widget
+                    entry.delete(0, tk.END)
+                    entry.insert(0, f"{output[control_name]:.2f}")
+                elif device_type == "valve":
+                    if output[control_name] == 1:
+                        registry[control_name].widget.select()
+                    else:
+                        registry[control_name].widget.deselect()
+
+            self.set_data()
+                
+            if self.t_end < 0:
+                self.stop_excel()
+            record('control.excel', clock() - start)
+
+        if self.control_thread is not None:
+            # Schalterzustände übergeben, Controller und Ausgänge laufen im ControlThread
+            valves = self.valves
+            states = [switch.get() == 1 for switch, _, _ in valves]
+            self.control_thread.submit(self._write_valves, states, valves)
+            return
+
+        start = clock()
+        for step in self.control_plan:
+            step()
+        record('control.controllers', clock() - start)
+
+        start = clock()
+        for step in self.output_plan:
+            step()
+        record('control.valves', clock() - start)
+
+    def run_controllers(self):
+        """Ein Durchlauf des ControlThread: Controller (control_plan) ausführen."""
+        for step in self.control_plan:
+            step()
+
+    def _write_valves(self, states, valves=None):
+        for (_, output_device, channel), state in zip(self.valves if valves is None else valves, states):
+            output_device.values[channel] = state
+
+    def reset_watchdog(self):
+        """Quittiert den Watchdog des ControlThread; bis dahin bleiben die Ausgänge im sicheren Zustand."""
+        if self.control_thread is not None:
+            self.control_thread.reset()
+
+    def safe_outputs(self):
+        """
+        Sicherer Zustand für den Watchdog: alle Controller-Ausgänge auf Leistung 0.
+        Mit 'watchdog_close_valves' werden zusätzlich alle Ventile geschlossen.
+        """
+        self.controller_bank.safe_state()
+        if self.config['TKINTER'].get('watchdog_close_valves', False):
+            self._write_valves([False] * len(self.valves))
+
+    def display_step(self):
+        """Messwerte des neuesten Snapshots anzeigen und alle geänderten Labels schreiben."""
+        clock = time.perf_counter
+        start = clock()
+        self.snapshot = self.get_snapshot()
+        # Gemeinsame umgerechnete Werte für Anzeige und andere Verbraucher (siehe self.channels)
+        self.converted = converted = self.calibration.convert(self.snapshot[1])
+        if self.history is not None and self.acquisition is None:
+            self._record_history(*self.snapshot)
+        for step in self.display_plan:
+            step(converted)
+        labels_done = clock()
+        self.renderer.flush()
+        self.profiler.record('display.labels', labels_done - start)
+        self.profiler.record('display.render', clock() - labels_done)
 
-        # Speichere Werte, wenn der Save-Switch aktiv ist und mehr als 1 Sekunde vergangen ist
-        if self.buttons['Save'].get() == 1 and time.time() - self.save_timer > 1:
-            self.save_values()
-            self.save_timer = time.time()
 
-        # Plane den nächsten Aufruf in 50 ms
-        self.window.after(50, self.start_loop)
+# Dauer des Imports von tkinter_lib in Sekunden (ohne nachgeladene Module)
+IMPORT_TIME = time.perf_counter() - _IMPORT_START